@@ -4,13 +4,65 @@ Apypie - Apipie bindings for Python
 
 from __future__ import print_function, absolute_import
 
-from apypie.resource import Resource
-from apypie.action import Action
-from apypie.route import Route
-from apypie.api import Api
-from apypie.example import Example
-from apypie.param import Param
-from apypie.inflector import Inflector
-from apypie.foreman import ForemanApi, ForemanApiException
-
-__all__ = ['Api', 'Resource', 'Route', 'Action', 'Example', 'Param', 'Inflector', 'ForemanApi', 'ForemanApiException']
+import importlib
+import sys
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # pylint: disable=unused-import,cyclic-import
+    from apypie.resource import Resource  # noqa: F401
+    from apypie.action import Action  # noqa: F401
+    from apypie.endpoint import Endpoint  # noqa: F401
+    from apypie.route import Route  # noqa: F401
+    from apypie.api import Api  # noqa: F401
+    from apypie.example import Example  # noqa: F401
+    from apypie.param import Param  # noqa: F401
+    from apypie.inflector import Inflector  # noqa: F401
+    from apypie.foreman import ForemanApi, ForemanApiException  # noqa: F401
+    from apypie.aio import AsyncApi, AsyncForemanApi  # noqa: F401
+
+__all__ = ['Api', 'Resource', 'Route', 'Action', 'Endpoint', 'Example', 'Param', 'Inflector', 'ForemanApi', 'ForemanApiException', 'AsyncApi', 'AsyncForemanApi']
+
+# the modules providing the names in __all__, they are only imported when one of their names is used
+_LAZY_ATTRIBUTES = {
+    'Api': 'apypie.api',
+    'Resource': 'apypie.resource',
+    'Route': 'apypie.route',
+    'Action': 'apypie.action',
+    'Endpoint': 'apypie.endpoint',
+    'Example': 'apypie.example',
+    'Param': 'apypie.param',
+    'Inflector': 'apypie.inflector',
+    'ForemanApi': 'apypie.foreman',
+    'ForemanApiException': 'apypie.foreman',
+    'AsyncApi': 'apypie.aio',
+    'AsyncForemanApi': 'apypie.aio',
+}
+
+
+def __getattr__(name):
+    # type: (str) -> object
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    if not name.startswith('_'):
+        # submodules used to be imported with the package, keep them available as attributes
+        try:
+            return importlib.import_module('{}.{}'.format(__name__, name))
+        except ModuleNotFoundError as exc:
+            if exc.name != '{}.{}'.format(__name__, name):
+                raise
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    # type: () -> list
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+if sys.version_info < (3, 7):  # pragma: no cover
+    # module level __getattr__ is only supported since Python 3.7
+    for _name in __all__:
+        __getattr__(_name)
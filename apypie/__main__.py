@@ -0,0 +1,161 @@
+"""
+Apypie command line interface
+
+Usage::
+
+    $ python -m apypie cache --uri https://foreman.example.com --username admin --password changeme
+    $ python -m apypie cache --uri https://foreman.example.com --from-file foreman.json
+"""
+
+from __future__ import print_function, absolute_import
+
+import argparse
+import errno
+import os
+import shutil
+import sys
+import tempfile
+
+from typing import Iterable, Optional  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.api import Api
+from apypie.backends import CACHE_BACKENDS
+from apypie.cache import COMPRESSION_EXTENSIONS, atomic_write
+from apypie.exceptions import DocLoadingError
+
+
+def _parser():
+    # type: () -> argparse.ArgumentParser
+    parser = argparse.ArgumentParser(prog='python -m apypie', description='Apipie bindings for Python')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    cache_parser = subparsers.add_parser('cache', help='prepare the apidoc cache, e.g. when building an image',
+                                         description='Fill the apidoc cache from a server or a local JSON file and build its indexes.')
+    cache_parser.add_argument('--uri', required=True, help='base URL of the server')
+    cache_parser.add_argument('--from-file', metavar='PATH', help='read the apidoc from a local JSON file instead of the server')
+    cache_parser.add_argument('--username', help='username to access the API')
+    cache_parser.add_argument('--password', help='password to access the API')
+    cache_parser.add_argument('--no-verify-ssl', dest='verify_ssl', action='store_false', help='do not verify the SSL certificate of the server')
+    cache_parser.add_argument('--api-version', type=int, default=1, help='version of the API (default: %(default)s)')
+    cache_parser.add_argument('--language', help='prefered locale for the API description')
+    cache_parser.add_argument('--apidoc-cache-base-dir', help='base directory for building the apidoc cache dir')
+    cache_parser.add_argument('--apidoc-cache-dir', help='where to cache the JSON description of the API')
+    cache_parser.add_argument('--apidoc-cache-name', help='name of the cache file, e.g. the apipie checksum when using --from-file')
+    cache_parser.add_argument('--compression', choices=sorted(COMPRESSION_EXTENSIONS), help='compress the cached files')
+    cache_parser.add_argument('--backend', choices=sorted(CACHE_BACKENDS), help='how to store the lookup index (default: index)')
+    cache_parser.add_argument('--sharded', action='store_true', help='split the cached apidoc into one file per resource, like --backend shards')
+    cache_parser.add_argument('--lean', action='store_true', help='build the index for apidoc_lean')
+    return parser
+
+
+def _api_kwargs(args):
+    # type: (argparse.Namespace) -> dict
+    kwargs = {
+        'uri': args.uri,
+        'username': args.username,
+        'password': args.password,
+        'verify_ssl': args.verify_ssl,
+        'api_version': args.api_version,
+        'language': args.language,
+        'apidoc_cache_compression': args.compression,
+        'apidoc_cache_sharded': args.sharded,
+        'apidoc_lean': args.lean,
+        'apidoc_cache_backend': args.backend or ('shards' if args.sharded else 'index'),
+        # the existing cache is removed anyway, so don't pick up its name
+        'apidoc_cache_name': args.apidoc_cache_name or 'default',
+    }
+    for option in ('apidoc_cache_base_dir', 'apidoc_cache_dir'):
+        if getattr(args, option) is not None:
+            kwargs[option] = getattr(args, option)
+    return kwargs
+
+
+def _import_apidoc(api, path):
+    # type: (Api, str) -> None
+    with open(path, 'rb') as source_file:
+        content = source_file.read()
+    api_doc = api.codec.loads(content)
+    if not isinstance(api_doc, dict) or 'docs' not in api_doc:
+        raise ValueError('{} is not an apidoc'.format(path))
+    try:
+        os.makedirs(api.apidoc_cache_dir)
+    except OSError as err:
+        if err.errno != errno.EEXIST or not os.path.isdir(api.apidoc_cache_dir):
+            raise
+    with atomic_write(api.apidoc_cache_file, 'wb', api.apidoc_cache_compression) as apidoc_file:
+        apidoc_file.write(content)
+
+
+def _path_size(path):
+    # type: (str) -> int
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(dirpath, filename)) for dirpath, _, filenames in os.walk(path) for filename in filenames)
+    return os.path.getsize(path)
+
+
+def cache(args):
+    # type: (argparse.Namespace) -> int
+    """
+    Fill the apidoc cache and report what it contains.
+
+    Any other cached apidoc of the same server is removed once the new one is prepared, so it is used on the next start.
+    If preparing it fails, the existing cache is kept.
+
+    :param args: The parsed command line arguments.
+
+    :returns: The exit code.
+    """
+
+    kwargs = _api_kwargs(args)
+    api = Api(**kwargs)
+    # the apidoc is prepared next to the cache, so the current cache is kept if that fails
+    os.makedirs(api.apidoc_cache_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='.apypie-', dir=os.path.dirname(os.path.normpath(api.apidoc_cache_dir)))
+    try:
+        staged = Api(**dict(kwargs, apidoc_cache_dir=staging_dir))
+        # don't reuse an apidoc this process loaded before
+        staged.clean_cache()
+        try:
+            if args.from_file:
+                _import_apidoc(staged, args.from_file)
+            staged.apidoc_index  # pylint: disable=pointless-statement
+        except (IOError, ValueError, DocLoadingError) as exc:
+            print('Could not prepare the apidoc cache: {}'.format(exc), file=sys.stderr)
+            return 1
+        kwargs['apidoc_cache_name'] = staged.apidoc_cache_name
+        api = Api(**kwargs)
+        api.clean_cache()
+        for name in os.listdir(staging_dir):
+            # lock and temporary files are hidden
+            if not name.startswith('.'):
+                os.replace(os.path.join(staging_dir, name), os.path.join(api.apidoc_cache_dir, name))
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    index = api.apidoc_index
+
+    derived = api.apidoc_backend.path
+    print('apidoc: {0} ({1} bytes)'.format(api.apidoc_cache_file, _path_size(api.apidoc_cache_file)))
+    if os.path.exists(derived):
+        print('index: {0} ({1} bytes)'.format(derived, _path_size(derived)))
+    print('resources: {}'.format(len(index)))
+    print('actions: {}'.format(sum(len(index[name]) for name in index)))
+    return 0
+
+
+def main(argv=None):
+    # type: (Optional[Iterable[str]]) -> int
+    """
+    Run the command line interface.
+
+    :param argv: The command line arguments, defaults to ``sys.argv[1:]``.
+
+    :returns: The exit code.
+    """
+
+    args = _parser().parse_args(argv)
+    return cache(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,27 +4,40 @@ Apypie Action module
 
 from __future__ import print_function, absolute_import
 
-from typing import Optional, Any, Iterable, List, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+from typing import Optional, Any, FrozenSet, Iterable, Iterator, List, Set, Tuple, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
 
 from apypie.route import Route
 from apypie.example import Example
 from apypie.param import Param
 from apypie.exceptions import MissingArgumentsError, InvalidArgumentTypesError
+from apypie.immutable import Immutable
+from apypie.payload import PayloadPlan, compile_payload_plan, recursive_dict_keys  # pylint: disable=unused-import  # noqa: F401
+from apypie.validator import Validator, compile_validator  # pylint: disable=unused-import  # noqa: F401
 
 if TYPE_CHECKING:
     from apypie.api import Api  # pylint: disable=cyclic-import,unused-import  # noqa: F401
 
 
-class Action(object):
+class Action(Immutable):  # pylint: disable=too-many-instance-attributes
     """
     Apipie Action
     """
 
+    __slots__ = ('name', 'resource', 'api', '_apidoc', '_routes', '_route_table', '_route_params', '_params', '_examples', '_validator', '_payload_plan')
+
     def __init__(self, name, resource, api):
         # type: (str, str, Api) -> None
         self.name = name
         self.resource = resource
         self.api = api
+        self._apidoc = None  # type: Optional[dict]
+        self._routes = None  # type: Optional[Tuple[Route, ...]]
+        self._route_table = None  # type: Optional[Tuple[Tuple[FrozenSet[str], Route], ...]]
+        self._route_params = None  # type: Optional[FrozenSet[str]]
+        self._params = None  # type: Optional[Tuple[Param, ...]]
+        self._examples = None  # type: Optional[Tuple[Example, ...]]
+        self._validator = None  # type: Optional[Validator]
+        self._payload_plan = None  # type: Optional[PayloadPlan]
 
     @property
     def apidoc(self):
@@ -35,41 +48,61 @@ class Action(object):
         :returns: The apidoc.
         """
 
-        resource_methods = self.api.apidoc['docs']['resources'][self.resource]['methods']
-        return [method for method in resource_methods if method['name'] == self.name][0]
+        if self._apidoc is None:
+            self._apidoc = self.api.apidoc_index[self.resource][self.name]
+        return self._apidoc
 
     @property
     def routes(self):
-        # type: () -> List[Route]
+        # type: () -> Tuple[Route, ...]
         """
         The routes this action can be invoked by.
 
         :returns: The routes
         """
 
-        return [Route(route['api_url'], route['http_method'], route['short_description']) for route in self.apidoc['apis']]
+        if self._routes is None:
+            self._routes = tuple(Route(route['api_url'], route['http_method'], route['short_description']) for route in self.apidoc['apis'])
+        return self._routes
 
     @property
     def params(self):
-        # type: () -> List[Param]
+        # type: () -> Tuple[Param, ...]
         """
         The params accepted by this action.
 
         :returns: The params.
         """
 
-        return [Param(**param) for param in self.apidoc['params']]
+        if self._params is None:
+            self._params = tuple(Param(**param) for param in self.apidoc['params'])
+        return self._params
 
     @property
     def examples(self):
-        # type: () -> List[Example]
+        # type: () -> Tuple[Example, ...]
         """
         The examples of this action.
 
         :returns: The examples.
         """
 
-        return [Example.parse(example) for example in self.apidoc['examples']]
+        if self._examples is None:
+            self._examples = tuple(Example.parse(example) for example in self.apidoc.get('examples', []))
+        return self._examples
+
+    @property
+    def validator(self):
+        # type: () -> Validator
+        """
+        The params of this action compiled into a validator, see :func:`apypie.validator.compile_validator`.
+
+        :returns: The validator.
+        """
+
+        if self._validator is None:
+            self._validator = compile_validator(self.params)
+        return self._validator
 
     def call(self, params=None, headers=None, options=None, data=None, files=None):  # pylint: disable=too-many-arguments
         # type: (Optional[dict], Optional[dict], Optional[dict], Optional[Any], Optional[dict]) -> Optional[dict]
@@ -97,12 +130,22 @@ class Action(object):
         :returns: The best route.
         """
 
-        param_keys = set(self.filter_empty_params(params).keys())
-        sorted_routes = sorted(self.routes, key=lambda route: [-1 * len(route.params_in_path), route.path])
-        for route in sorted_routes:
-            if set(route.params_in_path) <= param_keys:
+        if params is not None and not isinstance(params, dict):
+            raise InvalidArgumentTypesError
+        route_table = self._route_table
+        if route_table is None:
+            # most params in the path first, the last route is the fallback
+            sorted_routes = sorted(self.routes, key=lambda route: (-len(route.path_params), route.path))
+            route_table = tuple((route.path_params, route) for route in sorted_routes)
+            # the table is set last, as other threads take it as the sign that both are ready
+            self._route_params = frozenset().union(*(route.path_params for route in sorted_routes))
+            self._route_table = route_table
+        # only params used in a path can make a difference
+        param_keys = {name for name in self._route_params or () if params and params.get(name) is not None}
+        for path_params, route in route_table:
+            if path_params <= param_keys:
                 return route
-        return sorted_routes[-1]
+        return route_table[-1][1]
 
     def validate(self, values, data=None, files=None):
         # type: (dict, Optional[Any], Optional[dict]) -> None
@@ -114,7 +157,34 @@ class Action(object):
         :param files: Additional files to validate.
         """
 
-        self._validate(self.params, values, data, files)
+        if self.api.compile_validators:
+            self.validator(values, data, files)
+        else:
+            self._validate(self.params, values, data, files)
+
+    def validate_many(self, values_list, data=None, files=None):
+        # type: (Iterable[dict], Optional[Any], Optional[dict]) -> Iterator[Tuple[dict, Optional[Exception]]]
+        """
+        Validate many sets of parameter values, like :meth:`validate` does for one.
+
+        The params are compiled into a validator once, see :func:`apypie.validator.compile_validator`,
+        and a failing set of values doesn't stop the validation of the following ones.
+
+        :param values_list: The sets of values to validate.
+        :param data: Additional binary data to validate, the same for all values.
+        :param files: Additional files to validate, the same for all values.
+
+        :returns: For each set of values, the values and the error raised when validating them or ``None``.
+        """
+
+        validator = self.validator
+        for values in values_list:
+            try:
+                validator(values, data, files)
+            except (MissingArgumentsError, InvalidArgumentTypesError, ValueError, TypeError, AttributeError) as exc:
+                yield values, exc
+            else:
+                yield values, None
 
     @staticmethod
     def _add_to_path(path=None, additions=None):
@@ -204,34 +274,55 @@ class Action(object):
             >>> action.prepare_params({'id': 1})
             {'user': {'id': 1}}
         """
-        params = self._prepare_params(self.params, input_dict)
-        route_params = self._prepare_route_params(input_dict)
-        params.update(route_params)
-        return params
+        return self.prepare_payload(input_dict)[0]
 
-    def _prepare_params(self, action_params, input_dict):
-        # type: (Iterable[Param], dict) -> dict
-        result = {}
+    def prepare_payload(self, input_dict):
+        # type: (dict) -> Tuple[dict, Set[str]]
+        """
+        Like :meth:`prepare_params`, but also report the keys of the input that are not used in the params.
 
-        for param in action_params:
-            if param.expected_type == 'hash' and param.params:
-                nested_dict = input_dict.get(param.name, input_dict)
-                nested_result = self._prepare_params(param.params, nested_dict)
-                if nested_result:
-                    result[param.name] = nested_result
-            elif param.name in input_dict:
-                result[param.name] = input_dict[param.name]
+        The params are prepared with a plan compiled once per action, see :func:`apypie.payload.compile_payload_plan`.
 
-        return result
+        :param input_dict: a dict with data that should be used to fill in the params
 
-    def _prepare_route_params(self, input_dict):
-        # type: (dict) -> dict
-        result = {}
+        :returns: The params and the set of unsupported keys.
+        """
 
-        route = self.find_route(input_dict)
+        if self._payload_plan is None:
+            self._payload_plan = compile_payload_plan(self.params)
+        used_keys = set()  # type: Set[str]
+        params = self._payload_plan(input_dict, used_keys)
 
+        route = self.find_route(input_dict)
         for url_param in route.params_in_path:
             if url_param in input_dict:
-                result[url_param] = input_dict[url_param]
+                params[url_param] = input_dict[url_param]
+                used_keys.add(url_param)
 
-        return result
+        unsupported = input_dict.keys() - used_keys
+        if unsupported:
+            # keys can also be found in the values of the params, e.g. in a hash without nested params
+            unsupported.difference_update(recursive_dict_keys(params))
+        return params, unsupported
+
+    def prepare_params_many(self, input_dicts):
+        # type: (Iterable[dict]) -> Iterator[Tuple[Optional[dict], Optional[Exception]]]
+        """
+        Transform many dicts with data into params for calling the action, like :meth:`prepare_params` does for one.
+
+        A dict that can't be transformed doesn't stop the transformation of the following ones.
+
+        :param input_dicts: dicts with data that should be used to fill in the params
+
+        :returns: For each dict, the params or ``None`` and the error raised when preparing them or ``None``.
+        """
+
+        for input_dict in input_dicts:
+            try:
+                if not isinstance(input_dict, dict):
+                    raise InvalidArgumentTypesError
+                params = self.prepare_payload(input_dict)[0]
+            except (InvalidArgumentTypesError, AttributeError, TypeError) as exc:
+                yield None, exc
+            else:
+                yield params, None
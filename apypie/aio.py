@@ -0,0 +1,628 @@
+"""
+Apypie Aio module
+
+asyncio bindings, sending the requests prepared by :class:`apypie.Api` through an asynchronous transport
+"""
+
+from __future__ import print_function, absolute_import
+
+import asyncio
+import importlib.util
+import os
+import ssl
+import zlib
+from urllib.parse import urlsplit
+
+from typing import cast, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, Union, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+from requests import Response
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout, ContentDecodingError, ReadTimeout, RequestException, SSLError
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+
+from apypie.api import Api, NO_CONTENT, NOT_MODIFIED, _decode_json
+from apypie.foreman import ForemanApi, ForemanApiException, PER_PAGE, _is_foreman_task, _task_result
+from apypie.transport import build_response
+
+if TYPE_CHECKING:
+    from apypie.action import Action  # pylint: disable=unused-import  # noqa: F401
+
+Timeout = Tuple[Optional[float], Optional[float]]
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+DEFAULT_MAX_CONNECTIONS = 100
+# the content encodings all transports can decode, requests might accept more depending on the installed libraries
+ACCEPT_ENCODING = 'gzip, deflate'
+
+
+def _ssl_context(verify, cert):
+    # type: (Union[bool, str], Optional[Union[str, Tuple[str, str]]]) -> ssl.SSLContext
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif verify is True:
+        context = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+    elif os.path.isdir(verify):
+        context = ssl.create_default_context(capath=verify)
+    else:
+        context = ssl.create_default_context(cafile=verify)
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert:
+        context.load_cert_chain(cert)
+    return context
+
+
+def _body(body):
+    # type: (Any) -> Optional[bytes]
+    if hasattr(body, 'read'):
+        body = body.read()
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return body
+
+
+class AsyncTransport(object):
+    """
+    Base class for sending HTTP requests for :class:`AsyncApi`.
+
+    :param verify: verify the TLS certificate of the server, or the path to a CA bundle to verify it with. Defaults to `True`.
+    :param cert: client certificate, either the path to a file containing the key too, or a `(cert, key)` tuple. Defaults to `None`.
+    :param timeout: `(connect, read)` timeouts in seconds, `None` to wait forever. Defaults to `None`.
+    :param limit: maximum number of connections to open. Defaults to `100`.
+    """
+
+    def __init__(self, verify=True, cert=None, timeout=None, limit=DEFAULT_MAX_CONNECTIONS):
+        # type: (Union[bool, str], Optional[Union[str, Tuple[str, str]]], Optional[Timeout], int) -> None
+        self.verify = verify
+        self.cert = cert
+        self.timeout = timeout or (None, None)  # type: Timeout
+        self.limit = limit
+        self._ssl_context = None  # type: Optional[ssl.SSLContext]
+
+    @property
+    def ssl_context(self):
+        # type: () -> ssl.SSLContext
+        """
+        TLS settings for connections to `https` URLs, built from :attr:`verify` and :attr:`cert`.
+        """
+
+        if self._ssl_context is None:
+            self._ssl_context = _ssl_context(self.verify, self.cert)
+        return self._ssl_context
+
+    async def request(self, method, url, headers, body=None):
+        # type: (str, str, Mapping[str, str], Optional[bytes]) -> Response
+        """
+        Send an HTTP request.
+
+        Failures to connect or to receive the response are raised as :class:`requests.exceptions.RequestException`.
+
+        :param method: The HTTP method.
+        :param url: The full URL, including the query string.
+        :param headers: The headers to send.
+        :param body: The body to send.
+
+        :returns: The response, a :class:`requests.Response` with the body already read, see :func:`apypie.transport.build_response`.
+        """
+
+        raise NotImplementedError
+
+    async def close(self):
+        # type: () -> None
+        """
+        Close all connections.
+        """
+
+
+class StreamTransport(AsyncTransport):
+    """
+    Sends HTTP/1.1 requests over :mod:`asyncio` streams, keeping connections open for later requests.
+
+    Only uses the standard library, responses compressed with `gzip` or `deflate` are decoded,
+    other content encodings raise :class:`requests.exceptions.ContentDecodingError`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # type: (Any, Any) -> None
+        super().__init__(*args, **kwargs)
+        self._idle = {}  # type: Dict[Tuple[str, str, int], List[Connection]]
+        self._semaphore = None  # type: Optional[asyncio.Semaphore]
+
+    async def request(self, method, url, headers, body=None):
+        # type: (str, str, Mapping[str, str], Optional[bytes]) -> Response
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or '', parts.port or (443 if parts.scheme == 'https' else 80))
+        message = _request_message(method, parts, headers, body)
+        if self._semaphore is None:
+            # created on first use, as it binds to the running event loop on older Pythons
+            self._semaphore = asyncio.Semaphore(self.limit)
+        try:
+            async with self._semaphore:
+                while self._idle.get(key):
+                    response = await self._exchange(key, self._idle[key].pop(), method, url, message, reused=True)
+                    if response is not None:
+                        return response
+                response = await self._exchange(key, await self._connect(key), method, url, message)
+                return cast(Response, response)
+        except RequestException:
+            raise
+        except asyncio.TimeoutError as exc:
+            raise ReadTimeout('Read timed out: {}'.format(url)) from exc
+        except ssl.SSLError as exc:
+            raise SSLError(exc) from exc
+        except (OSError, EOFError) as exc:
+            raise RequestsConnectionError(exc) from exc
+
+    async def close(self):
+        # type: () -> None
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _reader, writer in connections:
+                writer.close()
+
+    async def _connect(self, key):
+        # type: (Tuple[str, str, int]) -> Connection
+        scheme, host, port = key
+        try:
+            return await asyncio.wait_for(asyncio.open_connection(host, port, ssl=self.ssl_context if scheme == 'https' else None), self.timeout[0])
+        except asyncio.TimeoutError as exc:
+            raise ConnectTimeout('Connection to {}:{} timed out'.format(host, port)) from exc
+
+    async def _exchange(self, key, connection, method, url, message, reused=False):  # pylint: disable=too-many-arguments
+        # type: (Tuple[str, str, int], Connection, str, str, bytes, bool) -> Optional[Response]
+        reader, writer = connection
+        try:
+            writer.write(message)
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout[1])
+            if not status_line:
+                raise ConnectionResetError('Connection closed by the server')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if reused:
+                # the server closed the connection while it was idle, the request did not reach it
+                return None
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        try:
+            response, keep_alive = await asyncio.wait_for(_read_response(reader, status_line, method, url), self.timeout[1])
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.setdefault(key, []).append(connection)
+        else:
+            writer.close()
+        return response
+
+
+def _request_message(method, parts, headers, body):
+    # type: (str, Any, Mapping[str, str], Optional[bytes]) -> bytes
+    target = parts.path or '/'
+    if parts.query:
+        target = '{}?{}'.format(target, parts.query)
+    lines = ['{} {} HTTP/1.1'.format(method, target), 'Host: {}'.format(parts.netloc.rpartition('@')[2])]
+    for name, value in headers.items():
+        if name.lower() not in ('host', 'content-length'):
+            lines.append('{}: {}'.format(name, value.decode('latin-1') if isinstance(value, bytes) else value))
+    if body or method in ('POST', 'PUT', 'PATCH'):
+        lines.append('Content-Length: {}'.format(len(body or b'')))
+    return '\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n' + (body or b'')
+
+
+async def _read_response(reader, status_line, method, url):
+    # type: (asyncio.StreamReader, bytes, str, str) -> Tuple[Response, bool]
+    version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+    headers = []
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers.append((name.strip(), value.strip()))
+    response = build_response(url, int(status), reason, headers, b'')
+
+    connection = response.headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+    if method == 'HEAD' or response.status_code in (NO_CONTENT, NOT_MODIFIED):
+        content = b''
+    elif 'chunked' in response.headers.get('transfer-encoding', '').lower():
+        content = await _read_chunked(reader)
+    elif 'content-length' in response.headers:
+        content = await reader.readexactly(int(response.headers['content-length']))
+    else:
+        content = await reader.read()
+        keep_alive = False
+
+    if content:
+        content = _decode_content(content, response.headers.get('content-encoding', '').strip().lower())
+    response._content = content  # pylint: disable=protected-access
+    return response, keep_alive
+
+
+def _decode_content(content, encoding):
+    # type: (bytes, str) -> bytes
+    if encoding in ('', 'identity'):
+        return content
+    if encoding not in ('gzip', 'deflate'):
+        raise ContentDecodingError('Unsupported content encoding {}'.format(encoding))
+    try:
+        # detect the gzip or zlib header automatically
+        return zlib.decompress(content, 32 + zlib.MAX_WBITS)
+    except zlib.error as exc:
+        raise ContentDecodingError('Could not decode the {} response: {}'.format(encoding, exc)) from exc
+
+
+async def _read_chunked(reader):
+    # type: (asyncio.StreamReader) -> bytes
+    chunks = []  # type: List[bytes]
+    while True:
+        size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+        if not size:
+            # skip the trailers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class AiohttpTransport(AsyncTransport):
+    """
+    Sends HTTP requests with an `aiohttp.ClientSession`. Requires `aiohttp`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # type: (Any, Any) -> None
+        super().__init__(*args, **kwargs)
+        self._session = None  # type: Any
+
+    async def request(self, method, url, headers, body=None):
+        # type: (str, str, Mapping[str, str], Optional[bytes]) -> Response
+        import aiohttp  # type: ignore  # pylint: disable=import-outside-toplevel,import-error
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit, ssl=self.ssl_context),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout[0], sock_read=self.timeout[1]))
+        try:
+            async with self._session.request(method, url, headers=headers, data=body) as response:
+                content = await response.read()
+        except asyncio.TimeoutError as exc:
+            raise ReadTimeout('Request timed out: {}'.format(url)) from exc
+        except aiohttp.ClientSSLError as exc:
+            raise SSLError(exc) from exc
+        except aiohttp.ClientError as exc:
+            raise RequestsConnectionError(exc) from exc
+        return build_response(str(response.url), response.status, response.reason or '', response.headers.items(), content)
+
+    async def close(self):
+        # type: () -> None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def default_transport(**kwargs):
+    # type: (Any) -> AsyncTransport
+    """
+    Create the transport used when none is passed to :class:`AsyncApi`.
+
+    :param kwargs: The parameters of :class:`AsyncTransport`.
+
+    :returns: An :class:`AiohttpTransport` if `aiohttp` is installed, a :class:`StreamTransport` otherwise.
+    """
+
+    if importlib.util.find_spec('aiohttp') is not None:
+        return AiohttpTransport(**kwargs)
+    return StreamTransport(**kwargs)
+
+
+class AsyncApi(object):
+    """
+    Apipie API bindings for :mod:`asyncio`
+
+    Takes the parameters of :class:`apypie.Api`, which loads the apidoc, validates the params and prepares the requests.
+    The requests are then sent by an :class:`AsyncTransport`, without blocking the event loop.
+    Loading or refreshing the apidoc happens in a thread of the default executor of the loop.
+    Kerberos authentication is not supported.
+
+    :param transport: the :class:`AsyncTransport` sending the requests.
+        Defaults to an :class:`AiohttpTransport` if `aiohttp` is installed, a :class:`StreamTransport` otherwise.
+    :param max_connections: maximum number of connections the default transport opens. Defaults to `100`.
+
+    Usage::
+
+      >>> import apypie
+      >>> async with apypie.AsyncApi(uri='https://api.example.com', username='admin', password='changeme') as api:
+      ...     await api.call('users', 'show', {'id': 1})
+    """
+
+    _api_class = Api  # type: Type[Api]
+
+    def __init__(self, **kwargs):
+        if kwargs.get('kerberos'):
+            raise ValueError('Kerberos authentication is not supported by AsyncApi.')
+        # the transport of the Api, which loads the apidoc, stays the default one
+        self.transport = kwargs.pop('transport', None)  # type: AsyncTransport
+        #: The :class:`apypie.Api` handling the apidoc and preparing the requests.
+        self.api = self._api_class(**kwargs)
+        if self.transport is None:
+            cert = (kwargs['client_cert'], kwargs['client_key']) if kwargs.get('client_cert') and kwargs.get('client_key') else None
+            self.transport = default_transport(verify=kwargs.get('verify_ssl', True), cert=cert, timeout=self.api.timeout,
+                                               limit=kwargs.get('max_connections', DEFAULT_MAX_CONNECTIONS))
+
+    async def __aenter__(self):
+        # type: () -> AsyncApi
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # type: (Any) -> None
+        await self.close()
+
+    @property
+    def apidoc(self):
+        # type: () -> dict
+        """
+        The full apidoc, see :attr:`apypie.Api.apidoc`.
+
+        Blocks while loading the apidoc, if no call loaded it yet.
+        """
+
+        return self.api.apidoc
+
+    @property
+    def resources(self):
+        # type: () -> Iterable
+        """
+        List of available resources, see :attr:`apypie.Api.resources`.
+
+        Blocks while loading the apidoc, if no call loaded it yet.
+        """
+
+        return self.api.resources
+
+    async def close(self):
+        # type: () -> None
+        """
+        Close the connections of the transport.
+        """
+
+        await self.transport.close()
+
+    async def _ensure_apidoc(self):
+        # type: () -> None
+        # loading the apidoc reads files or even downloads it, which must not block the event loop
+        if self.api._apidoc_index_blocks():  # pylint: disable=protected-access
+            await asyncio.get_event_loop().run_in_executor(None, lambda: self.api.apidoc_index)
+
+    async def call(self, resource_name, action_name, params=None, headers=None, options=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (str, str, Optional[dict], Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Optional[dict]
+        """
+        Call an action in the API, see :meth:`apypie.Api.call`.
+
+        Usage::
+
+            >>> await api.call('users', 'show', {'id': 1})
+        """
+        if options is None:
+            options = {}
+        if params is None:
+            params = {}
+
+        await self._ensure_apidoc()
+        action = self.api.resource(resource_name).action(action_name)
+        if not options.get('skip_validation', False):
+            action.validate(params, data, files)
+
+        return await self._call_action(action, params, headers, data, files)
+
+    async def _call_action(self, action, params=None, headers=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (Action, Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Optional[dict]
+        if params is None:
+            params = {}
+
+        route = action.find_route(params)
+        get_params = {key: value for key, value in params.items() if key not in route.path_params}
+        return await self.http_call(
+            route.method,
+            route.path_with_params(params),
+            get_params,
+            headers, data, files)
+
+    async def http_call(self, http_method, path, params=None, headers=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (str, str, Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Optional[dict]
+        """
+        Execute an HTTP request, see :meth:`apypie.Api.http_call`.
+
+        :return: :class:`dict` object
+        :rtype: dict
+        """
+
+        request = self.api.prepare_request(http_method, path, params, headers, data, files)
+        headers = request.headers.copy()
+        headers['Accept-Encoding'] = ACCEPT_ENCODING
+        response = await self.transport.request(cast(str, request.method), cast(str, request.url), headers, _body(request.body))
+        response.raise_for_status()
+        cache_name = response.headers.get('apipie-checksum')
+        if cache_name is not None and cache_name != self.api.apidoc_cache_name:
+            # waits for the apidoc lock, which is held while loading the apidoc
+            await asyncio.get_event_loop().run_in_executor(None, self.api.validate_cache, cache_name)
+        if response.status_code == NO_CONTENT:
+            return None
+        return _decode_json(self.api.codec, response)
+
+    async def call_many(self, calls, max_concurrency=None, fail_fast=False):
+        # type: (Iterable[Sequence], Optional[int], bool) -> List[Tuple[Optional[dict], Optional[BaseException]]]
+        """
+        Call many actions in the API concurrently, see :meth:`apypie.Api.call_many`.
+
+        :param calls: The calls, each a sequence of the arguments to :meth:`call`, like `(resource_name, action_name, params)`.
+        :param max_concurrency: Maximum number of calls running at the same time. Defaults to the `limit` of the transport.
+        :param fail_fast: Do not start any further calls once one failed, those are reported with a `concurrent.futures.CancelledError`.
+
+        :returns: A list of `(result, exception)` tuples in the order of the calls, where `exception` is `None` on success.
+        """
+
+        return await self._call_many(self.call, calls, max_concurrency, fail_fast)
+
+    async def _call_many(self, function, calls, max_concurrency=None, fail_fast=False):
+        # type: (Callable, Iterable[Sequence], Optional[int], bool) -> List[Tuple[Any, Optional[BaseException]]]
+        from concurrent.futures import CancelledError  # pylint: disable=import-outside-toplevel
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.transport.limit)
+        failed = asyncio.Event()
+
+        async def _call(call):
+            # type: (Sequence) -> Any
+            async with semaphore:
+                if failed.is_set():
+                    raise CancelledError()
+                try:
+                    return await function(*call)
+                except Exception:
+                    if fail_fast:
+                        failed.set()
+                    raise
+
+        outcomes = await asyncio.gather(*(_call(call) for call in calls), return_exceptions=True)
+        return [(None, outcome) if isinstance(outcome, BaseException) else (outcome, None) for outcome in outcomes]
+
+
+class AsyncForemanApi(AsyncApi):
+    """
+    :class:`AsyncApi` with the settings and helper functions of :class:`apypie.ForemanApi`
+
+    Usage::
+
+      >>> import apypie
+      >>> async with apypie.AsyncForemanApi(uri='https://foreman.example.com', username='admin', password='changeme') as api:
+      ...     await api.show('organizations', 1)
+    """
+
+    _api_class = ForemanApi
+
+    def __init__(self, **kwargs):
+        self.task_timeout = kwargs.get('task_timeout', 60)
+        self.task_poll = 4
+        super().__init__(**kwargs)
+
+    def validate_payload(self, resource, action, payload):
+        # type: (str, str, dict) -> Tuple[dict, set]
+        """
+        Check whether the payload only contains supported keys, see :meth:`apypie.ForemanApi.validate_payload`.
+        """
+
+        return cast(ForemanApi, self.api).validate_payload(resource, action, payload)
+
+    async def resource_action(self, resource, action, params, options=None, data=None, files=None,  # pylint: disable=too-many-arguments
+                              ignore_task_errors=False):
+        # type: (str, str, dict, Optional[dict], Optional[dict], Optional[dict], bool) -> Optional[dict]
+        """
+        Perform a generic action on a resource, see :meth:`apypie.ForemanApi.resource_action`
+
+        Will wait for tasks if the action returns one
+        """
+        await self._ensure_apidoc()
+        resource_payload = self.validate_payload(resource, action, params)[0]
+        if options is None:
+            options = {}
+        try:
+            result = await self.call(resource, action, resource_payload, options=options, data=data, files=files)
+            if result and _is_foreman_task(result):
+                result = await self.wait_for_task(result, ignore_errors=ignore_task_errors)
+        except Exception as exc:
+            msg = 'Error while performing {} on {}: {}'.format(action, resource, exc)
+            raise ForemanApiException.from_exception(exc, msg) from exc
+        return result
+
+    async def resource_action_many(self, calls, max_concurrency=None, fail_fast=False):
+        # type: (Iterable[Sequence], Optional[int], bool) -> List[Tuple[Optional[dict], Optional[BaseException]]]
+        """
+        Perform many generic actions concurrently, see :meth:`resource_action` and :meth:`AsyncApi.call_many`
+
+        Each call is a sequence of the arguments to :meth:`resource_action`, like `(resource, action, params)`.
+        Returns `(result, exception)` tuples in the order of the calls.
+        """
+        return await self._call_many(self.resource_action, calls, max_concurrency, fail_fast)
+
+    async def wait_for_task(self, task, ignore_errors=False):
+        # type: (dict, bool) -> dict
+        """
+        Wait for a foreman-tasks task, polling it every ``self.task_poll`` seconds without blocking the event loop.
+
+        Will raise a ForemanApiException when task has not finished in ``self.task_timeout`` seconds.
+        """
+        duration = self.task_timeout
+        while task['state'] not in ['paused', 'stopped']:
+            duration -= self.task_poll
+            if duration <= 0:
+                raise ForemanApiException(msg="Timeout waiting for Task {}".format(task['id']))
+            await asyncio.sleep(self.task_poll)
+
+            resource_payload = self.validate_payload('foreman_tasks', 'show', {'id': task['id']})[0]
+            task = cast(dict, await self.call('foreman_tasks', 'show', resource_payload))
+        return _task_result(task, ignore_errors)
+
+    async def show(self, resource, resource_id, params=None):
+        # type: (str, int, Optional[dict]) -> Optional[dict]
+        """
+        Execute the ``show`` action on an entity, see :meth:`apypie.ForemanApi.show`.
+        """
+        payload = {'id': resource_id}
+        if params:
+            payload.update(params)
+        return await self.resource_action(resource, 'show', payload)
+
+    async def list(self, resource, search=None, params=None):
+        # type: (str, Optional[str], Optional[dict]) -> list
+        """
+        Execute the ``index`` action on an resource, see :meth:`apypie.ForemanApi.list`.
+        """
+        payload = {'per_page': PER_PAGE}  # type: dict
+        if search is not None:
+            payload['search'] = search
+        if params:
+            payload.update(params)
+
+        result = await self.resource_action(resource, 'index', payload)
+        if result:
+            return result['results']
+        return []
+
+    async def create(self, resource, desired_entity, params=None):
+        # type: (str, dict, Optional[dict]) -> Optional[dict]
+        """
+        Create entity with given properties, see :meth:`apypie.ForemanApi.create`.
+        """
+        payload = desired_entity.copy()
+        if params:
+            payload.update(params)
+        return await self.resource_action(resource, 'create', payload)
+
+    async def update(self, resource, desired_entity, params=None):
+        # type: (str, dict, Optional[dict]) -> Optional[dict]
+        """
+        Update entity with given properties, see :meth:`apypie.ForemanApi.update`.
+        """
+        payload = desired_entity.copy()
+        if params:
+            payload.update(params)
+        return await self.resource_action(resource, 'update', payload)
+
+    async def delete(self, resource, current_entity, params=None):
+        # type: (str, dict, Optional[dict]) -> None
+        """
+        Delete a given entity, see :meth:`apypie.ForemanApi.delete`.
+        """
+        payload = {'id': current_entity['id']}
+        if params:
+            payload.update(params)
+        entity = await self.resource_action(resource, 'destroy', payload)
+
+        # this is a workaround for https://projects.theforeman.org/issues/26937
+        if entity and isinstance(entity, dict) and 'error' in entity and 'message' in entity['error']:
+            raise ForemanApiException(msg=entity['error']['message'])
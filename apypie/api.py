@@ -4,37 +4,35 @@ Apypie Api module
 
 from __future__ import print_function, absolute_import
 
+import copy
 import errno
 import glob
-import json
-from json.decoder import JSONDecodeError  # type: ignore
+import shutil
 import os
+import threading
+import time
 from urllib.parse import urljoin  # type: ignore
-import requests
 
-try:
-    from requests_gssapi import HTTPKerberosAuth  # type: ignore
-except ImportError:
-    try:
-        from requests_kerberos import HTTPKerberosAuth  # type: ignore
-    except ImportError:
-        HTTPKerberosAuth = None
-
-try:
-    from requests_oauthlib import OAuth1  # type: ignore
-except ImportError:
-    OAuth1 = None
+from typing import cast, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
 
 from apypie.resource import Resource
+from apypie.backends import CACHE_BACKENDS, CacheBackend, IndexBackend, ShardsBackend
+from apypie.endpoint import Endpoint
+from apypie.cache import (COMPRESSION_EXTENSIONS, LEAN_EXTENSION, LOCK_FILENAME, META_EXTENSION, CacheLock, atomic_write,
+                          build_index, compression_errors, make_lean, open_file, read_meta, write_meta)
 from apypie.exceptions import DocLoadingError
-
-from typing import Any, Iterable, Optional, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+from apypie.codec import JsonCodec, get_codec  # pylint: disable=unused-import  # noqa: F401
+from apypie.registry import APIDOC_REGISTRY
+from apypie.transport import SessionTransport, Transport  # pylint: disable=unused-import  # noqa: F401
 
 if TYPE_CHECKING:
+    import requests  # pylint: disable=unused-import  # noqa: F401
     from apypie.action import Action  # pylint: disable=unused-import  # noqa: F401
 
 
 NO_CONTENT = 204
+NOT_MODIFIED = 304
+APIDOC_CHUNK_SIZE = 64 * 1024
 
 
 def _qs_param(param):
@@ -50,7 +48,97 @@ def _qs_key(k, v):
     return k
 
 
-class Api(object):
+def _cache_backend(backend):
+    # type: (Any) -> Type[CacheBackend]
+    if isinstance(backend, type) and issubclass(backend, CacheBackend):
+        return backend
+    if backend in CACHE_BACKENDS:
+        return CACHE_BACKENDS[backend]
+    raise ValueError('Unsupported apidoc cache backend {}, use one of: {}'.format(backend, ', '.join(sorted(CACHE_BACKENDS))))
+
+
+def _kerberos_auth():
+    # type: () -> Any
+    # the auth backends are only imported when they are used, as importing them takes a while
+    try:
+        from requests_gssapi import HTTPKerberosAuth  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        try:
+            from requests_kerberos import HTTPKerberosAuth  # type: ignore  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            raise ValueError('Kerberos authentication requested, but neither requests-gssapi nor requests-kerberos found.')
+    return HTTPKerberosAuth()
+
+
+def _oauth1_auth(consumer_key, consumer_secret):
+    # type: (str, str) -> Any
+    try:
+        from requests_oauthlib import OAuth1  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        raise ValueError('OAuth1 authentication requested, but requests-oauthlib not found.')
+    return OAuth1(consumer_key, client_secret=consumer_secret)
+
+
+def _authenticate(session, kwargs):
+    # type: (requests.Session, Dict[str, Any]) -> None
+    if kwargs.get('username') and kwargs.get('password'):
+        session.auth = (kwargs['username'], kwargs['password'])
+
+    if kwargs.get('client_cert') and kwargs.get('client_key'):
+        session.cert = (kwargs['client_cert'], kwargs['client_key'])
+
+    if kwargs.get('kerberos'):
+        session.auth = _kerberos_auth()
+
+    if kwargs.get('oauth1_consumer_key') and kwargs.get('oauth1_consumer_secret'):
+        session.auth = _oauth1_auth(kwargs['oauth1_consumer_key'], kwargs['oauth1_consumer_secret'])
+
+
+def _pooled_session(pool_connections, pool_maxsize, pool_block):
+    # type: (int, int, bool) -> requests.Session
+    from requests import Session  # pylint: disable=import-outside-toplevel
+    from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+    session = Session()
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block))
+    return session
+
+
+def _timeout(connect_timeout, read_timeout):
+    # type: (Optional[float], Optional[float]) -> Optional[Tuple[Optional[float], Optional[float]]]
+    if connect_timeout is None and read_timeout is None:
+        return None
+    return (connect_timeout, read_timeout)
+
+
+def _decode_json(codec, response):
+    # type: (JsonCodec, requests.Response) -> Any
+    try:
+        return codec.loads(response.content)
+    except ValueError:
+        # let requests raise the error, it is a RequestException like any other failed request
+        return response.json()
+
+
+def _compression(compression):
+    # type: (Optional[str]) -> Optional[str]
+    if compression is not None and compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError('Unsupported apidoc cache compression {}, use one of: {}'.format(compression, ', '.join(sorted(COMPRESSION_EXTENSIONS))))
+    if compression == 'lzma':
+        try:
+            import lzma  # pylint: disable=import-outside-toplevel,unused-import  # noqa: F401
+        except ImportError:
+            raise ValueError('Apidoc cache compression lzma requested, but lzma not found.')
+    return compression
+
+
+def _current(value, snapshot):
+    # type: (Any, Any) -> Any
+    # the value might have been dropped by another thread in the meantime, the snapshot is still consistent then
+    return snapshot if value is None else value
+
+
+class Api(object):  # pylint: disable=too-many-instance-attributes
     """
     Apipie API bindings
 
@@ -67,8 +155,32 @@ class Api(object):
     :param apidoc_cache_base_dir: base directory for building apidoc_cache_dir. Defaults to `~/.cache/apipie_bindings`.
     :param apidoc_cache_dir: where to cache the JSON description of the API. Defaults to `apidoc_cache_base_dir/<URI>`.
     :param apidoc_cache_name: name of the cache file. If there is cache in the `apidoc_cache_dir`, it is used. Defaults to `default`.
+    :param apidoc_cache_compression: compress the files in `apidoc_cache_dir`, either `gzip` or `lzma`. Defaults to `None` (no compression).
+    :param apidoc_lean: strip fields that are only needed for human readable documentation (like descriptions and examples) when loading the apidoc. Defaults to `False`.
+    :param apidoc_cache_backend: how to store the lookup index next to the cached apidoc, one of `index` (a binary copy of the apidoc),
+        `shards` (one file per resource, only loading the resources that are used) or `sqlite` (indexed tables, only loading the actions that are used),
+        or a subclass of :class:`apypie.backends.CacheBackend`. Defaults to `index`.
+    :param apidoc_cache_sharded: shortcut for `apidoc_cache_backend='shards'`. Defaults to `False`.
+    :param apidoc_cache_ttl: number of seconds after which the cached apidoc is revalidated with the server, even if no response indicated a change. Defaults to `None` (never).
+    :param json_codec: how to encode and decode JSON, in requests, responses and the cache, either the name of one of
+        :data:`apypie.codec.JSON_CODECS` or an object with `loads` and `dumps` methods, like :class:`apypie.codec.JsonCodec` or the :mod:`json` module.
+        Defaults to `orjson` if it is installed, the :mod:`json` module of the standard library otherwise.
+    :param compile_validators: compile the params of each action into a specialized function when validating them for the first time,
+        which speeds up validating (large) payloads repeatedly. Defaults to `False`.
+    :param apidoc_cache_background_refresh: refresh an outdated apidoc in a background thread, serving the current one until the new one is ready. Defaults to `False` (refresh on next access).
     :param verify_ssl: should the SSL certificate be verified. Defaults to `True`.
     :param session: a `requests.Session` compatible object. Defaults to `requests.Session()`.
+    :param transport: the :class:`apypie.transport.Transport` sending the requests prepared with the `session`,
+        like a :class:`apypie.transport.HandlerTransport` serving them in-process. Defaults to sending them with the `session`.
+    :param pool_connections: number of hosts to keep a connection pool for, when not passing a `session`. Defaults to `10`.
+    :param pool_maxsize: maximum number of connections kept open per host, when not passing a `session`.
+        Should be at least the number of threads sharing this instance. Defaults to `10`.
+    :param pool_block: wait for a connection to become available instead of opening an extra (not kept) one
+        when all `pool_maxsize` connections are in use, when not passing a `session`. Defaults to `False`.
+    :param connect_timeout: number of seconds to wait for establishing a connection to the server. Defaults to `None` (wait forever).
+    :param read_timeout: number of seconds to wait for the server to send data. Defaults to `None` (wait forever).
+    :param pool_warmup: number of connections to open to the server when creating the instance,
+        so the first calls do not have to wait for the (TLS) handshake. Defaults to `0`.
 
     Usage::
 
@@ -91,9 +203,22 @@ class Api(object):
         apidoc_cache_base_dir = kwargs.get('apidoc_cache_base_dir', os.path.join(os.path.expanduser(xdg_cache_home), 'apypie'))
         apidoc_cache_dir_default = os.path.join(apidoc_cache_base_dir, self.uri.replace(':', '_').replace('/', '_'), 'v{}'.format(self.api_version))
         self.apidoc_cache_dir = kwargs.get('apidoc_cache_dir', apidoc_cache_dir_default)
+        self.apidoc_cache_compression = _compression(kwargs.get('apidoc_cache_compression'))
         self.apidoc_cache_name = kwargs.get('apidoc_cache_name', self._find_cache_name())
-
-        self._session = kwargs.get('session') or requests.Session()
+        self.apidoc_cache_sharded = kwargs.get('apidoc_cache_sharded', False)
+        self.apidoc_cache_backend = _cache_backend(kwargs.get('apidoc_cache_backend', 'shards' if self.apidoc_cache_sharded else 'index'))
+        self.apidoc_lean = kwargs.get('apidoc_lean', False)
+        self.apidoc_cache_ttl = kwargs.get('apidoc_cache_ttl')
+        self.apidoc_cache_background_refresh = kwargs.get('apidoc_cache_background_refresh', False)
+        self.compile_validators = kwargs.get('compile_validators', False)
+        self.codec = get_codec(kwargs.get('json_codec'))
+
+        self.timeout = _timeout(kwargs.get('connect_timeout'), kwargs.get('read_timeout'))
+        self.pool_maxsize = kwargs.get('pool_maxsize', 10)
+
+        self._session = kwargs.get('session')
+        if self._session is None:
+            self._session = _pooled_session(kwargs.get('pool_connections', 10), self.pool_maxsize, kwargs.get('pool_block', False))
         self._session.verify = kwargs.get('verify_ssl', True)
 
         self._session.headers['Accept'] = 'application/json;version={}'.format(self.api_version)
@@ -101,30 +226,24 @@ class Api(object):
         if self.language:
             self._session.headers['Accept-Language'] = self.language
 
-        if kwargs.get('username') and kwargs.get('password'):
-            self._session.auth = (kwargs['username'], kwargs['password'])
+        _authenticate(self._session, kwargs)
 
-        if kwargs.get('client_cert') and kwargs.get('client_key'):
-            self._session.cert = (kwargs['client_cert'], kwargs['client_key'])
-
-        if kwargs.get('kerberos'):
-            if HTTPKerberosAuth is not None:
-                self._session.auth = HTTPKerberosAuth()
-            else:
-                raise ValueError('Kerberos authentication requested, but neither requests-gssapi nor requests-kerberos found.')
-
-        oauth1_consumer_key = kwargs.get('oauth1_consumer_key')
-        oauth1_consumer_secret = kwargs.get('oauth1_consumer_secret')
-        if oauth1_consumer_key and oauth1_consumer_secret:
-            if OAuth1 is not None:
-                self._session.auth = OAuth1(
-                    oauth1_consumer_key,
-                    client_secret=oauth1_consumer_secret,
-                )
-            else:
-                raise ValueError('OAuth1 authentication requested, but requests-oauthlib not found.')
+        self.transport = kwargs.get('transport') or SessionTransport(self._session)  # type: Transport
 
         self._apidoc = None
+        self._apidoc_index = None  # type: Optional[Mapping]
+        self._previous_cache_name = None  # type: Optional[str]
+        self._pending_cache_name = None  # type: Optional[str]
+        self._apidoc_validated_at = None  # type: Optional[float]
+        # guards loading and swapping the apidoc, so threads sharing this instance load it only once
+        self._apidoc_lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None  # type: Optional[threading.Thread]
+        # resources handed out for the current lookup index, a new index starts with new resources
+        self._resource_cache = (None, {})  # type: Tuple[Optional[Mapping], Dict[str, Resource]]
+
+        if kwargs.get('pool_warmup'):
+            self.warm_up(kwargs['pool_warmup'])
 
     @property
     def apidoc(self):
@@ -133,13 +252,30 @@ class Api(object):
         The full apidoc.
 
         The apidoc will be fetched from the server, if that didn't happen yet.
+        It is shared with all other instances using the same apidoc of the same server and must not be modified.
+        When several threads access it at the same time, only one of them loads it.
 
         :returns: The apidoc.
         """
 
-        if self._apidoc is None:
-            self._apidoc = self._load_apidoc()
-        return self._apidoc
+        apidoc = self._apidoc
+        if apidoc is None:
+            with self._apidoc_lock:
+                # another thread might have loaded it while this one was waiting
+                apidoc = self._apidoc
+                if apidoc is None:
+                    apidoc = APIDOC_REGISTRY.get(self._apidoc_registry_key)[0]
+                if apidoc is None:
+                    api_doc, index = self._load_apidoc()
+                    apidoc, self._apidoc_index = APIDOC_REGISTRY.share(self._apidoc_registry_key, api_doc, index)
+                self._apidoc = apidoc
+        self._check_apidoc_ttl()
+        return _current(self._apidoc, apidoc)
+
+    @property
+    def _apidoc_registry_key(self):
+        # type: () -> Tuple[Optional[str], int, Optional[str], str, bool]
+        return (self.uri, self.api_version, self.language, self.apidoc_cache_name, self.apidoc_lean)
 
     @property
     def apidoc_cache_file(self):
@@ -148,7 +284,164 @@ class Api(object):
         Full local path to the cached apidoc.
         """
 
-        return os.path.join(self.apidoc_cache_dir, '{0}{1}'.format(self.apidoc_cache_name, self.cache_extension))
+        return self._cache_file(self.apidoc_cache_name)
+
+    def _cache_file(self, cache_name):
+        # type: (str) -> str
+        return os.path.join(self.apidoc_cache_dir, '{0}{1}'.format(cache_name, self.cache_extension))
+
+    @property
+    def apidoc_index_file(self):
+        # type: () -> str
+        """
+        Full local path to the precompiled index of the cached apidoc.
+        """
+
+        return '{0}{1}'.format(self._apidoc_derived_prefix, IndexBackend.extension)
+
+    @property
+    def apidoc_shards_dir(self):
+        # type: () -> str
+        """
+        Full local path to the directory with the per-resource shards of the cached apidoc.
+        """
+
+        return '{0}{1}'.format(self._apidoc_derived_prefix, ShardsBackend.extension)
+
+    @property
+    def apidoc_backend(self):
+        # type: () -> CacheBackend
+        """
+        The store of the lookup index of the cached apidoc, see `apidoc_cache_backend`.
+        """
+
+        path = '{0}{1}'.format(self._apidoc_derived_prefix, self.apidoc_cache_backend.extension)
+        return self.apidoc_cache_backend(path, self.apidoc_cache_file, self.apidoc_cache_name, self.apidoc_cache_compression, codec=self.codec)
+
+    @property
+    def _apidoc_derived_prefix(self):
+        # type: () -> str
+        # lean apidocs are derived from the same JSON, but their lookup indexes are stored separately
+        if self.apidoc_lean:
+            return '{0}{1}'.format(self.apidoc_cache_file, LEAN_EXTENSION)
+        return self.apidoc_cache_file
+
+    @property
+    def apidoc_index(self):
+        # type: () -> Mapping
+        """
+        Lookup index of the apidoc, mapping resource names to action names to the apidoc of the action.
+
+        With a lazy `apidoc_cache_backend` (like `shards` or `sqlite`), the index is read from the backend
+        and the full apidoc is only loaded if the backend has no usable data yet.
+
+        :returns: The index.
+        """
+
+        index = self._apidoc_index
+        if index is None:
+            with self._apidoc_lock:
+                index = self._apidoc_index
+                if index is None:
+                    index = APIDOC_REGISTRY.get(self._apidoc_registry_key)[1]
+                if index is None and self.apidoc_cache_backend.lazy:
+                    stored = self.apidoc_backend.read()
+                    if stored is not None:
+                        index = APIDOC_REGISTRY.share(self._apidoc_registry_key, index=stored[1])[1]
+                if index is None:
+                    api_doc = self.apidoc
+                    index = self._apidoc_index
+                    if index is None:
+                        index = APIDOC_REGISTRY.share(self._apidoc_registry_key, api_doc, build_index(api_doc))[1]
+                self._apidoc_index = index
+        self._check_apidoc_ttl()
+        return cast(Mapping, _current(self._apidoc_index, index))
+
+    def _cache_validated_at(self):
+        # type: () -> Optional[float]
+        # when the cached apidoc was last retrieved or revalidated, or None if there is no cache
+        meta = read_meta('{0}{1}'.format(self.apidoc_cache_file, META_EXTENSION), self.codec)
+        if meta.get('validated_at'):
+            return meta['validated_at']
+        try:
+            return os.path.getmtime(self.apidoc_cache_file)
+        except OSError:
+            return None
+
+    def _apidoc_index_blocks(self):
+        # type: () -> bool
+        # whether accessing apidoc_index would load or synchronously refresh the apidoc
+        if self._apidoc_index is None:
+            return APIDOC_REGISTRY.get(self._apidoc_registry_key)[1] is None
+        if self.apidoc_cache_background_refresh:
+            return False
+        if self._pending_cache_name is not None:
+            return True
+        if self.apidoc_cache_ttl is None:
+            return False
+        return self._apidoc_validated_at is None or time.time() - self._apidoc_validated_at >= self.apidoc_cache_ttl
+
+    def _check_apidoc_ttl(self):
+        # type: () -> None
+        if self._pending_cache_name is None:
+            if self.apidoc_cache_ttl is None:
+                return
+            if self._apidoc_validated_at is None:
+                self._apidoc_validated_at = self._cache_validated_at() or time.time()
+            if time.time() - self._apidoc_validated_at < self.apidoc_cache_ttl:
+                return
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            # another thread might have started the refresh in the meantime
+            if self._pending_cache_name is None and (self.apidoc_cache_ttl is None or (
+                    self._apidoc_validated_at is not None and time.time() - self._apidoc_validated_at < self.apidoc_cache_ttl)):
+                return
+            stale_before = self._apidoc_validated_at or 0
+            # even if the refresh fails, the current apidoc is used until the ttl passed again
+            self._apidoc_validated_at = time.time()
+            if self.apidoc_cache_background_refresh:
+                self._refresh_thread = threading.Thread(target=self._refresh_apidoc, args=(stale_before,), name='apypie-apidoc-refresh')
+                self._refresh_thread.daemon = True
+                self._refresh_thread.start()
+                return
+        self._refresh_apidoc(stale_before)
+
+    def _refresh_apidoc(self, stale_before):
+        # type: (float) -> None
+        # the new apidoc is retrieved by a copy of this instance, so the current apidoc
+        # stays usable until both the apidoc and its index can be swapped in at once
+        # a failed refresh of a new checksum is only retried once a response announces it again
+        pending_cache_name, self._pending_cache_name = self._pending_cache_name, None
+        refresher = copy.copy(self)
+        try:
+            api_doc, index = refresher._retrieve_newer_apidoc(pending_cache_name, stale_before)  # pylint: disable=protected-access
+        except Exception:  # pylint: disable=broad-except
+            return
+        with self._apidoc_lock:
+            self.apidoc_cache_name = refresher.apidoc_cache_name
+            if self._pending_cache_name == self.apidoc_cache_name:
+                self._pending_cache_name = None
+            self._apidoc, self._apidoc_index = APIDOC_REGISTRY.replace(self._apidoc_registry_key, self._apidoc, api_doc, index)
+            self._apidoc_validated_at = self._cache_validated_at() or time.time()
+
+    def _retrieve_newer_apidoc(self, pending_cache_name, stale_before):
+        # type: (Optional[str], float) -> Tuple[dict, Mapping]
+        self.apidoc_cache_background_refresh = False
+        self._apidoc = None
+        self._apidoc_index = None
+        if pending_cache_name is not None:
+            self.validate_cache(pending_cache_name)
+            api_doc, index = self._retrieve_apidoc()
+        else:
+            self._previous_cache_name = self.apidoc_cache_name
+            api_doc, index = self._retrieve_apidoc(stale_before)
+        self._remove_previous_cache()
+        return api_doc, index
+
+    def _cache_lock(self):
+        # type: () -> CacheLock
+        return CacheLock(os.path.join(self.apidoc_cache_dir, LOCK_FILENAME))
 
     def _cache_dir_contents(self):
         # type: () -> Iterable[str]
@@ -166,12 +459,32 @@ class Api(object):
         """
         Ensure the cached apidoc matches the one presented by the server.
 
+        If it does not, the apidoc is refreshed once on next access.
+        Until then the outdated cache is kept, so it can be revalidated with a conditional request
+        and reused if the server reports it as not modified.
+        With `apidoc_cache_background_refresh`, the outdated apidoc keeps being used until the refresh is done.
+
         :param cache_name: The name of the apidoc on the server.
         """
 
-        if cache_name is not None and cache_name != self.apidoc_cache_name:
-            self.clean_cache()
-            self.apidoc_cache_name = os.path.basename(os.path.normpath(cache_name))
+        # servers send the checksum with every response, only take the lock when it changed
+        if cache_name is None or cache_name == self.apidoc_cache_name:
+            return
+        with self._apidoc_lock:
+            if cache_name == self.apidoc_cache_name:
+                return
+            cache_name = os.path.basename(os.path.normpath(cache_name))
+            if self.apidoc_cache_background_refresh and (self._apidoc is not None or self._apidoc_index is not None):
+                self._pending_cache_name = cache_name
+                return
+            APIDOC_REGISTRY.invalidate(self._apidoc_registry_key)
+            if self._previous_cache_name is None:
+                self._previous_cache_name = self.apidoc_cache_name
+            self._apidoc = None
+            self._apidoc_index = None
+            self._apidoc_validated_at = None
+            self._resource_cache = (None, {})
+            self.apidoc_cache_name = cache_name
 
     def clean_cache(self):
         # type: () -> None
@@ -179,9 +492,40 @@ class Api(object):
         Remove any locally cached apidocs.
         """
 
-        self._apidoc = None
-        for filename in self._cache_dir_contents():
-            os.unlink(filename)
+        with self._apidoc_lock:
+            APIDOC_REGISTRY.invalidate(self._apidoc_registry_key)
+            self._apidoc = None
+            self._apidoc_index = None
+            self._apidoc_validated_at = None
+            self._resource_cache = (None, {})
+            self._previous_cache_name = None
+            self._pending_cache_name = None
+            with self._cache_lock():
+                self._remove_cache_files('*')
+
+    def _remove_cache_files(self, pattern):
+        # type: (str) -> None
+        cache_file = self._cache_file(pattern)
+        suffixes = ['', META_EXTENSION]
+        for backend in set(CACHE_BACKENDS.values()) | {self.apidoc_cache_backend}:
+            suffixes.extend([backend.extension, LEAN_EXTENSION + backend.extension])
+        for suffix in suffixes:
+            for filename in glob.iglob('{0}{1}'.format(cache_file, suffix)):
+                if os.path.isdir(filename):
+                    shutil.rmtree(filename, ignore_errors=True)
+                    continue
+                try:
+                    os.unlink(filename)
+                except FileNotFoundError:
+                    pass
+
+    def _remove_previous_cache(self):
+        # type: () -> None
+        previous_cache_name = self._previous_cache_name
+        self._previous_cache_name = None
+        if previous_cache_name is not None and previous_cache_name != self.apidoc_cache_name:
+            with self._cache_lock():
+                self._remove_cache_files(glob.escape(previous_cache_name))
 
     @property
     def resources(self):
@@ -194,13 +538,15 @@ class Api(object):
             >>> api.resources
             ['comments', 'users']
         """
-        return sorted(self.apidoc['docs']['resources'].keys())
+        return sorted(self.apidoc_index.keys())
 
     def resource(self, name):
         # type: (str) -> Resource
         """
         Get a resource.
 
+        The same object is returned for the same resource, until the apidoc changes.
+
         :param name: the name of the resource to load
         :return: :class:`Resource <Resource>` object
         :rtype: apypie.Resource
@@ -209,27 +555,95 @@ class Api(object):
 
             >>> api.resource('users')
         """
-        if name in self.resources:
-            return Resource(self, name)
-        message = "Resource '{}' does not exist in the API. Existing resources: {}".format(name, ', '.join(sorted(self.resources)))
+        index = self.apidoc_index
+        cached_index, resources = self._resource_cache
+        if cached_index is not index:
+            resources = {}
+            self._resource_cache = (index, resources)
+        resource = resources.get(name)
+        if resource is not None:
+            return resource
+        if name in index:
+            return resources.setdefault(name, Resource(self, name))
+        message = "Resource '{}' does not exist in the API. Existing resources: {}".format(name, ', '.join(self.resources))
         raise KeyError(message)
 
+    def endpoint(self, resource_name, action_name):
+        # type: (str, str) -> Endpoint
+        """
+        Get a prepared callable for an action, for calling the same action many times.
+
+        Calling it behaves like :meth:`call` with the resource and action given here,
+        but the action and its validator are only looked up again when the apidoc changes.
+
+        :param resource_name: name of the resource
+        :param action_name: name of the action
+        :return: :class:`Endpoint <apypie.endpoint.Endpoint>` object
+
+        Usage::
+
+            >>> show_host = api.endpoint('hosts', 'show')
+            >>> show_host({'id': 1})
+        """
+        return Endpoint(self, resource_name, action_name)
+
     def _load_apidoc(self):
-        # type: () -> dict
+        # type: () -> Tuple[dict, Mapping]
+        cached = self.apidoc_backend.read()
+        if cached is not None and cached[0] is None:
+            # lazy backends only store the index, the apidoc itself is still read from the JSON cache
+            api_doc = self._read_apidoc_cache()
+            if api_doc is not None and self.apidoc_lean:
+                make_lean(api_doc)
+            cached = None if api_doc is None else (api_doc, cached[1])
+        if cached is None:
+            api_doc = self._read_apidoc_cache()
+            if api_doc is None:
+                cached = self._retrieve_apidoc()
+            else:
+                cached = api_doc, self._write_apidoc_index(api_doc)
+        self._remove_previous_cache()
+        return cast(Tuple[dict, Mapping], cached)
+
+    def _read_apidoc_cache(self):
+        # type: () -> Optional[dict]
         try:
-            with open(self.apidoc_cache_file, 'r') as apidoc_file:  # pylint:disable=all
-                api_doc = json.load(apidoc_file)
-        except (IOError, JSONDecodeError):
-            api_doc = self._retrieve_apidoc()
-        return api_doc
+            with open_file(self.apidoc_cache_file, 'rb', self.apidoc_cache_compression) as apidoc_file:
+                return self.codec.loads(apidoc_file.read())
+        except (IOError, EOFError, ValueError) + compression_errors():
+            return None
 
-    def _retrieve_apidoc(self):
-        # type: () -> dict
+    def _write_apidoc_index(self, api_doc):
+        # type: (dict) -> dict
+        if self.apidoc_lean:
+            make_lean(api_doc)
+        index = build_index(api_doc)
+        try:
+            self.apidoc_backend.write(api_doc, index)
+        except (IOError, ValueError):
+            # the backend is only an optimization, the JSON cache is still usable
+            pass
+        return index
+
+    def _retrieve_apidoc(self, stale_before=None):
+        # type: (Optional[float]) -> Tuple[dict, dict]
         try:
             os.makedirs(self.apidoc_cache_dir)
         except OSError as err:
             if err.errno != errno.EEXIST or not os.path.isdir(self.apidoc_cache_dir):
                 raise
+        # only one process retrieves the apidoc, the others wait for it and then read the cache
+        # when revalidating, the cache is only reused if it was revalidated by someone else after stale_before
+        with self._cache_lock():
+            validated_at = self._cache_validated_at()
+            if validated_at is not None and (stale_before is None or validated_at > stale_before):
+                api_doc = self._read_apidoc_cache()
+                if api_doc is not None:
+                    return api_doc, self._write_apidoc_index(api_doc)
+            return self._retrieve_apidoc_locked()
+
+    def _retrieve_apidoc_locked(self):
+        # type: () -> Tuple[dict, dict]
         response = None
         if self.language:
             response = self._retrieve_apidoc_call('/apidoc/v{0}.{1}.json'.format(self.api_version, self.language), safe=True)
@@ -244,18 +658,67 @@ class Api(object):
                   - is your server down?""".format(self.uri, exc))
         if not response:
             raise DocLoadingError("""Could not load data from {0}""".format(self.uri))
-        with open(self.apidoc_cache_file, 'w') as apidoc_file:  # pylint:disable=all
-            apidoc_file.write(json.dumps(response))
-        return response
+        api_doc, meta = response
+        index = self._write_apidoc_index(api_doc)
+        try:
+            write_meta('{0}{1}'.format(self.apidoc_cache_file, META_EXTENSION), meta, self.codec)
+        except IOError:
+            pass
+        return api_doc, index
 
     def _retrieve_apidoc_call(self, path, safe=False):
-        # type: (str, bool) -> Optional[dict]
+        # type: (str, bool) -> Optional[Tuple[dict, dict]]
+        previous_meta = self._previous_cache_meta(path)
+        headers = {}
+        if previous_meta.get('etag'):
+            headers['If-None-Match'] = previous_meta['etag']
+        elif previous_meta.get('checksum'):
+            headers['If-None-Match'] = '"{}"'.format(previous_meta['checksum'])
+        if previous_meta.get('last_modified'):
+            headers['If-Modified-Since'] = previous_meta['last_modified']
+        headers['Accept-Encoding'] = 'gzip'
         try:
-            return self.http_call('get', path)
-        except Exception:
+            with self._http_request('get', path, headers=headers, stream=True) as response:
+                # the body is stored as-is, instead of parsing and re-serializing it
+                if response.status_code == NOT_MODIFIED:
+                    if previous_meta['cache_name'] != self.apidoc_cache_name:
+                        with open(self._cache_file(previous_meta['cache_name']), 'rb') as previous_file, atomic_write(self.apidoc_cache_file, 'wb') as apidoc_file:
+                            shutil.copyfileobj(previous_file, apidoc_file)
+                else:
+                    with atomic_write(self.apidoc_cache_file, 'wb', self.apidoc_cache_compression) as apidoc_file:
+                        for chunk in response.iter_content(chunk_size=APIDOC_CHUNK_SIZE):
+                            apidoc_file.write(chunk)
+        except Exception:  # pylint: disable=broad-except
             if not safe:
                 raise
             return None
+        api_doc = self._read_apidoc_cache()
+        if not api_doc:
+            try:
+                os.unlink(self.apidoc_cache_file)
+            except FileNotFoundError:
+                pass
+            return None
+        meta = {
+            'path': path,
+            'checksum': response.headers.get('apipie-checksum', previous_meta.get('checksum')),
+            'etag': response.headers.get('ETag', previous_meta.get('etag')),
+            'last_modified': response.headers.get('Last-Modified', previous_meta.get('last_modified')),
+            'validated_at': time.time(),
+        }
+        return api_doc, meta
+
+    def _previous_cache_meta(self, path):
+        # type: (str) -> dict
+        # metadata of the outdated cache, if it can be revalidated when retrieving path
+        if self._previous_cache_name is None:
+            return {}
+        previous_cache_file = self._cache_file(self._previous_cache_name)
+        meta = read_meta('{0}{1}'.format(previous_cache_file, META_EXTENSION), self.codec)
+        if meta.get('path') != path or not os.path.isfile(previous_cache_file):
+            return {}
+        meta['cache_name'] = self._previous_cache_name
+        return meta
 
     def call(self, resource_name, action_name, params=None, headers=None, options=None, data=None, files=None):  # pylint: disable=too-many-arguments
         # type: (str, str, Optional[dict], Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Optional[dict]
@@ -285,20 +748,61 @@ class Api(object):
         if params is None:
             params = {}
 
-        resource = Resource(self, resource_name)
-        action = resource.action(action_name)
+        action = self.resource(resource_name).action(action_name)
         if not options.get('skip_validation', False):
             action.validate(params, data, files)
 
         return self._call_action(action, params, headers, data, files)
 
+    def call_many(self, calls, max_workers=None, fail_fast=False):
+        # type: (Iterable[Sequence], Optional[int], bool) -> List[Tuple[Optional[dict], Optional[BaseException]]]
+        """
+        Call many actions in the API concurrently, see :meth:`call`.
+
+        The calls run on a bounded pool of threads, sharing the connections of the session.
+
+        :param calls: The calls, each a sequence of the arguments to :meth:`call`, like `(resource_name, action_name, params)`.
+        :param max_workers: Maximum number of calls running at the same time. Defaults to `pool_maxsize`.
+        :param fail_fast: Do not start any further calls once one failed, those are reported with a `concurrent.futures.CancelledError`.
+
+        :returns: A list of `(result, exception)` tuples in the order of the calls, where `exception` is `None` on success.
+
+        Usage::
+
+            >>> api.call_many([('users', 'show', {'id': 1}), ('users', 'show', {'id': 2})])
+        """
+
+        return self._call_many(self.call, calls, max_workers, fail_fast)
+
+    def _call_many(self, function, calls, max_workers=None, fail_fast=False):
+        # type: (Callable, Iterable[Sequence], Optional[int], bool) -> List[Tuple[Any, Optional[BaseException]]]
+        # concurrent.futures takes a while to import and is only needed here
+        from concurrent.futures import CancelledError, ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+
+        failed = threading.Event()
+
+        def _call(call):
+            # type: (Sequence) -> Any
+            if failed.is_set():
+                raise CancelledError()
+            try:
+                return function(*call)
+            except Exception:
+                if fail_fast:
+                    failed.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_maxsize) as executor:
+            futures = [executor.submit(_call, call) for call in calls]
+        return [(None, future.exception()) if future.exception() is not None else (future.result(), None) for future in futures]
+
     def _call_action(self, action, params=None, headers=None, data=None, files=None):  # pylint: disable=too-many-arguments
         # type: (Action, Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Optional[dict]
         if params is None:
             params = {}
 
         route = action.find_route(params)
-        get_params = {key: value for key, value in params.items() if key not in route.params_in_path}
+        get_params = {key: value for key, value in params.items() if key not in route.path_params}
         return self.http_call(
             route.method,
             route.path_with_params(params),
@@ -315,25 +819,76 @@ class Api(object):
         :param data: Binary data to be sent in the request
         :param files: Binary files to be sent in the request
 
+        :raises requests.exceptions.JSONDecodeError: if the response is not valid JSON.
+
         :return: :class:`dict` object
         :rtype: dict
         """
 
-        full_path = urljoin(self.uri, path)
-        kwargs = {
-            'verify': self._session.verify,
-        }
+        request = self._http_request(http_method, path, params, headers, data, files)
+        if request.status_code == NO_CONTENT:
+            return None
+        return _decode_json(self.codec, request)
+
+    def warm_up(self, connections=1):
+        # type: (int) -> None
+        """
+        Open connections to the server, which are kept in the pool of the session for later calls.
+
+        Sends concurrent `HEAD` requests to the base URL, failing ones are ignored.
+        Requests finishing early can hand their connection to the next one, so up to `connections` are opened.
+
+        :param connections: Number of connections to open.
+        """
+
+        from requests.exceptions import RequestException  # pylint: disable=import-outside-toplevel
+
+        def _head():
+            # type: () -> None
+            try:
+                self.transport.send(self.prepare_request('head', ''), timeout=self.timeout)
+            except RequestException:
+                pass
+
+        threads = [threading.Thread(target=_head) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def prepare_request(self, http_method, path, params=None, headers=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (str, str, Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> requests.PreparedRequest
+        """
+        Prepare the HTTP request :meth:`http_call` would send, without sending it.
+
+        The request includes the headers and authentication of the session.
+
+        :param params: Dict of parameters to be sent in the request
+        :param headers: Dict of headers to be sent in the request
+        :param data: Binary data to be sent in the request
+        :param files: Binary files to be sent in the request
+
+        :return: :class:`requests.PreparedRequest` object
+        """
+
+        from requests import Request  # pylint: disable=import-outside-toplevel
+        request = Request(http_method.upper(), urljoin(self.uri, path), **self._request_kwargs(http_method, params, headers, data, files))
+        return self._session.prepare_request(request)
+
+    def _request_kwargs(self, http_method, params=None, headers=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (str, Optional[dict], Optional[dict], Optional[dict], Optional[dict]) -> Dict[str, Any]
+        kwargs = {}  # type: Dict[str, Any]
 
         if headers:
             kwargs['headers'] = headers
 
-        if params:
-            if http_method in ['get', 'head']:
-                kwargs['params'] = {_qs_key(k, v): _qs_param(v) for k, v in params.items()}
-            else:
-                kwargs['json'] = params
-        elif http_method in ['post', 'put', 'patch'] and not data and not files:
-            kwargs['json'] = {}
+        if params and http_method in ['get', 'head']:
+            kwargs['params'] = {_qs_key(k, v): _qs_param(v) for k, v in params.items()}
+        elif (params or http_method in ['post', 'put', 'patch']) and not data and not files:
+            # encoded here instead of by requests, to use the codec
+            kwargs['data'] = self.codec.dumps(params or {})
+            if not any(key.lower() == 'content-type' for key in headers or {}):
+                kwargs['headers'] = dict(headers or {}, **{'Content-Type': 'application/json'})
 
         if files:
             kwargs['files'] = files
@@ -341,12 +896,14 @@ class Api(object):
         if data:
             kwargs['data'] = data
 
-        request = self._session.request(http_method, full_path, **kwargs)
+        return kwargs
+
+    def _http_request(self, http_method, path, params=None, headers=None, data=None, files=None, stream=False):  # pylint: disable=too-many-arguments
+        # type: (str, str, Optional[dict], Optional[dict], Optional[dict], Optional[dict], bool) -> requests.Response
+        request = self.transport.send(self.prepare_request(http_method, path, params, headers, data, files), stream=stream, timeout=self.timeout)
         request.raise_for_status()
         self.validate_cache(request.headers.get('apipie-checksum'))
-        if request.status_code == NO_CONTENT:
-            return None
-        return request.json()
+        return request
 
     @property
     def cache_extension(self):
@@ -354,11 +911,13 @@ class Api(object):
         """
         File extension for the local cache file.
 
-        Will include the language if set.
+        Will include the language and the compression if set.
         """
 
         if self.language:
             ext = '.{}.json'.format(self.language)
         else:
             ext = '.json'
+        if self.apidoc_cache_compression:
+            ext += COMPRESSION_EXTENSIONS[self.apidoc_cache_compression]
         return ext
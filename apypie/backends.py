@@ -0,0 +1,317 @@
+"""
+Apypie Backends module
+
+stores for the data derived from a cached apidoc, like its lookup index
+"""
+
+from __future__ import print_function, absolute_import
+
+import json
+import os
+import pathlib
+import threading
+
+from collections.abc import Mapping
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.cache import _source_stamp, read_index, read_shards, write_index, write_shards
+from apypie.codec import JsonCodec, get_codec  # pylint: disable=unused-import  # noqa: F401
+
+if TYPE_CHECKING:
+    import sqlite3  # pylint: disable=unused-import  # noqa: F401
+
+SQLITE_FORMAT = 1
+SQLITE_SCHEMA = (
+    'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    'CREATE TABLE resources (name TEXT PRIMARY KEY, doc TEXT NOT NULL)',
+    'CREATE TABLE actions (resource TEXT NOT NULL, name TEXT NOT NULL, doc TEXT NOT NULL, PRIMARY KEY (resource, name))',
+    'CREATE TABLE routes (resource TEXT NOT NULL, action TEXT NOT NULL, position INTEGER NOT NULL, doc TEXT NOT NULL,'
+    ' PRIMARY KEY (resource, action, position))',
+    'CREATE TABLE params (resource TEXT NOT NULL, action TEXT NOT NULL, position INTEGER NOT NULL, doc TEXT NOT NULL,'
+    ' PRIMARY KEY (resource, action, position))',
+)
+# parts of an action that are stored in their own table
+SQLITE_ACTION_TABLES = {
+    'apis': 'routes',
+    'params': 'params',
+}
+
+
+class CacheBackend(object):
+    """
+    Base class for stores of the data derived from a cached apidoc.
+
+    The JSON file downloaded from the server stays the source of truth,
+    a backend only stores what is needed to look up resources and actions quickly.
+
+    :param path: Where to store the data.
+    :param source_path: The JSON file the data is derived from.
+    :param checksum: The apipie checksum of the apidoc.
+    :param compression: The compression of the cache, see :func:`apypie.cache.open_file`.
+    :param codec: The JSON codec for data stored as JSON, see :func:`apypie.codec.get_codec`.
+    """
+
+    #: Extension of :attr:`path`, appended to the name of the cached JSON file.
+    extension = ''
+    #: Whether :meth:`read` returns only the lookup index, without the full apidoc.
+    lazy = False
+
+    def __init__(self, path, source_path, checksum, compression=None, codec=None):  # pylint: disable=too-many-arguments
+        # type: (str, str, str, Optional[str], Optional[JsonCodec]) -> None
+        self.path = path
+        self.source_path = source_path
+        self.checksum = checksum
+        self.compression = compression
+        self.codec = get_codec(codec)
+
+    def read(self):
+        # type: () -> Optional[Tuple[Optional[dict], Mapping]]
+        """
+        Read the stored data.
+
+        :returns: The apidoc (``None`` for lazy backends) and the lookup index, or ``None`` if nothing usable is stored.
+        """
+
+        raise NotImplementedError
+
+    def write(self, apidoc, index):
+        # type: (dict, dict) -> None
+        """
+        Store the data derived from an apidoc.
+
+        Failures are reported as :class:`IOError` or :class:`ValueError`, the cached apidoc is used without the backend then.
+
+        :param apidoc: The full apidoc.
+        :param index: The lookup index as returned by :func:`apypie.cache.build_index`.
+        """
+
+        raise NotImplementedError
+
+
+class IndexBackend(CacheBackend):
+    """
+    Stores the apidoc and its index in one binary file, see :func:`apypie.cache.write_index`.
+    """
+
+    extension = '.idx'
+
+    def read(self):
+        # type: () -> Optional[Tuple[Optional[dict], Mapping]]
+        return read_index(self.path, self.source_path, self.checksum, self.compression)  # type: ignore
+
+    def write(self, apidoc, index):
+        # type: (dict, dict) -> None
+        write_index(self.path, self.source_path, self.checksum, apidoc, index, self.compression)
+
+
+class ShardsBackend(CacheBackend):
+    """
+    Stores one file per resource and only loads the resources that are used, see :func:`apypie.cache.write_shards`.
+    """
+
+    extension = '.shards'
+    lazy = True
+
+    def read(self):
+        # type: () -> Optional[Tuple[Optional[dict], Mapping]]
+        index = read_shards(self.path, self.source_path, self.checksum, self.compression, self.codec)
+        if index is None:
+            return None
+        return None, index
+
+    def write(self, apidoc, index):
+        # type: (dict, dict) -> None
+        write_shards(self.path, self.source_path, self.checksum, apidoc, self.compression, self.codec)
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Stores resources, actions, routes and params in indexed SQLite tables.
+
+    Looking up an action only queries that action, its routes and params are only queried when they are used.
+    The database is never modified once written, so any number of processes can read it concurrently.
+    SQLite databases are not compressed, even if the rest of the cache is.
+    """
+
+    extension = '.sqlite'
+    lazy = True
+
+    def read(self):
+        # type: () -> Optional[Tuple[Optional[dict], Mapping]]
+        import sqlite3  # pylint: disable=import-outside-toplevel,redefined-outer-name  # noqa: F811
+        try:
+            stamp = _source_stamp(self.source_path)
+            connection = sqlite3.connect(pathlib.Path(self.path).absolute().as_uri() + '?mode=ro', uri=True, check_same_thread=False)
+        except (OSError, sqlite3.Error):
+            return None
+        try:
+            meta = dict(connection.execute('SELECT key, value FROM meta'))
+            if (meta.get('format') == str(SQLITE_FORMAT) and meta.get('checksum') == self.checksum
+                    and meta.get('source') == json.dumps(stamp)):
+                return None, SqliteIndex(connection, self.codec)
+        except sqlite3.Error:
+            pass
+        connection.close()
+        return None
+
+    def write(self, apidoc, index):
+        # type: (dict, dict) -> None
+        import sqlite3  # pylint: disable=import-outside-toplevel,redefined-outer-name  # noqa: F811
+        dirname, basename = os.path.split(self.path)
+        tmp_path = os.path.join(dirname, '.{0}.{1}.tmp'.format(basename, os.urandom(16).hex()))
+        try:
+            connection = sqlite3.connect(tmp_path)
+            try:
+                self._fill(connection, apidoc)
+                connection.commit()
+            finally:
+                connection.close()
+            os.replace(tmp_path, self.path)
+        except BaseException as exc:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if isinstance(exc, sqlite3.Error):
+                raise IOError('Could not write {0}: {1}'.format(self.path, exc))
+            raise
+
+    def _fill(self, connection, apidoc):
+        # type: (sqlite3.Connection, dict) -> None
+        dumps = self._dumps
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+        meta = {
+            'format': str(SQLITE_FORMAT),
+            'checksum': self.checksum,
+            'source': json.dumps(_source_stamp(self.source_path)),
+        }
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+        for name, resource in apidoc['docs']['resources'].items():
+            resource_doc = {key: value for key, value in resource.items() if key != 'methods'}
+            connection.execute('INSERT INTO resources VALUES (?, ?)', (name, dumps(resource_doc)))
+            for method in resource['methods']:
+                method_doc = {key: value for key, value in method.items() if key not in SQLITE_ACTION_TABLES}
+                connection.execute('INSERT OR REPLACE INTO actions VALUES (?, ?, ?)', (name, method['name'], dumps(method_doc)))
+                for key, table in SQLITE_ACTION_TABLES.items():
+                    connection.execute('DELETE FROM {} WHERE resource = ? AND action = ?'.format(table), (name, method['name']))
+                    connection.executemany('INSERT INTO {} VALUES (?, ?, ?, ?)'.format(table),
+                                           ((name, method['name'], position, dumps(item)) for position, item in enumerate(method.get(key, []))))
+
+    def _dumps(self, obj):
+        # type: (Any) -> str
+        # the docs are stored as TEXT
+        return self.codec.dumps(obj).decode('utf-8')
+
+
+class SqliteIndex(Mapping):
+    """
+    Lookup index backed by a database written by :class:`SqliteBackend`.
+
+    Behaves like the index returned by :func:`apypie.cache.build_index`. Everything that was queried once is kept,
+    so every part of the apidoc is queried at most once.
+    """
+
+    def __init__(self, connection, codec=None):
+        # type: (sqlite3.Connection, Optional[JsonCodec]) -> None
+        self._connection = connection
+        self.codec = get_codec(codec)
+        self._lock = threading.Lock()
+        self._resources = dict.fromkeys(name for (name,) in self._query('SELECT name FROM resources'))  # type: Dict[str, Optional[SqliteActions]]
+
+    def _query(self, statement, *args):
+        # type: (str, Any) -> List[tuple]
+        with self._lock:
+            return self._connection.execute(statement, args).fetchall()
+
+    def __getitem__(self, name):
+        # type: (str) -> SqliteActions
+        if name not in self._resources:
+            raise KeyError(name)
+        actions = self._resources[name]
+        if actions is None:
+            actions = self._resources[name] = SqliteActions(self, name)
+        return actions
+
+    def __contains__(self, name):
+        # type: (object) -> bool
+        return name in self._resources
+
+    def __iter__(self):
+        # type: () -> Iterator[str]
+        return iter(self._resources)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._resources)
+
+
+class SqliteActions(Mapping):
+    """
+    The actions of one resource in a :class:`SqliteIndex`, mapping action names to the apidoc of the action.
+    """
+
+    def __init__(self, index, resource):
+        # type: (SqliteIndex, str) -> None
+        self._index = index
+        self.resource = resource
+        self._actions = {}  # type: Dict[str, SqliteAction]
+        self._names = None  # type: Optional[List[str]]
+
+    def __getitem__(self, name):
+        # type: (str) -> SqliteAction
+        action = self._actions.get(name)
+        if action is None:
+            rows = self._index._query('SELECT doc FROM actions WHERE resource = ? AND name = ?', self.resource, name)  # pylint: disable=protected-access
+            if not rows:
+                raise KeyError(name)
+            action = self._actions[name] = SqliteAction(self._index, self.resource, name, self._index.codec.loads(rows[0][0]))
+        return action
+
+    def __iter__(self):
+        # type: () -> Iterator[str]
+        if self._names is None:
+            self._names = [name for (name,) in self._index._query(  # pylint: disable=protected-access
+                'SELECT name FROM actions WHERE resource = ?', self.resource)]
+        return iter(self._names)
+
+    def __len__(self):
+        # type: () -> int
+        return len(list(iter(self)))
+
+
+class SqliteAction(Mapping):
+    """
+    The apidoc of one action in a :class:`SqliteIndex`, its routes (``apis``) and ``params`` are queried on first access.
+    """
+
+    def __init__(self, index, resource, name, doc):
+        # type: (SqliteIndex, str, str, dict) -> None
+        self._index = index
+        self.resource = resource
+        self.name = name
+        self._doc = doc
+
+    def __getitem__(self, key):
+        # type: (str) -> Any
+        if key in SQLITE_ACTION_TABLES and key not in self._doc:
+            self._doc[key] = [self._index.codec.loads(doc) for (doc,) in self._index._query(  # pylint: disable=protected-access
+                'SELECT doc FROM {} WHERE resource = ? AND action = ? ORDER BY position'.format(SQLITE_ACTION_TABLES[key]),
+                self.resource, self.name)]
+        return self._doc[key]
+
+    def __iter__(self):
+        # type: () -> Iterator[str]
+        return iter(set(self._doc) | set(SQLITE_ACTION_TABLES))
+
+    def __len__(self):
+        # type: () -> int
+        return len(set(self._doc) | set(SQLITE_ACTION_TABLES))
+
+
+CACHE_BACKENDS = {
+    'index': IndexBackend,
+    'shards': ShardsBackend,
+    'sqlite': SqliteBackend,
+}  # type: Dict[str, Type[CacheBackend]]
@@ -0,0 +1,414 @@
+"""
+Apypie Cache module
+
+helpers to store the apidoc on the local disk
+"""
+
+from __future__ import print_function, absolute_import
+
+import contextlib
+import gzip
+import marshal
+import os
+import sys
+import time
+
+from collections.abc import Mapping
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Type  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.codec import JsonCodec, get_codec  # pylint: disable=unused-import  # noqa: F401
+
+INDEX_FORMAT = 1
+INDEX_EXTENSION = '.idx'
+LEAN_EXTENSION = '.lean'
+LEAN_RESOURCE_FIELDS = ('doc_url', 'full_description', 'formats', 'headers', 'metadata')
+LEAN_METHOD_FIELDS = ('doc_url', 'full_description', 'examples', 'formats', 'errors', 'returns', 'see', 'headers', 'metadata')
+LEAN_PARAM_FIELDS = ('description', 'metadata', 'show', 'validations')
+SHARDS_FORMAT = 2
+SHARDS_EXTENSION = '.shards'
+SHARDS_MANIFEST = 'manifest.json'
+META_EXTENSION = '.meta'
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'lzma': '.xz',
+}
+LOCK_FILENAME = '.lock'
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _open_lzma(path, mode, encoding=None):
+    # type: (str, str, Optional[str]) -> IO
+    # not every Python is built with lzma support, only require it when it is used
+    import lzma  # pylint: disable=import-outside-toplevel
+    return lzma.open(path, mode, encoding=encoding)  # type: ignore
+
+
+_COMPRESSION_OPENERS = {
+    'gzip': gzip.open,
+    'lzma': _open_lzma,
+}
+
+
+def compression_errors():
+    # type: () -> Tuple[Type[Exception], ...]
+    """
+    The errors raised when reading a corrupt compressed file, besides :class:`IOError` and :class:`EOFError`.
+
+    :returns: :class:`lzma.LZMAError` if :mod:`lzma` was loaded, nothing otherwise.
+    """
+
+    lzma = sys.modules.get('lzma')
+    return (lzma.LZMAError,) if lzma is not None else ()
+
+
+def open_file(path, mode='r', compression=None):
+    # type: (str, str, Optional[str]) -> IO
+    """
+    Open a (possibly compressed) cache file.
+
+    Text is always read and written as UTF-8.
+
+    :param path: The file to open.
+    :param mode: The mode to open the file with, like for :func:`open`.
+    :param compression: The compression of the file, one of the keys of :data:`COMPRESSION_EXTENSIONS` or ``None``.
+    """
+
+    encoding = None if 'b' in mode else 'utf-8'
+    if compression is None:
+        return open(path, mode, encoding=encoding)  # pylint: disable=consider-using-with
+    if 'b' not in mode:
+        mode += 't'
+    return _COMPRESSION_OPENERS[compression](path, mode, encoding=encoding)  # type: ignore
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w', compression=None):
+    # type: (str, str, Optional[str]) -> Iterator[IO]
+    """
+    Write a file atomically.
+
+    The content is written to a hidden temporary file next to ``path``, which is then renamed into place,
+    so readers never see a partially written file.
+
+    :param path: The file to write.
+    :param mode: The mode to open the file with, either ``w`` or ``wb``.
+    :param compression: The compression of the file, see :func:`open_file`.
+    """
+
+    dirname, basename = os.path.split(path)
+    tmp_path = os.path.join(dirname, '.{0}.{1}.tmp'.format(basename, os.urandom(16).hex()))
+    try:
+        with open_file(tmp_path, mode.replace('w', 'x'), compression) as tmp_file:
+            yield tmp_file
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class CacheLock(object):
+    """
+    Advisory lock shared by all processes using a cache directory.
+
+    Waits up to ``timeout`` seconds for the lock. If it can't be acquired in time (or at all, e.g. on
+    platforms without :mod:`fcntl`), the caller continues without it: all writes to the cache are atomic,
+    so this only costs an additional download, not consistency.
+
+    Usage::
+
+        >>> with CacheLock('/path/to/cache/.lock'):
+        ...     pass
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        # type: (str, float) -> None
+        self.path = path
+        self.timeout = timeout
+        self.locked = False
+        self._lock_file = None  # type: Optional[IO]
+
+    def __enter__(self):
+        # type: () -> CacheLock
+        if fcntl is None:
+            return self
+        try:
+            self._lock_file = open(self.path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+        except OSError:
+            return self
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.locked = True
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(LOCK_POLL_INTERVAL)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._lock_file is not None:
+            if self.locked:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                self.locked = False
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def build_index(apidoc):
+    # type: (dict) -> dict
+    """
+    Build a lookup index for an apidoc.
+
+    :param apidoc: The full apidoc.
+
+    :returns: A dict mapping resource names to dicts mapping action names to the apidoc of the action.
+    """
+
+    return {name: {method['name']: method for method in resource['methods']}
+            for name, resource in apidoc['docs']['resources'].items()}
+
+
+def make_lean(apidoc):
+    # type: (dict) -> dict
+    """
+    Strip the fields that are only needed for human readable documentation from an apidoc.
+
+    The apidoc is modified in place. Everything needed to validate and call actions is kept.
+
+    :param apidoc: The full apidoc.
+
+    :returns: The stripped apidoc.
+    """
+
+    for resource in apidoc['docs']['resources'].values():
+        _strip_fields(resource, LEAN_RESOURCE_FIELDS)
+        for method in resource['methods']:
+            _strip_fields(method, LEAN_METHOD_FIELDS)
+            _strip_params(method.get('params', []))
+    return apidoc
+
+
+def _strip_fields(item, fields):
+    # type: (dict, Iterable[str]) -> None
+    for field in fields:
+        item.pop(field, None)
+
+
+def _strip_params(params):
+    # type: (Iterable[dict]) -> None
+    for param in params:
+        _strip_fields(param, LEAN_PARAM_FIELDS)
+        _strip_params(param.get('params', []))
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def write_index(index_path, source_path, checksum, apidoc, index, compression=None):  # pylint: disable=too-many-arguments
+    # type: (str, str, str, dict, dict, Optional[str]) -> None
+    """
+    Write a precompiled binary index next to a cached apidoc.
+
+    The index is stored using :mod:`marshal`, which is considerably faster to load than JSON.
+    As the index references the same objects as the apidoc, they are stored only once.
+
+    :param index_path: Where to write the index to.
+    :param source_path: The JSON file the index was generated from.
+    :param checksum: The apipie checksum of the apidoc.
+    :param apidoc: The full apidoc.
+    :param index: The lookup index as returned by :func:`build_index`.
+    :param compression: The compression of the index, see :func:`open_file`.
+    """
+
+    data = {
+        'format': INDEX_FORMAT,
+        'checksum': checksum,
+        'source': _source_stamp(source_path),
+        'apidoc': apidoc,
+        'index': index,
+    }
+    with atomic_write(index_path, 'wb', compression) as index_file:
+        index_file.write(marshal.dumps(data, marshal.version))
+
+
+def read_index(index_path, source_path, checksum, compression=None):
+    # type: (str, str, str, Optional[str]) -> Optional[Tuple[dict, dict]]
+    """
+    Read a precompiled binary index.
+
+    :param index_path: Where to read the index from.
+    :param source_path: The JSON file the index must have been generated from.
+    :param checksum: The apipie checksum the index must have been generated for.
+    :param compression: The compression of the index, see :func:`open_file`.
+
+    :returns: The apidoc and the lookup index, or ``None`` if the index is missing or stale.
+    """
+
+    try:
+        with open_file(index_path, 'rb', compression) as index_file:
+            # marshal.load() on a file object reads in small chunks, loading from bytes is way faster
+            data = marshal.loads(index_file.read())
+        if data['format'] == INDEX_FORMAT and data['checksum'] == checksum and data['source'] == _source_stamp(source_path):
+            return data['apidoc'], data['index']
+    except (IOError, EOFError, ValueError, TypeError, KeyError) + compression_errors():
+        pass
+    return None
+
+
+def write_meta(meta_path, meta, codec=None):
+    # type: (str, dict, Optional[JsonCodec]) -> None
+    """
+    Write the metadata (like the ETag) of a cached apidoc.
+
+    :param meta_path: Where to write the metadata to.
+    :param meta: The metadata.
+    :param codec: The JSON codec, see :func:`apypie.codec.get_codec`.
+    """
+
+    with atomic_write(meta_path, 'wb') as meta_file:
+        meta_file.write(get_codec(codec).dumps(meta))
+
+
+def read_meta(meta_path, codec=None):
+    # type: (str, Optional[JsonCodec]) -> dict
+    """
+    Read the metadata of a cached apidoc.
+
+    :param meta_path: Where to read the metadata from.
+    :param codec: The JSON codec, see :func:`apypie.codec.get_codec`.
+
+    :returns: The metadata, or an empty dict if there is none.
+    """
+
+    try:
+        with open(meta_path, 'rb') as meta_file:
+            meta = get_codec(codec).loads(meta_file.read())
+    except (IOError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+class ShardedIndex(Mapping):
+    """
+    Lookup index backed by one shard per resource.
+
+    Behaves like the index returned by :func:`build_index`, but only loads the shard of a resource
+    when it is accessed for the first time.
+    """
+
+    def __init__(self, shards_dir, resources, compression=None, codec=None):
+        # type: (str, Iterable[str], Optional[str], Optional[JsonCodec]) -> None
+        self.shards_dir = shards_dir
+        self.compression = compression
+        self.codec = get_codec(codec)
+        self._resources = dict.fromkeys(resources)  # type: dict
+
+    def __getitem__(self, name):
+        # type: (str) -> dict
+        if name not in self._resources:
+            raise KeyError(name)
+        actions = self._resources[name]
+        if actions is None:
+            with open_file(_shard_file(self.shards_dir, name, self.compression), 'rb', self.compression) as shard_file:
+                resource = self.codec.loads(shard_file.read())
+            actions = self._resources[name] = {method['name']: method for method in resource['methods']}
+        return actions
+
+    def __contains__(self, name):
+        # type: (object) -> bool
+        return name in self._resources
+
+    def __iter__(self):
+        # type: () -> Iterator[str]
+        return iter(self._resources)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._resources)
+
+    @property
+    def loaded(self):
+        # type: () -> List[str]
+        """
+        Names of the resources whose shards have been loaded.
+        """
+
+        return [name for name, actions in self._resources.items() if actions is not None]
+
+
+def _shard_file(shards_dir, name, compression):
+    # type: (str, str, Optional[str]) -> str
+    return os.path.join(shards_dir, '{0}.json{1}'.format(name, COMPRESSION_EXTENSIONS.get(compression or '', '')))
+
+
+def write_shards(shards_dir, source_path, checksum, apidoc, compression=None, codec=None):  # pylint: disable=too-many-arguments
+    # type: (str, str, str, dict, Optional[str], Optional[JsonCodec]) -> None
+    """
+    Split an apidoc into one shard per resource and a manifest listing them.
+
+    The manifest is written last, so a directory with a manifest always has all its shards.
+
+    :param shards_dir: Directory to write the shards to.
+    :param source_path: The JSON file the shards were generated from.
+    :param checksum: The apipie checksum of the apidoc.
+    :param apidoc: The full apidoc.
+    :param compression: The compression of the shards, see :func:`open_file`.
+    :param codec: The JSON codec, see :func:`apypie.codec.get_codec`.
+    """
+
+    codec = get_codec(codec)
+    os.makedirs(shards_dir, exist_ok=True)
+    resources = apidoc['docs']['resources']
+    for name, resource in resources.items():
+        if os.path.basename(name) != name:
+            raise ValueError("Invalid resource name '{}'".format(name))
+        with atomic_write(_shard_file(shards_dir, name, compression), 'wb', compression) as shard_file:
+            shard_file.write(codec.dumps(resource))
+    manifest = {
+        'format': SHARDS_FORMAT,
+        'checksum': checksum,
+        'source': _source_stamp(source_path),
+        'resources': list(resources.keys()),
+    }
+    with atomic_write(os.path.join(shards_dir, SHARDS_MANIFEST), 'wb') as manifest_file:
+        manifest_file.write(codec.dumps(manifest))
+
+
+def read_shards(shards_dir, source_path, checksum, compression=None, codec=None):
+    # type: (str, str, str, Optional[str], Optional[JsonCodec]) -> Optional[ShardedIndex]
+    """
+    Read the manifest of a sharded apidoc.
+
+    :param shards_dir: Directory to read the shards from.
+    :param source_path: The JSON file the shards must have been generated from.
+    :param checksum: The apipie checksum the shards must have been generated for.
+    :param compression: The compression of the shards, see :func:`open_file`.
+    :param codec: The JSON codec, see :func:`apypie.codec.get_codec`.
+
+    :returns: A lazily loaded index, or ``None`` if the shards are missing or stale.
+    """
+
+    codec = get_codec(codec)
+    try:
+        with open(os.path.join(shards_dir, SHARDS_MANIFEST), 'rb') as manifest_file:
+            manifest = codec.loads(manifest_file.read())
+        if (manifest['format'] == SHARDS_FORMAT and manifest['checksum'] == checksum
+                and manifest['source'] == _source_stamp(source_path)):
+            return ShardedIndex(shards_dir, manifest['resources'], compression, codec)
+    except (IOError, ValueError, TypeError, KeyError):
+        pass
+    return None
@@ -0,0 +1,139 @@
+"""
+Apypie Codec module
+
+encodes and decodes JSON, using the fastest library that is installed
+"""
+
+from __future__ import print_function, absolute_import
+
+import json
+
+from typing import Any, Dict, Optional, Type, Union  # pylint: disable=unused-import  # noqa: F401
+
+
+class JsonCodec(object):
+    """
+    Encodes and decodes JSON with the :mod:`json` module of the standard library.
+
+    Any object with the same :meth:`loads` and :meth:`dumps` methods can be used as a codec.
+    """
+
+    def loads(self, data):
+        # type: (Union[str, bytes]) -> Any
+        """
+        Decode a JSON document.
+
+        :param data: The document, UTF-8 encoded if passed as :class:`bytes`.
+
+        :raises ValueError: if the document is not valid JSON.
+        """
+
+        return json.loads(data)
+
+    def dumps(self, obj):
+        # type: (Any) -> bytes
+        """
+        Encode an object as a JSON document.
+
+        :param obj: The object.
+
+        :returns: The UTF-8 encoded document.
+        """
+
+        return json.dumps(obj).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Encodes and decodes JSON with `orjson`, which is several times faster than the standard library.
+
+    Dict keys that are not strings are encoded as strings, like the standard library does.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        import orjson  # type: ignore  # pylint: disable=import-outside-toplevel,import-error
+        # pylint: disable=no-member
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data):
+        # type: (Union[str, bytes]) -> Any
+        return self._loads(data)
+
+    def dumps(self, obj):
+        # type: (Any) -> bytes
+        return self._dumps(obj, option=self._options)
+
+
+class _CodecAdapter(JsonCodec):
+    """
+    Wraps any object with `loads` and `dumps` methods, like the :mod:`json` module, so :meth:`dumps` returns :class:`bytes`.
+    """
+
+    def __init__(self, codec):
+        # type: (Any) -> None
+        self.codec = codec
+
+    def loads(self, data):
+        # type: (Union[str, bytes]) -> Any
+        return self.codec.loads(data)
+
+    def dumps(self, obj):
+        # type: (Any) -> bytes
+        data = self.codec.dumps(obj)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return data
+
+
+# the codecs that can be selected by name, in order of preference when auto-detecting one
+JSON_CODECS = {
+    'orjson': OrjsonCodec,
+    'json': JsonCodec,
+}  # type: Dict[str, Type[JsonCodec]]
+
+_DEFAULT_CODEC = None  # type: Optional[JsonCodec]
+
+
+def default_codec():
+    # type: () -> JsonCodec
+    """
+    The codec used when none is configured: the first of :data:`JSON_CODECS` whose library is installed.
+    """
+
+    global _DEFAULT_CODEC  # pylint: disable=global-statement
+    if _DEFAULT_CODEC is None:
+        for codec_class in JSON_CODECS.values():
+            try:
+                _DEFAULT_CODEC = codec_class()
+                break
+            except ImportError:
+                continue
+    return _DEFAULT_CODEC  # type: ignore
+
+
+def get_codec(codec=None):
+    # type: (Optional[Any]) -> JsonCodec
+    """
+    Find the codec to use.
+
+    :param codec: The name of a codec in :data:`JSON_CODECS`, an object with `loads` and `dumps` methods,
+        or ``None`` for the :func:`default_codec`. The documents encoded by an object may be :class:`str` or :class:`bytes`.
+
+    :raises ValueError: if the codec is unknown or its library is not installed.
+    """
+
+    if codec is None:
+        return default_codec()
+    if isinstance(codec, JsonCodec):
+        return codec
+    if not isinstance(codec, str):
+        return _CodecAdapter(codec)
+    if codec not in JSON_CODECS:
+        raise ValueError('Unsupported JSON codec {}, use one of: {}'.format(codec, ', '.join(sorted(JSON_CODECS))))
+    try:
+        return JSON_CODECS[codec]()
+    except ImportError:
+        raise ValueError('JSON codec {0} requested, but {0} not found.'.format(codec))
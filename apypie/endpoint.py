@@ -0,0 +1,78 @@
+"""
+Apypie Endpoint module
+"""
+
+from __future__ import print_function, absolute_import
+
+from typing import Optional, Any, Mapping, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.immutable import Immutable
+
+if TYPE_CHECKING:
+    from apypie.action import Action  # pylint: disable=unused-import  # noqa: F401
+    from apypie.api import Api  # pylint: disable=cyclic-import,unused-import  # noqa: F401
+
+
+class Endpoint(Immutable):  # pylint: disable=too-few-public-methods
+    """
+    Prepared callable for one action of a resource, see :meth:`apypie.Api.endpoint`.
+
+    The action and its compiled validator are looked up once and again only when the apidoc changes,
+    so calling an endpoint only finds the route, validates the params and sends the request.
+    """
+
+    __slots__ = ('api', 'resource', 'name', '_index', '_action')
+
+    def __init__(self, api, resource, name):
+        # type: (Api, str, str) -> None
+        self.api = api
+        self.resource = resource
+        self.name = name
+        self._index = None  # type: Optional[Mapping]
+        self._action = None  # type: Optional[Action]
+        self._resolve()
+
+    def _resolve(self):
+        # type: () -> Action
+        index = self.api.apidoc_index
+        if index is not self._index or self._action is None:
+            action = self.api.resource(self.resource).action(self.name)
+            # compile the validator right away, not on the first call
+            action.validator  # pylint: disable=pointless-statement
+            self._action = action
+            self._index = index
+        return self._action
+
+    @property
+    def action(self):
+        # type: () -> Action
+        """
+        The action called by this endpoint.
+
+        :returns: The action.
+        """
+
+        return self._resolve()
+
+    def __call__(self, params=None, headers=None, options=None, data=None, files=None):  # pylint: disable=too-many-arguments
+        # type: (Optional[dict], Optional[dict], Optional[dict], Optional[Any], Optional[dict]) -> Optional[dict]
+        """
+        Call the API to execute the action, like :meth:`apypie.Api.call` does.
+
+        :param params: The params that should be passed to the API.
+        :param headers: Additional headers to be passed to the API.
+        :param options: Options, see :meth:`apypie.Api.call`.
+        :param data: Binary data to be submitted to the API.
+        :param files: Files to be submitted to the API.
+
+        :returns: The API response.
+        """
+
+        if params is None:
+            params = {}
+
+        action = self._resolve()
+        if not (options and options.get('skip_validation', False)):
+            action.validator(params, data, files)
+
+        return self.api._call_action(action, params, headers, data, files)  # pylint: disable=protected-access
@@ -4,18 +4,22 @@ Apypie Example module
 
 import re
 
+from apypie.immutable import Immutable, intern_string
+
 
 EXAMPLE_PARSER = re.compile(r'(\w+)\s+([^\n]*)\n?(.*)\n(\d+)\n(.*)', re.DOTALL)
 
 
-class Example(object):  # pylint: disable=too-few-public-methods
+class Example(Immutable):  # pylint: disable=too-few-public-methods
     """
     Apipie Example
     """
 
+    __slots__ = ('http_method', 'path', 'args', 'status', 'response')
+
     def __init__(self, http_method, path, args, status, response):  # pylint: disable=too-many-arguments
         # type: (str, str, str, str, str) -> None
-        self.http_method = http_method
+        self.http_method = intern_string(http_method)
         self.path = path
         self.args = args
         self.status = int(status)
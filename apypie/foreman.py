@@ -5,7 +5,7 @@ opinionated helpers to use Apypie with Foreman
 """
 import time
 
-from typing import cast, Optional, Set, Tuple
+from typing import cast, Iterable, List, Optional, Sequence, Set, Tuple
 
 from apypie.api import Api
 
@@ -48,6 +48,17 @@ class ForemanApiException(Exception):
         return cls(msg=msg, error=error)
 
 
+def _is_foreman_task(result: Optional[dict]) -> bool:
+    return isinstance(result, dict) and 'action' in result and 'state' in result and 'started_at' in result
+
+
+def _task_result(task: dict, ignore_errors: bool) -> dict:
+    if not ignore_errors and task['result'] != 'success':
+        msg = f"Task {task['action']}({task['id']}) did not succeed. Task information: {task['humanized']['errors']}"
+        raise ForemanApiException(msg=msg)
+    return task
+
+
 class ForemanApi(Api):
     """
     `apypie.Api` with default settings and helper functions for Foreman
@@ -67,7 +78,7 @@ class ForemanApi(Api):
             self.call('users', 'extlogin')
 
     def _resource(self, resource: str) -> 'Resource':
-        if resource not in self.resources:
+        if resource not in self.apidoc_index:
             raise ForemanApiException(msg=f"The server doesn't know about {resource}, is the right plugin installed?")
         return self.resource(resource)
 
@@ -90,14 +101,23 @@ class ForemanApi(Api):
             options = {}
         try:
             result = self._resource_call(resource, action, resource_payload, options=options, data=data, files=files)
-            is_foreman_task = isinstance(result, dict) and 'action' in result and 'state' in result and 'started_at' in result
-            if result and is_foreman_task:
+            if result and _is_foreman_task(result):
                 result = self.wait_for_task(result, ignore_errors=ignore_task_errors)
         except Exception as exc:
             msg = f'Error while performing {action} on {resource}: {exc}'
             raise ForemanApiException.from_exception(exc, msg) from exc
         return result
 
+    def resource_action_many(self, calls: Iterable[Sequence], max_workers: Optional[int] = None,
+                             fail_fast: bool = False) -> List[Tuple[Optional[dict], Optional[BaseException]]]:
+        """
+        Perform many generic actions concurrently, see :meth:`resource_action` and :meth:`apypie.Api.call_many`
+
+        Each call is a sequence of the arguments to :meth:`resource_action`, like `(resource, action, params)`.
+        Returns `(result, exception)` tuples in the order of the calls.
+        """
+        return self._call_many(self.resource_action, calls, max_workers, fail_fast)
+
     def wait_for_task(self, task: dict, ignore_errors: bool = False) -> dict:
         """
         Wait for a foreman-tasks task, polling it every ``self.task_poll`` seconds.
@@ -113,10 +133,7 @@ class ForemanApi(Api):
 
             resource_payload = self._resource_prepare_params('foreman_tasks', 'show', {'id': task['id']})
             task = cast(dict, self._resource_call('foreman_tasks', 'show', resource_payload))
-        if not ignore_errors and task['result'] != 'success':
-            msg = f"Task {task['action']}({task['id']}) did not succeed. Task information: {task['humanized']['errors']}"
-            raise ForemanApiException(msg=msg)
-        return task
+        return _task_result(task, ignore_errors)
 
     def show(self, resource: str, resource_id: int, params: Optional[dict] = None) -> Optional[dict]:
         """
@@ -213,15 +230,4 @@ class ForemanApi(Api):
 
         :return: The payload as it can be submitted to the API and set of unssuported parameters
         """
-        filtered_payload = self._resource_prepare_params(resource, action, payload)
-        unsupported_parameters = set(payload.keys()) - _recursive_dict_keys(filtered_payload)
-        return (filtered_payload, unsupported_parameters)
-
-
-def _recursive_dict_keys(a_dict: dict) -> set:
-    """Find all keys of a nested dictionary"""
-    keys = set(a_dict.keys())
-    for value in a_dict.values():
-        if isinstance(value, dict):
-            keys.update(_recursive_dict_keys(value))
-    return keys
+        return self._resource(resource).action(action).prepare_payload(payload)
@@ -0,0 +1,47 @@
+"""
+Apypie Immutable module
+
+compact, read-only base for the objects describing an API
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+
+from typing import Any  # pylint: disable=unused-import  # noqa: F401
+
+
+def intern_string(value):
+    # type: (Any) -> Any
+    """
+    Intern a string, so all objects using the same value share one copy of it.
+
+    :param value: The value to intern, anything that is not a string is returned as-is.
+    """
+
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class Immutable(object):  # pylint: disable=too-few-public-methods
+    """
+    Base class for objects whose public attributes can't be changed once they are set.
+
+    Subclasses define ``__slots__``, so their instances have no ``__dict__``.
+    Private attributes (starting with ``_``) can be set at any time, e.g. to cache computed values.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        # type: (str, Any) -> None
+        if not name.startswith('_') and hasattr(self, name):
+            raise AttributeError("can't set attribute '{0}' of {1}".format(name, type(self).__name__))
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        # type: (str) -> None
+        if not name.startswith('_'):
+            raise AttributeError("can't delete attribute '{0}' of {1}".format(name, type(self).__name__))
+        object.__delattr__(self, name)
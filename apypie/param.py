@@ -4,20 +4,40 @@ Apypie Param module
 
 import re
 
+from typing import Optional, Tuple  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.immutable import Immutable, intern_string
+
 HTML_STRIP = re.compile(r'<\/?[^>]+?>')
 
 
-class Param(object):  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+class Param(Immutable):  # pylint: disable=too-many-instance-attributes,too-few-public-methods
     """
     Apipie Param
     """
 
+    __slots__ = ('allow_nil', 'expected_type', 'full_name', 'name', 'params', 'required', 'validator', '_raw_description', '_description')
+
     def __init__(self, **kwargs):
         self.allow_nil = kwargs.get('allow_nil')
-        self.description = HTML_STRIP.sub('', kwargs.get('description'))
-        self.expected_type = kwargs.get('expected_type')
-        self.full_name = kwargs.get('full_name')
-        self.name = kwargs.get('name')
-        self.params = [Param(**param) for param in kwargs.get('params', [])]
+        self.expected_type = intern_string(kwargs.get('expected_type'))
+        self.full_name = intern_string(kwargs.get('full_name'))
+        self.name = intern_string(kwargs.get('name'))
+        self.params = tuple(Param(**param) for param in kwargs.get('params', []))  # type: Tuple[Param, ...]
         self.required = bool(kwargs.get('required'))
-        self.validator = kwargs.get('validator')
+        self.validator = intern_string(kwargs.get('validator'))
+        # HTML is only stripped when the description is used
+        self._raw_description = kwargs.get('description') or None  # type: Optional[str]
+        self._description = ''
+
+    @property
+    def description(self):
+        # type: () -> str
+        """
+        The description of the param, without HTML tags.
+        """
+
+        if self._raw_description is not None:
+            self._description = HTML_STRIP.sub('', self._raw_description)
+            self._raw_description = None
+        return self._description
@@ -0,0 +1,63 @@
+"""
+Apypie Payload module
+
+compiles the params of an action into a plan for preparing payloads
+"""
+
+from __future__ import print_function, absolute_import
+
+from typing import Callable, Iterable, Set, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+if TYPE_CHECKING:
+    from apypie.param import Param  # pylint: disable=unused-import  # noqa: F401
+
+PayloadPlan = Callable[[dict, Set[str]], dict]
+
+
+def recursive_dict_keys(a_dict):
+    # type: (dict) -> Set[str]
+    """
+    Find all keys of a nested dictionary.
+
+    :param a_dict: The dictionary.
+    """
+
+    keys = set(a_dict.keys())
+    for value in a_dict.values():
+        if isinstance(value, dict):
+            keys.update(recursive_dict_keys(value))
+    return keys
+
+
+def compile_payload_plan(params):
+    # type: (Iterable[Param]) -> PayloadPlan
+    """
+    Compile params into a plan picking their values from a dict, see :meth:`apypie.Action.prepare_params`.
+
+    Hashes with nested params are filled from the value of their name, if present, or from the dict itself.
+    Which params are plain values and which are hashes to descend into is decided once, per call only names are looked up.
+
+    :param params: The params to fill.
+
+    :returns: A function taking the values and a set, which all keys of the (nested) params it returns are added to.
+    """
+
+    # the order of the params is kept, so a later param of the same name still wins
+    steps = tuple((param.name, compile_payload_plan(param.params) if param.expected_type == 'hash' and param.params else None)
+                  for param in params)
+
+    def plan(input_dict, used_keys):
+        # type: (dict, Set[str]) -> dict
+        result = {}
+        for name, nested in steps:
+            if nested is None:
+                if name in input_dict:
+                    result[name] = input_dict[name]
+            else:
+                nested_result = nested(input_dict.get(name, input_dict), used_keys)
+                if nested_result:
+                    result[name] = nested_result
+        used_keys.update(result)
+        return result
+
+    return plan
@@ -0,0 +1,108 @@
+"""
+Apypie Registry module
+
+process-wide registry of parsed apidocs, shared by all Api instances
+"""
+
+from __future__ import print_function, absolute_import
+
+import threading
+
+from typing import Dict, Hashable, Mapping, Optional, Tuple  # pylint: disable=unused-import  # noqa: F401
+
+
+class ApidocRegistry(object):
+    """
+    Registry of parsed apidocs and their lookup indexes.
+
+    Entries are identified by ``(uri, api_version, language, cache_name, lean)``, so all :class:`Api` instances talking to
+    the same server share one parsed copy of its apidoc. The shared objects must be treated as read-only.
+
+    Entries are kept for the lifetime of the process, even when no :class:`Api` instance uses them anymore.
+    Long-running processes talking to many servers can release them with :meth:`invalidate` or :meth:`clear`.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._lock = threading.Lock()
+        self._entries = {}  # type: Dict[Hashable, Dict[str, Optional[Mapping]]]
+
+    def get(self, key):
+        # type: (Hashable) -> Tuple[Optional[dict], Optional[Mapping]]
+        """
+        Get a shared apidoc.
+
+        :param key: The key identifying the apidoc.
+
+        :returns: The apidoc and its lookup index, either of them can be ``None`` if it wasn't shared yet.
+        """
+
+        entry = self._entries.get(key, {})
+        return entry.get('apidoc'), entry.get('index')  # type: ignore
+
+    def share(self, key, apidoc=None, index=None):
+        # type: (Hashable, Optional[dict], Optional[Mapping]) -> Tuple[Optional[dict], Optional[Mapping]]
+        """
+        Share an apidoc and/or its lookup index.
+
+        Parts that are already shared under the same key are kept, so that all users end up with the same objects.
+
+        :param key: The key identifying the apidoc.
+        :param apidoc: The apidoc.
+        :param index: The lookup index of the apidoc.
+
+        :returns: The shared apidoc and lookup index.
+        """
+
+        with self._lock:
+            entry = self._entries.setdefault(key, {'apidoc': None, 'index': None})
+            if entry['apidoc'] is None:
+                entry['apidoc'] = apidoc
+            if entry['index'] is None:
+                entry['index'] = index
+            return entry['apidoc'], entry['index']  # type: ignore
+
+    def replace(self, key, old_apidoc, apidoc, index):
+        # type: (Hashable, Optional[dict], dict, Mapping) -> Tuple[dict, Mapping]
+        """
+        Replace a shared apidoc with a refreshed one.
+
+        The apidoc is only replaced if it is still ``old_apidoc``, otherwise someone else refreshed it already
+        and that apidoc is kept, just like with :meth:`share`.
+
+        :param key: The key identifying the apidoc.
+        :param old_apidoc: The apidoc that was refreshed.
+        :param apidoc: The refreshed apidoc.
+        :param index: The lookup index of the refreshed apidoc.
+
+        :returns: The shared apidoc and lookup index.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['apidoc'] is None or entry['apidoc'] is old_apidoc:
+                entry = self._entries[key] = {'apidoc': apidoc, 'index': index}
+            return entry['apidoc'], entry['index']  # type: ignore
+
+    def invalidate(self, key):
+        # type: (Hashable) -> None
+        """
+        Drop a shared apidoc, e.g. because it is outdated.
+
+        :param key: The key identifying the apidoc.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        # type: () -> None
+        """
+        Drop all shared apidocs.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+APIDOC_REGISTRY = ApidocRegistry()
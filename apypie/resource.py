@@ -4,23 +4,27 @@ Apypie Resource module
 
 from __future__ import print_function, absolute_import
 
-from typing import Optional, Any, List, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+from typing import Optional, Any, Dict, List, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
 
 from apypie.action import Action
+from apypie.immutable import Immutable
 
 if TYPE_CHECKING:
     from apypie.api import Api  # pylint: disable=cyclic-import,unused-import  # noqa: F401
 
 
-class Resource(object):
+class Resource(Immutable):
     """
     Apipie Resource
     """
 
+    __slots__ = ('api', 'name', '_actions')
+
     def __init__(self, api, name):
         # type: (Api, str) -> None
         self.api = api
         self.name = name
+        self._actions = {}  # type: Dict[str, Action]
 
     @property
     def actions(self):
@@ -30,18 +34,23 @@ class Resource(object):
 
         :returns: The actions.
         """
-        return sorted([method['name'] for method in self.api.apidoc['docs']['resources'][self.name]['methods']])
+        return sorted(self.api.apidoc_index[self.name].keys())
 
     def action(self, name):
         # type: (str) -> Action
         """
         Get an :class:`Action` for this resource.
 
+        The same object is returned for the same action.
+
         :param name: The name of the action.
         """
+        action = self._actions.get(name)
+        if action is not None:
+            return action
         if self.has_action(name):
-            return Action(name, self.name, self.api)
-        message = "Unknown action '{}'. Supported actions: {}".format(name, ', '.join(sorted(self.actions)))
+            return self._actions.setdefault(name, Action(name, self.name, self.api))
+        message = "Unknown action '{}'. Supported actions: {}".format(name, ', '.join(self.actions))
         raise KeyError(message)
 
     def has_action(self, name):
@@ -51,7 +60,7 @@ class Resource(object):
 
         :param name: The name of the action.
         """
-        return name in self.actions
+        return name in self.api.apidoc_index[self.name]
 
     def call(self, action, params=None, headers=None, options=None, data=None, files=None):  # pylint: disable=too-many-arguments
         # type: (str, Optional[dict], Optional[dict], Optional[dict], Optional[Any], Optional[dict]) -> Optional[dict]
@@ -6,19 +6,35 @@ from __future__ import print_function, absolute_import
 
 from urllib.parse import quote  # type: ignore
 
-from typing import List, Optional  # pylint: disable=unused-import  # noqa: F401
+from typing import FrozenSet, List, Optional, Tuple  # pylint: disable=unused-import  # noqa: F401
 
+from apypie.immutable import Immutable, intern_string
 
-class Route(object):
+
+class Route(Immutable):
     """
     Apipie Route
     """
 
+    __slots__ = ('path', 'method', 'description', '_segments', '_placeholders', '_path_params')
+
     def __init__(self, path, method, description=""):
         # type: (str, str, str) -> None
         self.path = path
-        self.method = method.lower()
+        self.method = intern_string(method.lower())
         self.description = description
+        self._segments = None  # type: Optional[Tuple[str, ...]]
+        self._placeholders = ()  # type: Tuple[Tuple[int, str], ...]
+        self._path_params = frozenset()  # type: FrozenSet[str]
+
+    def _compile(self):
+        # type: () -> Tuple[str, ...]
+        # split the path once into its segments and the positions of the placeholders in it
+        segments = tuple(intern_string(segment) for segment in self.path.split('/'))
+        self._placeholders = tuple((position, segment[1:]) for position, segment in enumerate(segments) if segment.startswith(':'))
+        self._path_params = frozenset(name for _, name in self._placeholders)
+        self._segments = segments
+        return segments
 
     @property
     def params_in_path(self):
@@ -28,7 +44,21 @@ class Route(object):
 
         :returns: The params.
         """
-        return [part[1:] for part in self.path.split('/') if part.startswith(':')]
+        if self._segments is None:
+            self._compile()
+        return [name for _, name in self._placeholders]
+
+    @property
+    def path_params(self):
+        # type: () -> FrozenSet[str]
+        """
+        Params that can be passed in the path (URL) of the route, as a frozenset for fast membership tests.
+
+        :returns: The params.
+        """
+        if self._segments is None:
+            self._compile()
+        return self._path_params
 
     def path_with_params(self, params=None):
         # type: (Optional[dict]) -> str
@@ -37,11 +67,14 @@ class Route(object):
 
         :returns: The path with params.
         """
-        result = self.path
-        if params is not None:
-            for param in self.params_in_path:
-                if param in params:
-                    result = result.replace(':{}'.format(param), quote(str(params[param]), safe=''))
-                else:
-                    raise KeyError("missing param '{}' in parameters".format(param))
-        return result
+        segments = self._segments
+        if segments is None:
+            segments = self._compile()
+        if params is None or not self._placeholders:
+            return self.path
+        filled = list(segments)
+        for position, param in self._placeholders:
+            if param not in params:
+                raise KeyError("missing param '{}' in parameters".format(param))
+            filled[position] = quote(str(params[param]), safe='')
+        return '/'.join(filled)
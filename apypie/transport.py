@@ -0,0 +1,136 @@
+"""
+Apypie Transport module
+
+sends the HTTP requests prepared by :class:`apypie.Api`
+"""
+
+from __future__ import print_function, absolute_import
+
+import json
+from http import HTTPStatus
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+if TYPE_CHECKING:
+    import requests  # pylint: disable=unused-import  # noqa: F401
+
+Timeout = Union[float, Tuple[Optional[float], Optional[float]]]
+Handler = Callable[['requests.PreparedRequest'], Tuple[int, Dict[str, str], Any]]
+
+
+def build_response(url, status_code, reason, headers, content):
+    # type: (str, int, str, Iterable[Tuple[str, str]], bytes) -> requests.Response
+    """
+    Build a :class:`requests.Response` with an already received body, so it can be handled like any other response.
+
+    :param url: The URL of the request.
+    :param status_code: The HTTP status code.
+    :param reason: The HTTP reason phrase.
+    :param headers: The headers, repeated ones are joined like :mod:`requests` does.
+    :param content: The (decoded) body.
+    """
+
+    from requests import Response  # pylint: disable=import-outside-toplevel
+    from requests.structures import CaseInsensitiveDict  # pylint: disable=import-outside-toplevel
+    from requests.utils import get_encoding_from_headers  # pylint: disable=import-outside-toplevel
+
+    merged = {}  # type: Dict[str, str]
+    for name, value in headers:
+        key = name.lower()
+        merged[key] = '{}, {}'.format(merged[key], value) if key in merged else value
+    response = Response()
+    response.url = url
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(merged)
+    response.encoding = get_encoding_from_headers(response.headers)
+    # pylint: disable=protected-access
+    response._content = content
+    response._content_consumed = True  # type: ignore[attr-defined]
+    return response
+
+
+class Transport(object):
+    """
+    Base class for sending the HTTP requests of :class:`apypie.Api`.
+    """
+
+    def send(self, request, stream=False, timeout=None):
+        # type: (requests.PreparedRequest, bool, Optional[Timeout]) -> requests.Response
+        """
+        Send an HTTP request.
+
+        :param request: The request, as prepared by :meth:`apypie.Api.prepare_request`.
+        :param stream: Whether the body of the response may be read in chunks, instead of right away.
+        :param timeout: The timeout in seconds, or a `(connect, read)` tuple of them. Defaults to `None` (wait forever).
+
+        :returns: The response.
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        # type: () -> None
+        """
+        Release the resources held by the transport, like open connections.
+        """
+
+
+class SessionTransport(Transport):
+    """
+    Sends HTTP requests with a :class:`requests.Session`, the default transport of :class:`apypie.Api`.
+
+    :param session: The session, usually the one the requests were prepared with.
+    """
+
+    def __init__(self, session):
+        # type: (requests.Session) -> None
+        self.session = session
+
+    def send(self, request, stream=False, timeout=None):
+        # type: (requests.PreparedRequest, bool, Optional[Timeout]) -> requests.Response
+        # like requests.Session.request, which prepares the request and sends it with these settings
+        settings = self.session.merge_environment_settings(request.url, {}, stream, self.session.verify, self.session.cert)
+        return self.session.send(request, timeout=timeout, **settings)
+
+    def close(self):
+        # type: () -> None
+        self.session.close()
+
+
+class HandlerTransport(Transport):
+    """
+    Serves HTTP requests from a function in the same process, without any network I/O.
+
+    Useful to measure the overhead of the library itself, or to test against a stand-in of the server.
+
+    :param handler: A function taking the :class:`requests.PreparedRequest`, and returning the status code, the headers and the body
+        of the response. The body can be :class:`bytes`, :class:`str`, `None` (empty) or anything else to be encoded as JSON.
+
+    Usage::
+
+      >>> import apypie
+      >>> from apypie.transport import HandlerTransport
+      >>> api = apypie.Api(uri='https://api.example.com', transport=HandlerTransport(lambda request: (200, {}, {'id': 1})))
+    """
+
+    def __init__(self, handler):
+        # type: (Handler) -> None
+        self.handler = handler
+
+    def send(self, request, stream=False, timeout=None):
+        # type: (requests.PreparedRequest, bool, Optional[Timeout]) -> requests.Response
+        status_code, headers, body = self.handler(request)
+        if body is None:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        elif not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            if not any(name.lower() == 'content-type' for name in headers):
+                headers = dict(headers, **{'Content-Type': 'application/json'})
+        try:
+            reason = HTTPStatus(status_code).phrase
+        except ValueError:
+            reason = ''
+        return build_response(request.url or '', status_code, reason, headers.items(), body)
@@ -0,0 +1,139 @@
+"""
+Apypie Validator module
+
+compiles the params of an action into a validation function
+"""
+
+from __future__ import print_function, absolute_import
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TYPE_CHECKING  # pylint: disable=unused-import  # noqa: F401
+
+from apypie.exceptions import MissingArgumentsError, InvalidArgumentTypesError
+
+if TYPE_CHECKING:
+    from apypie.param import Param  # pylint: disable=unused-import  # noqa: F401
+
+Path = Tuple[str, ...]
+Validator = Callable[..., None]
+
+
+def format_path(path, name=None):
+    # type: (Path, Optional[str]) -> str
+    """
+    Format the path of a (nested) param, like ``host[interfaces_attributes][0][name]``.
+
+    :param path: The names (and array indexes) leading to the param.
+    :param name: The name of the param itself.
+    """
+
+    result = ''
+    for addition in path + ((name,) if name is not None else ()):
+        if result == '':
+            result = "{}".format(addition)
+        else:
+            result = "{}[{}]".format(result, addition)
+    return result
+
+
+def _is_boolean(value):
+    # type: (Any) -> bool
+    return isinstance(value, bool) or (isinstance(value, int) and value in [0, 1])
+
+
+def _is_numeric(value):
+    # type: (Any) -> bool
+    return isinstance(value, int)
+
+
+def _is_string(value):
+    # type: (Any) -> bool
+    return isinstance(value, (str, int))
+
+
+TYPE_CHECKS = {
+    'boolean': _is_boolean,
+    'numeric': _is_numeric,
+    'string': _is_string,
+}  # type: Dict[str, Callable[[Any], bool]]
+
+
+def compile_validator(params):
+    # type: (Iterable[Param]) -> Validator
+    """
+    Compile params into a function validating values against them.
+
+    The function behaves exactly like :meth:`apypie.Action.validate`, raising the same exceptions with the same messages,
+    but everything that only depends on the params (required params, lookups by name, type checks) is prepared once.
+
+    :param params: The params to validate against.
+
+    :returns: A function taking the values and, optionally, the data and files that are sent along.
+    """
+
+    validate = _compile_params(tuple(params))
+
+    def validator(values, data=None, files=None):
+        # type: (dict, Optional[Any], Optional[dict]) -> None
+        validate(values, data, files, ())
+
+    return validator
+
+
+def _compile_params(params):
+    # type: (Tuple[Param, ...]) -> Callable[[Any, Optional[Any], Optional[dict], Path], None]
+    required = {param.name for param in params if param.required}
+    checks = {}  # type: Dict[str, Callable[[str, Any, Path], None]]
+    for param in params:
+        # like a linear search, the first param of a name wins
+        if param.name not in checks:
+            checks[param.name] = _compile_param(param)
+
+    def validate(values, data, files, path):
+        # type: (Any, Optional[Any], Optional[dict], Path) -> None
+        if not isinstance(values, dict):
+            raise InvalidArgumentTypesError
+        for name in required:
+            if name not in values and name not in (files or {}) and name not in (data or {}):
+                # computed just like before, so the message lists the params in the same order
+                missing_params = required - set(values.keys()) - set((files or {}).keys()) - set((data or {}).keys())
+                message = "The following required parameters are missing: {}".format(
+                    ', '.join(format_path(path, param) for param in missing_params))
+                raise MissingArgumentsError(message)
+        for name, value in values.items():
+            check = checks.get(name)
+            if check is not None:
+                check(name, value, path)
+
+    return validate
+
+
+def _compile_param(param):
+    # type: (Param) -> Callable[[str, Any, Path], None]
+    nested = _compile_params(param.params) if param.params else None
+    is_array = param.expected_type == 'array'
+    is_hash = param.expected_type == 'hash'
+    is_numeric = param.expected_type == 'numeric'
+    allow_nil = param.allow_nil
+    type_check = TYPE_CHECKS.get(param.expected_type)
+    validator = param.validator
+
+    def check(name, value, path):
+        # type: (str, Any, Path) -> None
+        if nested is not None and value is not None:
+            if is_array:
+                for num, item in enumerate(value):
+                    nested(item, None, None, path + (name, str(num)))
+            elif is_hash:
+                nested(value, None, None, path + (name,))
+        if is_numeric and isinstance(value, str):
+            try:
+                value = int(value)
+            except ValueError:
+                # this will be caught in the next check
+                pass
+        if not allow_nil and value is None:
+            raise ValueError("{} can't be {}".format(name, value))
+        if value is not None and type_check is not None and not type_check(value):
+            raise ValueError("{} ({}): {}".format(name, value, validator))
+
+    return check
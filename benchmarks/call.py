@@ -0,0 +1,69 @@
+"""
+Benchmark the overhead of Api.call, without any network I/O.
+
+Serves the requests in-process with a HandlerTransport, so only finding the
+route, validating the params, encoding the request and decoding the response
+are measured.
+
+Usage::
+
+    python benchmarks/call.py [path/to/apidoc.json] [number]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APIDOC = os.path.join(ROOT, 'tests', 'fixtures', 'luna.json')
+sys.path.insert(0, ROOT)
+
+import apypie  # noqa: E402  # pylint: disable=wrong-import-position
+from apypie.transport import HandlerTransport  # noqa: E402  # pylint: disable=wrong-import-position
+
+HOST = json.dumps({'id': 1, 'name': 'host.example.com', 'interfaces': [{'id': num, 'name': 'eth{}'.format(num)} for num in range(20)]}).encode('utf-8')
+HOSTS = json.dumps({'total': 100, 'results': [{'id': num, 'name': 'host{}.example.com'.format(num)} for num in range(100)]}).encode('utf-8')
+
+CALLS = (
+    ('hosts', 'show', {'id': 1}),
+    ('hosts', 'index', {'search': 'name ~ example.com', 'per_page': 100}),
+    ('hosts', 'update', {'id': 1, 'host': {'name': 'host.example.com', 'build': True, 'puppetclass_ids': list(range(100))}}),
+)
+
+
+def handler(request):
+    """
+    Answer every request with a host, or a list of them.
+    """
+
+    return 200, {'Content-Type': 'application/json'}, HOSTS if request.path_url.startswith('/api/hosts?') else HOST
+
+
+def main():
+    """
+    Run the benchmark and print the results.
+    """
+
+    apidoc = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_APIDOC
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(apidoc, os.path.join(cache_dir, 'default.json'))
+        api = apypie.Api(uri='https://foreman.example.com', api_version=2, apidoc_cache_dir=cache_dir,
+                         username='admin', password='changeme', transport=HandlerTransport(handler))
+        for resource, action, params in CALLS:
+            api.call(resource, action, params)
+            duration = min(timeit.repeat(lambda: api.call(resource, action, params), number=number, repeat=5))  # pylint: disable=cell-var-from-loop
+            print('{0}#{1}: {2:.1f} us per call'.format(resource, action, duration / number * 1e6))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the cold start of an Api instance with a populated apidoc cache.
+
+Every sample is taken in a fresh interpreter, once loading the apidoc from the
+JSON cache and once from the precompiled binary index next to it.
+
+Usage::
+
+    python benchmarks/cold_start.py [path/to/apidoc.json] [rounds]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APIDOC = os.path.join(ROOT, 'tests', 'fixtures', 'luna.json')
+
+# import everything up front, so only loading the apidoc is measured
+SETUP = """
+import requests
+import apypie
+import apypie.api
+import apypie.codec
+requests.Session()
+apypie.codec.default_codec()
+"""
+
+LOAD = """
+api = apypie.Api(uri='https://foreman.example.com', api_version=2, apidoc_cache_dir={cache_dir!r})
+api.resource('hosts').action('show').apidoc
+"""
+
+RUNNER = """
+import timeit
+print(timeit.timeit({load!r}, setup={setup!r}, number=1))
+"""
+
+
+def _sample(cache_dir):
+    code = RUNNER.format(load=LOAD.format(cache_dir=cache_dir), setup=SETUP)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return float(output)
+
+
+def main():
+    """
+    Run the benchmark and print the results.
+    """
+
+    apidoc = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_APIDOC
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache_file = os.path.join(cache_dir, 'default.json')
+        index_file = cache_file + '.idx'
+        shutil.copy(apidoc, cache_file)
+
+        json_times = []
+        for _ in range(rounds):
+            if os.path.exists(index_file):
+                os.unlink(index_file)
+            json_times.append(_sample(cache_dir))
+
+        index_times = [_sample(cache_dir) for _ in range(rounds)]
+
+        print('apidoc: {} ({} bytes)'.format(apidoc, os.path.getsize(cache_file)))
+        print('index: {} bytes'.format(os.path.getsize(index_file)))
+        for name, times in (('json', json_times), ('index', index_times)):
+            print('{:>6}: best {:.2f} ms, mean {:.2f} ms over {} cold starts'.format(
+                name, min(times) * 1000, sum(times) / len(times) * 1000, rounds))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
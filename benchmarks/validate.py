@@ -0,0 +1,88 @@
+"""
+Benchmark validating large nested payloads, with and without compiled validators.
+
+Uses the host and content view updates of luna.json, the host having many
+interfaces and parameters, like a big Katello deployment would send.
+
+Usage::
+
+    python benchmarks/validate.py [path/to/apidoc.json] [number]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APIDOC = os.path.join(ROOT, 'tests', 'fixtures', 'luna.json')
+sys.path.insert(0, ROOT)
+
+import apypie  # noqa: E402  # pylint: disable=wrong-import-position
+from apypie.validator import compile_validator  # noqa: E402  # pylint: disable=wrong-import-position
+
+HOST_UPDATE = {
+    'id': 'host.example.com',
+    'host': {
+        'name': 'host.example.com',
+        'location_id': 1,
+        'organization_id': '1',
+        'build': True,
+        'enabled': 1,
+        'managed': True,
+        'host_parameters_attributes': [
+            {'name': 'param{}'.format(num), 'value': 'value{}'.format(num), 'parameter_type': 'string', 'hidden_value': False}
+            for num in range(50)
+        ],
+        'interfaces_attributes': [
+            {'mac': '52:54:00:00:00:{:02x}'.format(num), 'ip': '192.0.2.{}'.format(num), 'type': 'interface',
+             'name': 'eth{}'.format(num), 'subnet_id': 1, 'domain_id': 1, 'identifier': 'eth{}'.format(num),
+             'managed': True, 'primary': num == 0, 'provision': num == 0}
+            for num in range(20)
+        ],
+        'content_facet_attributes': {'content_view_id': 1, 'lifecycle_environment_id': 1, 'content_source_id': 1},
+        'subscription_facet_attributes': {'release_version': '8', 'autoheal': True, 'service_level': 'Premium'},
+        'puppetclass_ids': list(range(100)),
+        'ansible_role_ids': list(range(100)),
+    },
+}
+
+CONTENT_VIEW_UPDATE = {
+    'id': 1,
+    'name': 'Content View',
+    'description': 'All the repositories',
+    'repository_ids': list(range(500)),
+    'component_ids': list(range(100)),
+    'auto_publish': False,
+    'solve_dependencies': 0,
+}
+
+
+def main():
+    """
+    Run the benchmark and print the results.
+    """
+
+    apidoc = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_APIDOC
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        shutil.copy(apidoc, os.path.join(cache_dir, 'default.json'))
+        api = apypie.Api(uri='https://foreman.example.com', api_version=2, apidoc_cache_dir=cache_dir)
+        for resource, payload in (('hosts', HOST_UPDATE), ('content_views', CONTENT_VIEW_UPDATE)):
+            action = api.resource(resource).action('update')
+            validator = compile_validator(action.params)
+            interpreted = min(timeit.repeat(lambda: action._validate(action.params, payload), number=number, repeat=5))  # pylint: disable=protected-access,cell-var-from-loop
+            compiled = min(timeit.repeat(lambda: validator(payload), number=number, repeat=5))  # pylint: disable=cell-var-from-loop
+            print('{0}#update: validate {1:.1f} us, compiled {2:.1f} us ({3:.1f}x)'.format(
+                resource, interpreted / number * 1e6, compiled / number * 1e6, interpreted / compiled))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -43,5 +43,7 @@ setup(
     extras_require={
         'kerberos': ['requests-gssapi'],
         'oauth1': ['requests-oauthlib'],
+        'async': ['aiohttp'],
+        'orjson': ['orjson'],
     },
 )
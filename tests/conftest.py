@@ -70,3 +70,10 @@ def preserve_environ():
 def tmp_xdg_cache_home(preserve_environ, tmpdir):
     os.environ['XDG_CACHE_HOME'] = tmpdir.strpath
     return tmpdir
+
+
+@pytest.fixture(autouse=True)
+def clean_apidoc_registry():
+    apypie.registry.APIDOC_REGISTRY.clear()
+    yield
+    apypie.registry.APIDOC_REGISTRY.clear()
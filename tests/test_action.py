@@ -42,6 +42,14 @@ def test_action_example(resource):
     assert '[ {"user":{"name":"John Doe" }} ]' in example.response
 
 
+def test_action_derived_properties_cached(resource):
+    action = resource.action('index')
+    assert action.apidoc is action.apidoc
+    assert action.routes is action.routes
+    assert action.params is action.params
+    assert action.examples is action.examples
+
+
 def test_action_call(resource, mocker):
     params = {}
     headers = {'content-type': 'application/json'}
@@ -231,3 +239,62 @@ def test_action_prepare_params_hash_of_hashes(luna_api):
     expected_params = {'job_invocation': {'bookmark_id': 10, 'job_template_id': 177, 'recurrence': {'cron_line': '30 2 * * *'}, 'concurrency_control': {'concurrency_level': 2}, 'targeting_type': 'static_query', 'inputs': {'command': 'pwd'}}}
     generated_params = action.prepare_params(input_dict)
     assert expected_params == generated_params
+
+
+def test_action_validate_many(resource, mocker):
+    action = resource.action('create')
+    values_list = [
+        {'user': {'name': 'John Doe'}},
+        {'user': {'vip': True}},
+        [],
+        {'user': {'name': 'John Doe', 'vip': 'maybe'}},
+        {'user': {'name': 'Jane Doe', 'address': {'city': 'Ankh-Morpork', 'street': 'Audit Alley'}}},
+    ]
+    compile_validator = mocker.spy(apypie.action, 'compile_validator')
+    results = list(action.validate_many(values_list))
+    assert [values for values, _ in results] == values_list
+    assert [type(error) for _, error in results] == [type(None), apypie.exceptions.MissingArgumentsError,
+                                                     apypie.exceptions.InvalidArgumentTypesError, ValueError, type(None)]
+    assert str(results[1][1]) == 'The following required parameters are missing: user[name]'
+    compile_validator.assert_called_once()
+
+
+def test_action_validate_many_malformed(resource):
+    values_list = [{'user': {'name': 'John Doe', 'contacts': 5}}, {'user': {'name': 'Jane Doe'}}]
+    results = list(resource.action('create').validate_many(values_list))
+    assert isinstance(results[0][1], TypeError)
+    assert results[1] == (values_list[1], None)
+
+
+def test_action_validate_many_with_data(resource):
+    results = list(resource.action('create_unnested').validate_many([{}, {'name': 'John Doe'}], data={'name': 'John Doe'}))
+    assert [error for _, error in results] == [None, None]
+
+
+def test_action_prepare_params_many(api):
+    action = api.resource('users').action('create')
+    input_dicts = [{'name': 'John Doe'}, 'John Doe', {'name': 'Jane Doe', 'unknown': 1}, {'user': 'not a hash'}, {}]
+    results = list(action.prepare_params_many(input_dicts))
+    assert results[0] == ({'user': {'name': 'John Doe'}}, None)
+    assert results[1][0] is None
+    assert isinstance(results[1][1], apypie.exceptions.InvalidArgumentTypesError)
+    assert results[2] == ({'user': {'name': 'Jane Doe'}}, None)
+    assert results[3][0] is None
+    assert isinstance(results[3][1], AttributeError)
+    assert results[4] == ({}, None)
+
+
+def test_action_immutable(action):
+    with pytest.raises(AttributeError):
+        action.name = 'index'
+    assert not hasattr(action, '__dict__')
+    assert isinstance(action.params, tuple)
+
+
+def test_action_find_route_table_reused(api, mocker):
+    action = api.resource('comments').action('show')
+    route = action.find_route({'id': 1, 'post_id': 2})
+    sort = mocker.patch('apypie.action.sorted', create=True)
+    assert action.find_route({'id': 1, 'post_id': 2}) is route
+    assert action.find_route({}) is action.find_route()
+    sort.assert_not_called()
@@ -0,0 +1,344 @@
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import asyncio
+import concurrent.futures
+import gzip
+import json
+import sys
+import threading
+import time
+import http.server
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+import apypie
+from apypie.aio import AiohttpTransport, AsyncApi, AsyncForemanApi, AsyncTransport, StreamTransport, default_transport
+from apypie.foreman import ForemanApiException
+
+# asyncio.run and ThreadingHTTPServer are only available since Python 3.7
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7), reason='requires Python 3.7 or newer')
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _handle(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.requests.append((self.command, parts.path, parse_qs(parts.query), dict(self.headers), body))
+        server.connections.add(self.client_address)
+        status, headers, content = server.routes.get((self.command, parts.path), (404, {}, b'{"error": "not found"}'))
+        if callable(content):
+            content = content(body)
+        if isinstance(content, (dict, list)):
+            content = json.dumps(content).encode('utf-8')
+        time.sleep(headers.pop('X-Delay', 0))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if headers.get('Transfer-Encoding') == 'chunked':
+            self.end_headers()
+            for start in range(0, len(content), 7):
+                chunk = content[start:start + 7]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            if status != 204:
+                self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            if status != 204:
+                self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    httpd.daemon_threads = True
+    httpd.routes = {}
+    httpd.requests = []
+    httpd.connections = set()
+    httpd.uri = 'http://127.0.0.1:{}'.format(httpd.server_address[1])
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def async_api(fixture_dir, server, tmpdir):
+    server.routes[('GET', '/apidoc/v1.json')] = (200, {}, fixture_dir.join('dummy.json').read_binary())
+    return AsyncApi(uri=server.uri, apidoc_cache_dir=tmpdir.strpath, username='admin', password='changeme', transport=StreamTransport())
+
+
+@pytest.fixture
+def async_foreman_api(fixture_dir, server, tmpdir):
+    server.routes[('GET', '/apidoc/v2.json')] = (200, {}, fixture_dir.join('luna.json').read_binary())
+    api = AsyncForemanApi(uri=server.uri, apidoc_cache_dir=tmpdir.strpath, transport=StreamTransport())
+    api.task_poll = 0.01
+    return api
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_init_kerberos(tmpdir):
+    with pytest.raises(ValueError) as excinfo:
+        AsyncApi(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, kerberos=True)
+    assert 'Kerberos authentication is not supported' in str(excinfo.value)
+
+
+def test_init_default_transport(tmpdir):
+    api = AsyncApi(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, verify_ssl=False,
+                   client_cert='client.crt', client_key='client.key', connect_timeout=5, max_connections=500)
+    assert isinstance(api.transport, AsyncTransport)
+    assert api.transport.verify is False
+    assert api.transport.cert == ('client.crt', 'client.key')
+    assert api.transport.timeout == (5, None)
+    assert api.transport.limit == 500
+
+
+@pytest.mark.parametrize('has_aiohttp,expected', [
+    (True, AiohttpTransport),
+    (False, StreamTransport),
+])
+def test_default_transport(mocker, has_aiohttp, expected):
+    mocker.patch('importlib.util.find_spec', return_value=object() if has_aiohttp else None)
+    assert type(default_transport(limit=10)) is expected
+
+
+def test_lazy_attributes():
+    assert apypie.AsyncApi is AsyncApi
+    assert apypie.AsyncForemanApi is AsyncForemanApi
+
+
+def test_call(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+    assert run(async_api.call('users', 'show', {'id': 1})) == {'id': 1}
+    method, path, query, headers, _body = server.requests[-1]
+    assert (method, path, query) == ('GET', '/users/1', {})
+    assert headers['Accept'] == 'application/json;version=1'
+    assert headers['Authorization'].startswith('Basic ')
+
+
+def test_call_querystring(async_api, server):
+    server.routes[('GET', '/users')] = (200, {}, [])
+    assert run(async_api.http_call('get', '/users', {'search': 'name = John', 'ids': [1, 2], 'flag': True})) == []
+    assert server.requests[-1][2] == {'search': ['name = John'], 'ids[]': ['1', '2'], 'flag': ['true']}
+
+
+def test_call_post(async_api, server):
+    server.routes[('POST', '/users')] = (201, {}, lambda body: body)
+    params = {'user': {'name': 'John Doe'}}
+    assert run(async_api.call('users', 'create', params)) == params
+    assert server.requests[-1][3]['Content-Type'] == 'application/json'
+
+
+def test_call_no_content(async_api, server):
+    server.routes[('DELETE', '/users/1')] = (204, {}, b'')
+    assert run(async_api.call('users', 'destroy', {'id': 1})) is None
+
+
+def test_call_invalid_params(async_api, server):
+    with pytest.raises(apypie.exceptions.MissingArgumentsError):
+        run(async_api.call('users', 'create', {'user': {'vip': True}}))
+    assert [request[1] for request in server.requests] == ['/apidoc/v1.json']
+
+
+def test_call_http_error(async_api):
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        run(async_api.call('users', 'show', {'id': 2}))
+    assert excinfo.value.response.status_code == 404
+    assert excinfo.value.response.json() == {'error': 'not found'}
+
+
+@pytest.mark.parametrize('headers', [
+    {'Transfer-Encoding': 'chunked'},
+    {'Content-Encoding': 'gzip'},
+    {'Content-Encoding': 'gzip', 'Transfer-Encoding': 'chunked'},
+])
+def test_call_encoded_response(async_api, server, headers):
+    content = json.dumps({'id': 1, 'name': 'John Doe' * 10}).encode('utf-8')
+    if 'Content-Encoding' in headers:
+        content = gzip.compress(content)
+    server.routes[('GET', '/users/1')] = (200, headers, content)
+    assert run(async_api.call('users', 'show', {'id': 1})) == {'id': 1, 'name': 'John Doe' * 10}
+
+
+def test_call_accept_encoding(async_api, server):
+    # requests accepts br and zstd when brotli or zstandard are installed
+    async_api.api._session.headers['Accept-Encoding'] = 'gzip, deflate, br, zstd'
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+    run(async_api.call('users', 'show', {'id': 1}))
+    assert server.requests[-1][3]['Accept-Encoding'] == 'gzip, deflate'
+
+
+def test_call_unsupported_encoding(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {'Content-Encoding': 'br'}, b'compressed')
+    with pytest.raises(requests.exceptions.ContentDecodingError) as excinfo:
+        run(async_api.call('users', 'show', {'id': 1}))
+    assert 'Unsupported content encoding br' in str(excinfo.value)
+
+
+def test_call_invalid_response(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {}, b'<html>Bad Gateway</html>')
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        run(async_api.call('users', 'show', {'id': 1}))
+
+
+def test_call_loads_apidoc_in_executor(async_api, server, mocker):
+    threads = []
+    load_apidoc = async_api.api._load_apidoc
+    mocker.patch.object(async_api.api, '_load_apidoc', side_effect=lambda: threads.append(threading.current_thread()) or load_apidoc())
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+
+    async def calls():
+        return [await async_api.call('users', 'show', {'id': 1}) for _ in range(2)]
+
+    assert run(calls()) == [{'id': 1}, {'id': 1}]
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+def test_call_refreshes_apidoc_in_executor(async_api, server, mocker):
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+    async_api.api.apidoc_index  # pylint: disable=pointless-statement
+    async_api.api.apidoc_cache_ttl = 60
+    async_api.api._apidoc_validated_at = time.time() - 120
+    threads = []
+    mocker.patch.object(async_api.api, '_refresh_apidoc', side_effect=lambda stale_before: threads.append(threading.current_thread()))
+    run(async_api.call('users', 'show', {'id': 1}))
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+def test_call_validates_cache(async_api, server, mocker):
+    validate_cache = mocker.spy(async_api.api, 'validate_cache')
+    server.routes[('GET', '/users/1')] = (200, {'Apipie-Checksum': 'newchecksum'}, {'id': 1})
+    run(async_api.call('users', 'show', {'id': 1}))
+    validate_cache.assert_called_with('newchecksum')
+
+
+def test_call_read_timeout(fixture_dir, server, tmpdir):
+    server.routes[('GET', '/apidoc/v1.json')] = (200, {}, fixture_dir.join('dummy.json').read_binary())
+    server.routes[('GET', '/users/1')] = (200, {'X-Delay': 0.5}, {'id': 1})
+    async_api = AsyncApi(uri=server.uri, apidoc_cache_dir=tmpdir.strpath, transport=StreamTransport(timeout=(1, 0.05)))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        run(async_api.call('users', 'show', {'id': 1}))
+
+
+def test_call_connection_error(tmpdir, fixture_dir):
+    fixture_dir.join('dummy.json').copy(tmpdir / 'default.json')
+    async_api = AsyncApi(uri='http://127.0.0.1:1', apidoc_cache_dir=tmpdir.strpath, transport=StreamTransport())
+    with pytest.raises(requests.exceptions.ConnectionError):
+        run(async_api.call('users', 'show', {'id': 1}))
+
+
+def test_call_many_reuses_connections(async_api, server):
+    for user_id in range(100):
+        server.routes[('GET', '/users/{}'.format(user_id))] = (200, {}, {'id': user_id})
+
+    async def call_many():
+        async with async_api:
+            return await async_api.call_many([('users', 'show', {'id': user_id}) for user_id in range(100)], max_concurrency=5)
+
+    results = run(call_many())
+    assert results == [({'id': user_id}, None) for user_id in range(100)]
+    # the apidoc is loaded with its own (synchronous) connection
+    assert len(server.connections) <= 6
+
+
+def test_call_many_errors(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+    results = run(async_api.call_many([('users', 'show', {'id': 1}), ('users', 'show', {'id': 2}), ('users', 'create', {'user': {'vip': True}})]))
+    assert results[0] == ({'id': 1}, None)
+    assert isinstance(results[1][1], requests.exceptions.HTTPError)
+    assert isinstance(results[2][1], apypie.exceptions.MissingArgumentsError)
+
+
+def test_call_many_fail_fast(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+    results = run(async_api.call_many([('users', 'show', {'id': 2}), ('users', 'show', {'id': 1})], max_concurrency=1, fail_fast=True))
+    assert isinstance(results[0][1], requests.exceptions.HTTPError)
+    assert results[1][0] is None
+    assert isinstance(results[1][1], concurrent.futures.CancelledError)
+    assert [request[1] for request in server.requests] == ['/apidoc/v1.json', '/users/2']
+
+
+def test_stale_connection(async_api, server):
+    server.routes[('GET', '/users/1')] = (200, {}, {'id': 1})
+
+    async def call_twice():
+        first = await async_api.call('users', 'show', {'id': 1})
+        # close the kept connection, like a server does after its keep-alive timeout
+        for _reader, writer in async_api.transport._idle.popitem()[1]:
+            writer.transport.abort()
+            async_api.transport._idle.setdefault(('http', '127.0.0.1', server.server_address[1]), []).append((_reader, writer))
+        return first, await async_api.call('users', 'show', {'id': 1})
+
+    assert run(call_twice()) == ({'id': 1}, {'id': 1})
+
+
+def test_foreman_resource_action(async_foreman_api, server):
+    server.routes[('GET', '/katello/api/organizations/1')] = (200, {}, {'id': 1})
+    assert run(async_foreman_api.show('organizations', 1)) == {'id': 1}
+
+
+def test_foreman_resource_action_unknown_resource(async_foreman_api):
+    with pytest.raises(ForemanApiException) as excinfo:
+        run(async_foreman_api.resource_action('bubblegums', 'show', {'id': 1}))
+    assert "The server doesn't know about bubblegums, is the right plugin installed?" in str(excinfo.value)
+
+
+def test_foreman_resource_action_http_error(async_foreman_api, server):
+    server.routes[('GET', '/katello/api/organizations/1')] = (422, {}, {'error': {'message': 'broken'}})
+    with pytest.raises(ForemanApiException) as excinfo:
+        run(async_foreman_api.show('organizations', 1))
+    assert "Error while performing show on organizations" in str(excinfo.value)
+    assert "'message': 'broken'" in str(excinfo.value)
+
+
+def test_foreman_resource_action_wait_for_task(async_foreman_api, server):
+    task = {'id': 'task1', 'action': 'Sync', 'state': 'running', 'started_at': 'now', 'result': 'pending'}
+    server.routes[('POST', '/katello/api/repositories/1/sync')] = (202, {}, task)
+    server.routes[('GET', '/foreman_tasks/api/tasks/task1')] = (200, {}, dict(task, state='stopped', result='success'))
+    result = run(async_foreman_api.resource_action('repositories', 'sync', {'id': 1}))
+    assert result['state'] == 'stopped'
+
+
+def test_foreman_wait_for_task_failed(async_foreman_api, server):
+    task = {'id': 'task1', 'action': 'Sync', 'state': 'stopped', 'started_at': 'now', 'result': 'error', 'humanized': {'errors': ['broken']}}
+    with pytest.raises(ForemanApiException) as excinfo:
+        run(async_foreman_api.wait_for_task(task))
+    assert "Task Sync(task1) did not succeed. Task information: ['broken']" in str(excinfo.value)
+
+
+def test_foreman_wait_for_task_timeout(async_foreman_api):
+    async_foreman_api.task_timeout = 0.01
+    with pytest.raises(ForemanApiException) as excinfo:
+        run(async_foreman_api.wait_for_task({'id': 'task1', 'state': 'running'}))
+    assert "Timeout waiting for Task task1" in str(excinfo.value)
+
+
+def test_foreman_list_and_resource_action_many(async_foreman_api, server):
+    server.routes[('GET', '/katello/api/organizations')] = (200, {}, {'results': [{'id': 1}, {'id': 2}]})
+    for org_id in (1, 2):
+        server.routes[('PUT', '/katello/api/organizations/{}'.format(org_id))] = (200, {}, lambda body: json.loads(body)['organization'])
+
+    async def update_all():
+        organizations = await async_foreman_api.list('organizations', search='name ~ Org')
+        return await async_foreman_api.resource_action_many(
+            [('organizations', 'update', {'id': org['id'], 'organization': {'name': 'Org {}'.format(org['id'])}}) for org in organizations])
+
+    assert run(update_all()) == [({'name': 'Org 1'}, None), ({'name': 'Org 2'}, None)]
+    assert server.requests[1][2] == {'search': ['name ~ Org'], 'per_page': [str(apypie.foreman.PER_PAGE)]}
@@ -2,8 +2,15 @@
 import pytest
 
 import apypie
+import concurrent.futures
 import requests
 import json
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
 
 
 def test_init(api):
@@ -175,6 +182,33 @@ def test_call_method_and_fill_params(api, mocker):
     api.http_call.assert_called_once_with(api, 'get', '/users/1', {}, headers, None, None)
 
 
+def test_call_many(api, requests_mock):
+    for user_id in range(20):
+        requests_mock.get('https://api.example.com/users/{}'.format(user_id), json={'id': user_id})
+    requests_mock.get('https://api.example.com/users/13', status_code=404)
+    results = api.call_many([('users', 'show', {'id': user_id}) for user_id in range(20)], max_workers=4)
+    assert [result for result, _ in results] == [None if user_id == 13 else {'id': user_id} for user_id in range(20)]
+    assert [type(exc) for _, exc in results] == [requests.exceptions.HTTPError if user_id == 13 else type(None) for user_id in range(20)]
+
+
+def test_call_many_invalid_params(api, requests_mock):
+    requests_mock.get('https://api.example.com/users/1', json={'id': 1})
+    results = api.call_many([('users', 'create', {'user': {'vip': True}}), ('users', 'show', {'id': 1})])
+    assert results[0][0] is None
+    assert isinstance(results[0][1], apypie.exceptions.MissingArgumentsError)
+    assert results[1] == ({'id': 1}, None)
+
+
+def test_call_many_fail_fast(api, requests_mock):
+    requests_mock.get('https://api.example.com/users/0', status_code=500)
+    requests_mock.get('https://api.example.com/users/1', json={'id': 1})
+    results = api.call_many([('users', 'show', {'id': user_id}) for user_id in range(2)], max_workers=1, fail_fast=True)
+    assert isinstance(results[0][1], requests.exceptions.HTTPError)
+    assert results[1][0] is None
+    assert isinstance(results[1][1], concurrent.futures.CancelledError)
+    assert requests_mock.call_count == 2  # the apidoc and the failing call
+
+
 def test_http_call_get(api, requests_mock):
     requests_mock.get('https://api.example.com/', text='{}')
     api.http_call('get', '/')
@@ -343,8 +377,10 @@ def test_validate_cache(fixture_dir, requests_mock, tmp_xdg_cache_home):
     assert api.apidoc
     assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(file=1)
     api.validate_cache('testcache')
-    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(exists=0)
+    assert api._apidoc is None
+    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(file=1)
     assert api.apidoc
+    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(exists=0)
     assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'testcache.json').check(file=1)
 
 
@@ -356,8 +392,10 @@ def test_validate_cache_path_traversal(fixture_dir, requests_mock, tmp_xdg_cache
     assert api.apidoc
     assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(file=1)
     api.validate_cache('../help/testcache')
-    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(exists=0)
+    assert api._apidoc is None
+    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(file=1)
     assert api.apidoc
+    assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'default.json').check(exists=0)
     assert tmp_xdg_cache_home.join('apypie', 'https___api.example.com', 'v1', 'testcache.json').check(file=1)
 
 
@@ -371,3 +409,653 @@ def test_custom_session(fixture_dir, requests_mock, tmpdir):
 
     requests_mock.get('https://api.example.com/', request_headers=headers, text='{}')
     my_api.http_call('get', '/')
+
+
+def test_init_pool(apidoc_cache_dir):
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath,
+                     pool_connections=2, pool_maxsize=32, pool_block=True)
+    for prefix in ('https://', 'http://'):
+        adapter = api._session.adapters[prefix]
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 32
+        assert adapter._pool_block is True
+
+
+def test_init_pool_custom_session(apidoc_cache_dir):
+    my_session = requests.Session()
+    my_adapter = my_session.adapters['https://']
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath, session=my_session, pool_maxsize=32)
+    assert api._session.adapters['https://'] is my_adapter
+
+
+@pytest.mark.parametrize('connect_timeout,read_timeout,expected', [
+    (None, None, None),
+    (3.05, None, (3.05, None)),
+    (3.05, 30, (3.05, 30)),
+])
+def test_http_call_timeout(apidoc_cache_dir, requests_mock, connect_timeout, read_timeout, expected):
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath,
+                     connect_timeout=connect_timeout, read_timeout=read_timeout)
+    requests_mock.get('https://api.example.com/', text='{}')
+    api.http_call('get', '/')
+    assert requests_mock.last_request.timeout == expected
+
+
+def test_init_pool_warmup(apidoc_cache_dir, requests_mock):
+    requests_mock.head('https://api.example.com', [{'status_code': 200}, {'exc': requests.exceptions.ConnectionError}, {'status_code': 302}])
+    apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath, pool_warmup=3, connect_timeout=5)
+    assert requests_mock.call_count == 3
+    assert all(request.method == 'HEAD' and request.timeout == (5, None) for request in requests_mock.request_history)
+
+
+def test_init_no_pool_warmup(apidoc_cache_dir, requests_mock):
+    apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath)
+    assert requests_mock.call_count == 0
+
+
+def test_load_apidoc_writes_index(api):
+    assert os.path.isfile(api.apidoc_index_file)
+    assert api.apidoc_index['users']['show']['name'] == 'show'
+
+
+def test_load_apidoc_from_index(api, mocker):
+    # start from scratch, like a new process would
+    apypie.registry.APIDOC_REGISTRY.clear()
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir)
+    json_load = mocker.patch.object(other_api.codec, 'loads')
+    assert other_api.apidoc == api.apidoc
+    assert other_api.apidoc_index['users']['show'] == api.apidoc_index['users']['show']
+    json_load.assert_not_called()
+
+
+def test_load_apidoc_stale_index(api, mocker):
+    # start from scratch, like a new process would
+    apypie.registry.APIDOC_REGISTRY.clear()
+    with open(api.apidoc_cache_file, 'a') as apidoc_file:
+        apidoc_file.write('\n')
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir)
+    json_load = mocker.spy(other_api.codec, 'loads')
+    assert other_api.apidoc == api.apidoc
+    json_load.assert_called_once()
+
+
+def test_load_apidoc_broken_index(api, mocker):
+    # start from scratch, like a new process would
+    apypie.registry.APIDOC_REGISTRY.clear()
+    with open(api.apidoc_index_file, 'wb') as index_file:
+        index_file.write(b'BAD INDEX')
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir)
+    assert other_api.apidoc == api.apidoc
+
+
+def test_clean_cache_removes_index(api):
+    api.clean_cache()
+    assert api._apidoc_index is None
+    assert not os.path.exists(api.apidoc_index_file)
+
+
+def test_sharded_cache(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_sharded=True)
+    assert api.resources == ['comments', 'posts', 'users']
+    assert tmpdir.join('default.json').check(file=1)
+    assert tmpdir.join('default.json.shards', 'manifest.json').check(file=1)
+    assert tmpdir.join('default.json.shards', 'users.json').check(file=1)
+    assert tmpdir.join('default.json.idx').check(exists=0)
+
+
+def test_sharded_cache_lazy_loading(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_sharded=True).apidoc
+    apypie.registry.APIDOC_REGISTRY.clear()
+
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_sharded=True)
+    assert api.resources == ['comments', 'posts', 'users']
+    assert api.resource('users').action('show').apidoc['name'] == 'show'
+    assert api._apidoc is None
+    assert api.apidoc_index.loaded == ['users']
+    assert api.resource('posts')
+    assert api.apidoc_index.loaded == ['users']
+
+
+def test_sharded_cache_from_unsharded(api):
+    # start from scratch, like a new process would
+    apypie.registry.APIDOC_REGISTRY.clear()
+    sharded_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, apidoc_cache_sharded=True)
+    assert sharded_api.resource('users').actions == api.resource('users').actions
+    assert os.path.isfile(os.path.join(sharded_api.apidoc_shards_dir, 'manifest.json'))
+
+
+def test_clean_cache_removes_shards(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_sharded=True)
+    assert api.apidoc
+    api.clean_cache()
+    assert not os.path.exists(api.apidoc_shards_dir)
+
+
+def test_validate_cache_refreshes_once(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc
+    api.validate_cache('c0ffee')
+    api.validate_cache('d00d')
+    assert api.apidoc
+    assert api.resources
+    assert apidoc_mock.call_count == 2
+    assert tmpdir.join('default.json').check(exists=0)
+    assert tmpdir.join('c0ffee.json').check(exists=0)
+    assert tmpdir.join('d00d.json').check(file=1)
+
+
+def test_validate_cache_not_modified_etag(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'ETag': '"abc"'})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc
+
+    not_modified_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=304,
+                                          request_headers={'If-None-Match': '"abc"'})
+    api.validate_cache('c0ffee')
+    assert api.apidoc == data
+    assert not_modified_mock.call_count == 1
+    assert tmpdir.join('default.json').check(exists=0)
+    assert tmpdir.join('c0ffee.json').check(file=1)
+    with tmpdir.join('c0ffee.json.meta').open() as meta_file:
+        assert json.load(meta_file)['etag'] == '"abc"'
+
+
+def test_validate_cache_not_modified_checksum(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'Apipie-Checksum': 'c0ffee'})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc
+    assert api.apidoc_cache_name == 'c0ffee'
+
+    not_modified_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=304,
+                                          request_headers={'If-None-Match': '"c0ffee"'})
+    api.validate_cache('d00d')
+    assert api.apidoc == data
+    assert not_modified_mock.call_count == 1
+    assert tmpdir.join('c0ffee.json').check(exists=0)
+    assert tmpdir.join('d00d.json').check(file=1)
+
+
+def test_validate_cache_modified(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'ETag': '"abc"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc
+
+    data['docs']['resources'].pop('posts')
+    modified_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'ETag': '"def"'})
+    api.validate_cache('c0ffee')
+    assert api.resources == ['comments', 'users']
+    assert modified_mock.last_request.headers['If-None-Match'] == '"abc"'
+    assert modified_mock.last_request.headers['If-Modified-Since'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+
+def test_validate_cache_reuses_existing(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc
+    # another process already retrieved the new apidoc
+    fixture_dir.join('dummy.json').copy(tmpdir / 'c0ffee.json')
+    api.validate_cache('c0ffee')
+    assert api.apidoc
+    assert apidoc_mock.call_count == 1
+    assert tmpdir.join('default.json').check(exists=0)
+
+
+def test_retrieve_apidoc_single_flight(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+
+    def slow_apidoc(request, context):
+        time.sleep(0.5)
+        return data
+
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=slow_apidoc)
+    apis = [apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath) for _ in range(4)]
+    threads = [threading.Thread(target=lambda api=api: api.apidoc) for api in apis]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert apidoc_mock.call_count == 1
+    assert all(api._apidoc == data for api in apis)
+    assert not tmpdir.listdir(lambda path: path.ext == '.tmp')
+
+
+@pytest.mark.parametrize('compression,extension', [
+    ('gzip', '.json.gz'),
+    ('lzma', '.json.xz'),
+])
+def test_compressed_cache(fixture_dir, requests_mock, tmpdir, compression, extension):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression=compression)
+    assert api.cache_extension == extension
+    assert api.apidoc == data
+    assert requests_mock.last_request.headers['Accept-Encoding'] == 'gzip'
+    assert tmpdir.join('default' + extension).check(file=1)
+    assert tmpdir.join('default.json').check(exists=0)
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression=compression)
+    assert other_api.apidoc == data
+    assert requests_mock.call_count == 1
+
+
+def test_compressed_sharded_cache(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression='gzip', apidoc_cache_sharded=True).apidoc
+    apypie.registry.APIDOC_REGISTRY.clear()
+    assert tmpdir.join('default.json.gz.shards', 'users.json.gz').check(file=1)
+
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression='gzip', apidoc_cache_sharded=True)
+    assert api.resource('users').action('show').apidoc['name'] == 'show'
+
+
+def test_compressed_cache_invalid(tmpdir):
+    with pytest.raises(ValueError) as excinfo:
+        apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression='zip')
+    assert "Unsupported apidoc cache compression zip, use one of: gzip, lzma" in str(excinfo.value)
+
+
+def test_compressed_cache_lzma_missing(tmpdir, mocker):
+    mocker.patch.dict(sys.modules, {'lzma': None})
+    with pytest.raises(ValueError) as excinfo:
+        apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_compression='lzma')
+    assert 'Apidoc cache compression lzma requested, but lzma not found.' in str(excinfo.value)
+
+
+def test_retrieve_apidoc_stores_response_body(requests_mock, tmpdir):
+    body = '{"docs": {"resources": {}, "name": "\u00e9t\u00e9"}}'
+    requests_mock.get('https://api.example.com/apidoc/v1.json', text=body)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.apidoc['docs']['name'] == '\u00e9t\u00e9'
+    assert tmpdir.join('default.json').read() == body
+
+
+def test_retrieve_apidoc_empty(requests_mock, tmpdir):
+    requests_mock.get('https://api.example.com/apidoc/v1.json', text='{}')
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    with pytest.raises(apypie.exceptions.DocLoadingError):
+        api.apidoc
+    assert tmpdir.join('default.json').check(exists=0)
+
+
+def test_shared_apidoc(api, mocker):
+    load_apidoc = mocker.spy(apypie.Api, '_load_apidoc')
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir)
+    assert other_api.apidoc is api.apidoc
+    assert other_api.apidoc_index is api.apidoc_index
+    load_apidoc.assert_not_called()
+
+
+def test_shared_apidoc_other_language(api):
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, language='tlh')
+    assert other_api.apidoc is not api.apidoc
+
+
+def test_shared_apidoc_invalidated_by_checksum(api, requests_mock, fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    data['docs']['resources'].pop('posts')
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    old_apidoc = api.apidoc
+    api.validate_cache('c0ffee')
+    assert api.resources == ['comments', 'users']
+
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, apidoc_cache_name='default')
+    assert other_api.apidoc is not old_apidoc
+    other_api.validate_cache('c0ffee')
+    assert other_api.apidoc is api.apidoc
+
+
+def test_lean_apidoc(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_lean=True)
+    action = api.resource('users').action('index')
+    assert 'examples' not in action.apidoc
+    assert action.examples == ()
+    assert action.routes[0].path == '/users'
+    assert tmpdir.join('default.json.lean.idx').check(file=1)
+    assert tmpdir.join('default.json.idx').check(exists=0)
+    with tmpdir.join('default.json').open() as cache_file:
+        assert json.load(cache_file) == data
+
+
+def test_lean_apidoc_validate(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_lean=True)
+    action = api.resource('users').action('create')
+    assert action.params[0].description == ''
+    with pytest.raises(ValueError) as excinfo:
+        action.validate({'user': {'name': 'John Doe', 'vip': 'maybe'}})
+    assert "vip (maybe): Must be one of" in str(excinfo.value)
+
+
+def test_lean_apidoc_not_shared_with_full(api):
+    lean_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, apidoc_lean=True)
+    assert lean_api.resource('users').action('index').examples == ()
+    assert api.resource('users').action('index').examples
+
+
+def test_clean_cache_removes_lean_index(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_lean=True)
+    assert api.apidoc
+    api.clean_cache()
+    assert tmpdir.listdir(lambda path: not path.basename.startswith('.')) == []
+
+
+def _write_stale_cache(fixture_dir, tmpdir):
+    fixture_dir.join('dummy.json').copy(tmpdir / 'default.json')
+    meta = {'path': '/apidoc/v1.json', 'etag': '"abc"', 'validated_at': time.time() - 3600}
+    with tmpdir.join('default.json.meta').open('w') as meta_file:
+        json.dump(meta, meta_file)
+
+
+def test_apidoc_cache_ttl(fixture_dir, requests_mock, tmpdir):
+    _write_stale_cache(fixture_dir, tmpdir)
+    not_modified_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=304,
+                                          request_headers={'If-None-Match': '"abc"'})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_ttl=60)
+    assert api.resources == ['comments', 'posts', 'users']
+    assert api.resources == ['comments', 'posts', 'users']
+    assert not_modified_mock.call_count == 1
+    assert tmpdir.join('default.json').check(file=1)
+    with tmpdir.join('default.json.meta').open() as meta_file:
+        assert json.load(meta_file)['validated_at'] > time.time() - 60
+
+
+def test_apidoc_cache_ttl_fresh(api, requests_mock):
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=304)
+    fresh_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, apidoc_cache_ttl=60)
+    assert fresh_api.resources
+    assert apidoc_mock.call_count == 0
+
+
+def test_apidoc_cache_ttl_refreshes_once(api, mocker):
+    api.apidoc_cache_ttl = 60
+    api._apidoc_validated_at = time.time() - 120
+    refresh = mocker.patch.object(api, '_refresh_apidoc')
+    threads = [threading.Thread(target=api._check_apidoc_ttl) for _ in range(2)]
+    with api._refresh_lock:
+        # both threads see the expired ttl before either of them gets the lock
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join()
+    refresh.assert_called_once()
+
+
+def test_apidoc_cache_background_refresh(fixture_dir, requests_mock, tmpdir):
+    _write_stale_cache(fixture_dir, tmpdir)
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    data['docs']['resources'].pop('posts')
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_ttl=60, apidoc_cache_background_refresh=True)
+    old_apidoc = api.apidoc
+    assert 'posts' in old_apidoc['docs']['resources']
+    api._refresh_thread.join()
+    assert api.resources == ['comments', 'users']
+    assert api.apidoc is not old_apidoc
+    assert apypie.registry.APIDOC_REGISTRY.get(api._apidoc_registry_key)[0] is api.apidoc
+
+
+def test_apidoc_cache_background_refresh_failed(fixture_dir, requests_mock, tmpdir):
+    _write_stale_cache(fixture_dir, tmpdir)
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=500)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_ttl=60, apidoc_cache_background_refresh=True)
+    assert api.resources == ['comments', 'posts', 'users']
+    api._refresh_thread.join()
+    assert api.resources == ['comments', 'posts', 'users']
+    assert apidoc_mock.call_count == 1
+    assert tmpdir.join('default.json').check(file=1)
+
+
+def test_apidoc_cache_background_refresh_checksum(api, requests_mock, fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    data['docs']['resources'].pop('posts')
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'Apipie-Checksum': 'c0ffee'})
+    api.apidoc_cache_background_refresh = True
+    assert api.apidoc
+    api.validate_cache('c0ffee')
+    assert api.apidoc_cache_name == 'default'
+    assert api.resources
+    api._refresh_thread.join()
+    assert api.apidoc_cache_name == 'c0ffee'
+    assert api.resources == ['comments', 'users']
+    assert os.path.isfile(os.path.join(api.apidoc_cache_dir, 'c0ffee.json'))
+    assert not os.path.exists(os.path.join(api.apidoc_cache_dir, 'default.json'))
+
+
+def test_sqlite_cache(fixture_dir, requests_mock, tmpdir, mocker):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend='sqlite').apidoc
+    assert tmpdir.join('default.json.sqlite').check(file=1)
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend='sqlite')
+    read_apidoc_cache = mocker.spy(api, '_read_apidoc_cache')
+    assert api.resources == ['comments', 'posts', 'users']
+    action = api.resource('users').action('create')
+    assert [route.path for route in action.routes] == ['/users']
+    with pytest.raises(ValueError) as excinfo:
+        action.validate({'user': {'name': 'John Doe', 'vip': 'maybe'}})
+    assert "vip (maybe): Must be one of" in str(excinfo.value)
+    assert read_apidoc_cache.call_count == 0
+
+    api.clean_cache()
+    assert tmpdir.join('default.json.sqlite').check(exists=0)
+
+
+@pytest.mark.parametrize('backend', ['shards', 'sqlite'])
+@pytest.mark.parametrize('lean', [False, True])
+def test_lazy_cache_backend_apidoc_not_rewritten(fixture_dir, requests_mock, tmpdir, mocker, backend, lean):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    expected = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, apidoc_lean=lean).apidoc
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, apidoc_lean=lean)
+    write = mocker.patch.object(api.apidoc_cache_backend, 'write')
+    assert api.apidoc == expected
+    assert api.resource('users').action('show').apidoc['name'] == 'show'
+    write.assert_not_called()
+    assert requests_mock.call_count == 1
+
+
+def test_custom_cache_backend(api):
+    class DictBackend(apypie.backends.CacheBackend):
+        stored = {}
+
+        def read(self):
+            return self.stored.get(self.path)
+
+        def write(self, apidoc, index):
+            self.stored[self.path] = (apidoc, index)
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    custom_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=api.apidoc_cache_dir, apidoc_cache_backend=DictBackend)
+    assert custom_api.resources == api.resources
+    assert list(DictBackend.stored) == [custom_api.apidoc_backend.path]
+
+
+def test_invalid_cache_backend(tmpdir):
+    with pytest.raises(ValueError) as excinfo:
+        apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend='redis')
+    assert 'Unsupported apidoc cache backend redis' in str(excinfo.value)
+
+
+def test_resource_does_not_list(api, mocker):
+    resources = mocker.patch('apypie.Api.resources', new_callable=mocker.PropertyMock)
+    assert api.resource('users')
+    with pytest.raises(KeyError):
+        api.resource('missing')
+    resources.assert_called_once_with()
+
+
+def test_resource_cached(api):
+    resource = api.resource('users')
+    assert api.resource('users') is resource
+    assert resource.action('show') is resource.action('show')
+
+
+def test_resource_cache_dropped_by_clean_cache(api):
+    resource = api.resource('users')
+    api.clean_cache()
+    assert api.resource('users') is not resource
+
+
+def test_resource_cache_dropped_by_checksum(api, requests_mock, fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    resource = api.resource('users')
+    action = resource.action('show')
+    api.validate_cache('c0ffee')
+    assert api.resource('users') is not resource
+    assert api.resource('users').action('show') is not action
+
+
+def _materialize_params(params):
+    for param in params:
+        assert param.description is not None
+        _materialize_params(param.params)
+
+
+def test_materialized_api_memory(luna_api):
+    assert luna_api.apidoc
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for resource_name in luna_api.resources:
+            resource = luna_api.resource(resource_name)
+            for action_name in resource.actions:
+                action = resource.action(action_name)
+                assert action.routes
+                assert action.examples is not None
+                _materialize_params(action.params)
+        footprint = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # all 662 actions of luna.json with their routes, params and examples, about 1.0 MB
+    assert footprint < 1.25 * 1024 * 1024
+
+
+def test_apidoc_loaded_once_by_concurrent_threads(fixture_dir, requests_mock, tmpdir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+
+    def slow_apidoc(request, context):
+        time.sleep(0.1)
+        return data
+
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=slow_apidoc)
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def load(attribute):
+        barrier.wait()
+        results.append(getattr(api, attribute))
+
+    threads = [threading.Thread(target=load, args=('apidoc' if num % 2 else 'apidoc_index',)) for num in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert apidoc_mock.call_count == 1
+    assert len(results) == 8
+    assert all(result is api.apidoc for result in results if 'docs' in result)
+    assert all(result is api.apidoc_index for result in results if 'docs' not in result)
+
+
+@pytest.mark.parametrize('attribute', ['apidoc', 'apidoc_index'])
+def test_apidoc_snapshot_survives_concurrent_invalidation(api, mocker, attribute):
+    snapshot = getattr(api, attribute)
+    # another thread invalidating the cache right before the property returns
+    mocker.patch.object(api, '_check_apidoc_ttl', side_effect=lambda: api.validate_cache('c0ffee'))
+    assert getattr(api, attribute) is snapshot
+    assert getattr(api, '_' + attribute) is None
+
+
+def test_resources_used_while_cache_is_validated(api, requests_mock, fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    apidoc_mock = requests_mock.get('https://api.example.com/apidoc/v1.json', json=data)
+    errors = []
+    stop = threading.Event()
+
+    def use_api():
+        while not stop.is_set():
+            try:
+                assert [route.path for route in api.resource('users').action('show').routes] == ['/users/:id']
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+    threads = [threading.Thread(target=use_api) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for num in range(20):
+        api.validate_cache('checksum{}'.format(num))
+        time.sleep(0.005)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert apidoc_mock.call_count <= 20
+
+
+def test_validate_cache_unchanged_does_not_wait_for_lock(api):
+    cache_name = api.apidoc_cache_name
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with api._apidoc_lock:
+            locked.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    locked.wait()
+    try:
+        start = time.monotonic()
+        api.validate_cache(cache_name)
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        thread.join()
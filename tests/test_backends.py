@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from apypie.backends import IndexBackend, ShardsBackend, SqliteBackend
+from apypie.cache import build_index
+
+
+@pytest.fixture
+def apidoc(fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        return json.load(read_file)
+
+
+@pytest.fixture
+def source(fixture_dir, tmpdir):
+    source = tmpdir / 'default.json'
+    fixture_dir.join('dummy.json').copy(source)
+    return source
+
+
+@pytest.mark.parametrize('backend', [IndexBackend, ShardsBackend, SqliteBackend])
+def test_backend(backend, apidoc, source, tmpdir):
+    store = backend((tmpdir / 'default.json').strpath + backend.extension, source.strpath, 'default')
+    assert store.read() is None
+    store.write(apidoc, build_index(apidoc))
+    stored_apidoc, index = store.read()
+    assert (stored_apidoc is None) == backend.lazy
+    assert sorted(index.keys()) == ['comments', 'posts', 'users']
+    assert sorted(index['users'].keys()) == sorted(build_index(apidoc)['users'].keys())
+    assert dict(index['users']['create']) == build_index(apidoc)['users']['create']
+
+
+@pytest.mark.parametrize('backend', [IndexBackend, ShardsBackend, SqliteBackend])
+def test_backend_other_checksum(backend, apidoc, source, tmpdir):
+    path = (tmpdir / 'default.json').strpath + backend.extension
+    backend(path, source.strpath, 'default').write(apidoc, build_index(apidoc))
+    assert backend(path, source.strpath, 'c0ffee').read() is None
+
+
+@pytest.mark.parametrize('backend', [IndexBackend, ShardsBackend, SqliteBackend])
+def test_backend_changed_source(backend, apidoc, source, tmpdir):
+    store = backend((tmpdir / 'default.json').strpath + backend.extension, source.strpath, 'default')
+    store.write(apidoc, build_index(apidoc))
+    source.write('{"docs": {"resources": {}}}')
+    assert store.read() is None
+
+
+@pytest.mark.parametrize('dirname', ['api.example.com?v=2', 'cache#1', 'a%20b'])
+def test_sqlite_backend_special_characters(apidoc, source, tmpdir, dirname):
+    cache_dir = tmpdir.mkdir(dirname)
+    store = SqliteBackend((cache_dir / 'default.json.sqlite').strpath, source.strpath, 'default')
+    store.write(apidoc, build_index(apidoc))
+    stored = store.read()
+    assert stored is not None
+    assert sorted(stored[1].keys()) == ['comments', 'posts', 'users']
+
+
+def test_sqlite_backend_point_queries(apidoc, source, tmpdir, mocker):
+    store = SqliteBackend((tmpdir / 'default.json.sqlite').strpath, source.strpath, 'default')
+    store.write(apidoc, build_index(apidoc))
+    index = store.read()[1]
+    query = mocker.spy(index, '_query')
+    action = index['users']['show']
+    assert action['name'] == 'show'
+    assert query.call_count == 1
+    assert action['apis'] == build_index(apidoc)['users']['show']['apis']
+    assert action['params'] == build_index(apidoc)['users']['show']['params']
+    assert query.call_count == 3
+    assert index['users']['show'] is action
+    assert action['params'] is action['params']
+    assert query.call_count == 3
+
+
+def test_sqlite_backend_missing_action(apidoc, source, tmpdir):
+    store = SqliteBackend((tmpdir / 'default.json.sqlite').strpath, source.strpath, 'default')
+    store.write(apidoc, build_index(apidoc))
+    index = store.read()[1]
+    assert 'missing' not in index['users']
+    with pytest.raises(KeyError):
+        index['users']['missing']
+    with pytest.raises(KeyError):
+        index['missing']
+
+
+def test_sqlite_backend_invalid(source, tmpdir):
+    tmpdir.join('default.json.sqlite').write('not a database')
+    assert SqliteBackend((tmpdir / 'default.json.sqlite').strpath, source.strpath, 'default').read() is None
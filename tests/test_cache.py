@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from apypie.cache import CacheLock, atomic_write, build_index, make_lean, read_index, read_shards, write_index, write_shards
+
+
+@pytest.fixture
+def apidoc(fixture_dir):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        return json.load(read_file)
+
+
+@pytest.fixture
+def source(fixture_dir, tmpdir):
+    source = tmpdir / 'default.json'
+    fixture_dir.join('dummy.json').copy(source)
+    return source
+
+
+def test_build_index(apidoc):
+    index = build_index(apidoc)
+    assert sorted(index.keys()) == ['comments', 'posts', 'users']
+    assert index['comments']['archive']['apis'][0]['api_url'] == '/archive/comments/:id'
+
+
+def test_read_index(apidoc, source, tmpdir):
+    index_path = (tmpdir / 'default.json.idx').strpath
+    write_index(index_path, source.strpath, 'default', apidoc, build_index(apidoc))
+    loaded_apidoc, loaded_index = read_index(index_path, source.strpath, 'default')
+    assert loaded_apidoc == apidoc
+    assert loaded_index['users']['show'] is loaded_apidoc['docs']['resources']['users']['methods'][1]
+
+
+def test_read_index_missing(source, tmpdir):
+    assert read_index((tmpdir / 'default.json.idx').strpath, source.strpath, 'default') is None
+
+
+def test_read_index_other_checksum(apidoc, source, tmpdir):
+    index_path = (tmpdir / 'default.json.idx').strpath
+    write_index(index_path, source.strpath, 'default', apidoc, build_index(apidoc))
+    assert read_index(index_path, source.strpath, 'c0ffee') is None
+
+
+def test_read_index_changed_source(apidoc, source, tmpdir):
+    index_path = (tmpdir / 'default.json.idx').strpath
+    write_index(index_path, source.strpath, 'default', apidoc, build_index(apidoc))
+    source.write('{}')
+    assert read_index(index_path, source.strpath, 'default') is None
+
+
+def test_read_shards(apidoc, source, tmpdir):
+    shards_dir = (tmpdir / 'default.json.shards').strpath
+    write_shards(shards_dir, source.strpath, 'default', apidoc)
+    index = read_shards(shards_dir, source.strpath, 'default')
+    assert sorted(index) == ['comments', 'posts', 'users']
+    assert index.loaded == []
+    assert index['users']['show'] == build_index(apidoc)['users']['show']
+    assert index.loaded == ['users']
+
+
+def test_read_shards_unknown_resource(apidoc, source, tmpdir):
+    shards_dir = (tmpdir / 'default.json.shards').strpath
+    write_shards(shards_dir, source.strpath, 'default', apidoc)
+    with pytest.raises(KeyError):
+        read_shards(shards_dir, source.strpath, 'default')['missing']
+
+
+def test_read_shards_other_checksum(apidoc, source, tmpdir):
+    shards_dir = (tmpdir / 'default.json.shards').strpath
+    write_shards(shards_dir, source.strpath, 'default', apidoc)
+    assert read_shards(shards_dir, source.strpath, 'c0ffee') is None
+
+
+def test_read_shards_changed_source(apidoc, source, tmpdir):
+    shards_dir = (tmpdir / 'default.json.shards').strpath
+    write_shards(shards_dir, source.strpath, 'default', apidoc)
+    source.write('{}')
+    assert read_shards(shards_dir, source.strpath, 'default') is None
+
+
+def test_read_shards_missing(source, tmpdir):
+    assert read_shards((tmpdir / 'default.json.shards').strpath, source.strpath, 'default') is None
+
+
+def test_atomic_write(tmpdir):
+    path = (tmpdir / 'default.json').strpath
+    with atomic_write(path) as target:
+        target.write('{}')
+        assert tmpdir.join('default.json').check(exists=0)
+    assert tmpdir.join('default.json').read() == '{}'
+    assert tmpdir.listdir() == [tmpdir / 'default.json']
+
+
+def test_atomic_write_failure(tmpdir):
+    tmpdir.join('default.json').write('old')
+    with pytest.raises(RuntimeError):
+        with atomic_write((tmpdir / 'default.json').strpath) as target:
+            target.write('new')
+            raise RuntimeError
+    assert tmpdir.join('default.json').read() == 'old'
+    assert tmpdir.listdir() == [tmpdir / 'default.json']
+
+
+def test_cache_lock(tmpdir):
+    path = (tmpdir / '.lock').strpath
+    with CacheLock(path) as lock:
+        assert lock.locked
+        with CacheLock(path, timeout=0.2) as other_lock:
+            assert not other_lock.locked
+    with CacheLock(path, timeout=0.2) as lock:
+        assert lock.locked
+
+
+def test_cache_lock_missing_dir(tmpdir):
+    with CacheLock((tmpdir / 'missing' / '.lock').strpath) as lock:
+        assert not lock.locked
+
+
+def test_make_lean(apidoc):
+    lean_apidoc = make_lean(apidoc)
+    users = lean_apidoc['docs']['resources']['users']
+    create = build_index(lean_apidoc)['users']['create']
+    assert 'full_description' not in users
+    assert 'examples' not in users['methods'][0]
+    assert 'description' not in create['params'][0]
+    assert 'description' not in create['params'][0]['params'][0]
+    assert create['params'][0]['params'][0]['validator'] == 'Must be a String'
+    assert create['apis'][0]['api_url'] == '/users'
@@ -0,0 +1,161 @@
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import importlib.util
+import json
+import sys
+
+import pytest
+import requests
+
+import apypie
+from apypie.codec import JsonCodec, OrjsonCodec, default_codec, get_codec
+
+HAS_ORJSON = importlib.util.find_spec('orjson') is not None
+CODECS = ['json', pytest.param('orjson', marks=pytest.mark.skipif(not HAS_ORJSON, reason='orjson not installed'))]
+
+
+@pytest.fixture
+def no_default_codec(mocker):
+    mocker.patch('apypie.codec._DEFAULT_CODEC', None)
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_roundtrip(codec):
+    codec = get_codec(codec)
+    data = {'name': 'Jöhn Doe', 'ids': [1, 2.5, None, True], 'nested': {1: 'one'}}
+    encoded = codec.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == {'name': 'Jöhn Doe', 'ids': [1, 2.5, None, True], 'nested': {'1': 'one'}}
+    assert codec.loads(encoded.decode('utf-8')) == codec.loads(encoded)
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_loads_invalid(codec):
+    with pytest.raises(ValueError):
+        get_codec(codec).loads(b'{"broken": ')
+
+
+def test_get_codec_by_name():
+    assert type(get_codec('json')) is JsonCodec
+
+
+def test_get_codec_object():
+    codec = JsonCodec()
+    assert get_codec(codec) is codec
+
+
+def test_get_codec_module():
+    codec = get_codec(json)
+    assert codec.dumps({'name': 'Jöhn Doe'}) == json.dumps({'name': 'Jöhn Doe'}).encode('utf-8')
+    assert codec.loads(b'{"id": 1}') == {'id': 1}
+
+
+def test_get_codec_default():
+    assert get_codec() is default_codec()
+
+
+def test_get_codec_unknown():
+    with pytest.raises(ValueError) as excinfo:
+        get_codec('yaml')
+    assert 'Unsupported JSON codec yaml, use one of: json, orjson' in str(excinfo.value)
+
+
+def test_get_codec_missing(mocker):
+    mocker.patch.dict(sys.modules, {'orjson': None})
+    with pytest.raises(ValueError) as excinfo:
+        get_codec('orjson')
+    assert 'JSON codec orjson requested, but orjson not found.' in str(excinfo.value)
+
+
+def test_default_codec_prefers_orjson(no_default_codec):
+    pytest.importorskip('orjson')
+    assert type(default_codec()) is OrjsonCodec
+    assert default_codec() is default_codec()
+
+
+def test_default_codec_fallback(no_default_codec, mocker):
+    mocker.patch.dict(sys.modules, {'orjson': None})
+    assert type(default_codec()) is JsonCodec
+
+
+def test_api_codec(api):
+    assert api.codec is default_codec()
+
+
+def test_api_codec_unknown(tmpdir):
+    with pytest.raises(ValueError):
+        apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, json_codec='yaml')
+
+
+def test_api_codec_requests(apidoc_cache_dir, requests_mock, mocker):
+    codec = JsonCodec()
+    dumps = mocker.spy(codec, 'dumps')
+    loads = mocker.spy(codec, 'loads')
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath, json_codec=codec)
+    requests_mock.post('https://api.example.com/users', json={'id': 1})
+    assert api.call('users', 'create', {'user': {'name': 'John Doe'}}) == {'id': 1}
+    dumps.assert_called_once_with({'user': {'name': 'John Doe'}})
+    loads.assert_any_call(b'{"id": 1}')
+    assert requests_mock.last_request.headers['Content-Type'] == 'application/json'
+    assert requests_mock.last_request.json() == {'user': {'name': 'John Doe'}}
+
+
+@pytest.mark.parametrize('method,params,kwargs,expected_body', [
+    ('post', None, {}, b'{}'),
+    ('put', {'id': 1}, {}, b'{"id": 1}'),
+    ('delete', {'id': 1}, {}, b'{"id": 1}'),
+    ('delete', None, {}, None),
+    ('get', {'id': 1}, {}, None),
+    ('post', {'id': 1}, {'data': {'name': 'John Doe'}}, 'name=John+Doe'),
+])
+def test_api_codec_request_body(apidoc_cache_dir, requests_mock, method, params, kwargs, expected_body):
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath, json_codec='json')
+    requests_mock.register_uri(method.upper(), 'https://api.example.com/', text='{}')
+    api.http_call(method, '/', params, **kwargs)
+    assert requests_mock.last_request.body == expected_body
+
+
+@pytest.mark.parametrize('codec', CODECS + [json])
+def test_api_codec_invalid_response(apidoc_cache_dir, requests_mock, codec):
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=apidoc_cache_dir.strpath, json_codec=codec)
+    requests_mock.get('https://api.example.com/', text='<html>Bad Gateway</html>')
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        api.http_call('get', '/')
+
+
+def test_api_codec_keeps_content_type(api, requests_mock):
+    requests_mock.post('https://api.example.com/', text='{}')
+    api.http_call('post', '/', {'id': 1}, headers={'content-type': 'application/vnd.api+json'})
+    assert requests_mock.last_request.headers['Content-Type'] == 'application/vnd.api+json'
+
+
+@pytest.mark.parametrize('backend', ['index', 'shards', 'sqlite'])
+def test_api_codec_module(fixture_dir, requests_mock, tmpdir, backend):
+    requests_mock.get('https://api.example.com/apidoc/v1.json', body=fixture_dir.join('dummy.json').open('rb'), headers={'Apipie-Checksum': 'abcdef'})
+    requests_mock.post('https://api.example.com/users', json={'id': 1})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, json_codec=json)
+    assert api.call('users', 'create', {'user': {'name': 'John Doe'}}) == {'id': 1}
+    assert requests_mock.last_request.json() == {'user': {'name': 'John Doe'}}
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, json_codec=json)
+    assert other_api.apidoc_cache_name == 'abcdef'
+    assert other_api.apidoc_index['users']['show']['apis'][0]['api_url'] == '/users/:id'
+    assert requests_mock.call_count == 2
+
+
+@pytest.mark.parametrize('backend', ['index', 'shards', 'sqlite'])
+@pytest.mark.parametrize('write_codec', ['json', 'orjson'])
+@pytest.mark.parametrize('read_codec', ['json', 'orjson'])
+def test_api_codec_cache(fixture_dir, requests_mock, tmpdir, backend, write_codec, read_codec):
+    if 'orjson' in (write_codec, read_codec) and not HAS_ORJSON:
+        pytest.skip('orjson not installed')
+    requests_mock.get('https://api.example.com/apidoc/v1.json', body=fixture_dir.join('dummy.json').open('rb'), headers={'Apipie-Checksum': 'abcdef'})
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, json_codec=write_codec)
+    expected = api.apidoc_index['users']['show']['apis'][0]['api_url']
+
+    # start from scratch, like a new process would
+    apypie.registry.APIDOC_REGISTRY.clear()
+    other_api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, apidoc_cache_backend=backend, json_codec=read_codec)
+    assert other_api.apidoc_cache_name == 'abcdef'
+    assert other_api.apidoc_index['users']['show']['apis'][0]['api_url'] == expected
+    assert requests_mock.call_count == 1
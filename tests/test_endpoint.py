@@ -0,0 +1,75 @@
+import pytest
+
+import apypie
+
+
+def test_endpoint(api):
+    endpoint = api.endpoint('users', 'show')
+    assert isinstance(endpoint, apypie.Endpoint)
+    assert endpoint.resource == 'users'
+    assert endpoint.name == 'show'
+    assert endpoint.action is api.resource('users').action('show')
+
+
+def test_endpoint_unknown_action(api):
+    with pytest.raises(KeyError):
+        api.endpoint('users', 'unknown')
+    with pytest.raises(KeyError):
+        api.endpoint('unknown', 'show')
+
+
+def test_endpoint_call(api, mocker):
+    params = {'a': 1}
+    headers = {'content-type': 'application/json'}
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    api.endpoint('users', 'index')(params, headers)
+    api.http_call.assert_called_once_with(api, 'get', '/users', params, headers, None, None)
+
+
+def test_endpoint_call_fill_params(api, mocker):
+    headers = {'content-type': 'application/json'}
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    endpoint = api.endpoint('users', 'show')
+    endpoint({'id': 1}, headers)
+    endpoint({'id': 2})
+    assert api.http_call.call_args_list == [
+        mocker.call(api, 'get', '/users/1', {}, headers, None, None),
+        mocker.call(api, 'get', '/users/2', {}, None, None, None),
+    ]
+
+
+def test_endpoint_call_data_and_files(api, mocker):
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    api.endpoint('users', 'create_unnested')(data={'name': 'John Doe'}, files={'avatar': b'\x00'})
+    api.http_call.assert_called_once_with(api, 'post', '/users/create_unnested', {}, None, {'name': 'John Doe'}, {'avatar': b'\x00'})
+
+
+def test_endpoint_call_validates(api, mocker):
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    endpoint = api.endpoint('users', 'create')
+    with pytest.raises(apypie.exceptions.MissingArgumentsError):
+        endpoint({'user': {'vip': True}})
+    api.http_call.assert_not_called()
+    endpoint({'user': {'vip': True}}, options={'skip_validation': True})
+    api.http_call.assert_called_once_with(api, 'post', '/users', {'user': {'vip': True}}, None, None, None)
+
+
+def test_endpoint_resolves_once(api, mocker):
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    endpoint = api.endpoint('users', 'show')
+    resource = mocker.spy(api, 'resource')
+    for num in range(10):
+        endpoint({'id': num})
+    resource.assert_not_called()
+    assert api.http_call.call_count == 10
+
+
+def test_endpoint_resolves_again_after_apidoc_change(api, mocker):
+    mocker.patch('apypie.Api.http_call', autospec=True)
+    endpoint = api.endpoint('users', 'show')
+    action = endpoint.action
+    api._apidoc_index = dict(api.apidoc_index)
+    endpoint({'id': 1})
+    assert endpoint.action is not action
+    assert endpoint.action is api.resource('users').action('show')
+    api.http_call.assert_called_once_with(api, 'get', '/users/1', {}, None, None, None)
@@ -6,13 +6,7 @@ import pytest
 import requests
 import requests.exceptions
 
-from apypie.foreman import ForemanApi, ForemanApiException, _recursive_dict_keys
-
-
-def test_recursive_dict_keys():
-    a_dict = {'level1': 'has value', 'level2': {'real_level2': 'more value', 'level3': {'real_level3': 'nope'}}}
-    expected_keys = set(['level1', 'level2', 'level3', 'real_level2', 'real_level3'])
-    assert _recursive_dict_keys(a_dict) == expected_keys
+from apypie.foreman import ForemanApi, ForemanApiException
 
 
 @pytest.fixture
@@ -55,6 +49,17 @@ def test_resource_action(foremanapi, requests_mock):
     assert org
 
 
+def test_resource_action_many(foremanapi, requests_mock):
+    requests_mock.get('https://api.example.com/api/organizations/1', json={'id': 1})
+    requests_mock.get('https://api.example.com/api/organizations/2', json={'id': 2})
+    results = foremanapi.resource_action_many([('organizations', 'show', {'id': 2}), ('bubblegums', 'show', {'id': 1}),
+                                               ('organizations', 'show', {'id': 1})])
+    assert results[0] == ({'id': 2}, None)
+    assert results[1][0] is None
+    assert isinstance(results[1][1], ForemanApiException)
+    assert results[2] == ({'id': 1}, None)
+
+
 def test_resource_action_unknown_resource(foremanapi):
     with pytest.raises(ForemanApiException) as excinfo:
         foremanapi.resource_action('bubblegums', 'show', {'id': 1})
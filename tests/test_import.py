@@ -0,0 +1,77 @@
+import subprocess
+import sys
+
+import pytest
+
+import apypie
+
+# microseconds, importing requests alone usually takes longer than this
+IMPORT_TIME_BUDGET = 75000
+
+# before Python 3.7, there is no module level __getattr__ and everything is imported with the package
+requires_lazy_imports = pytest.mark.skipif(sys.version_info < (3, 7), reason='lazy imports require Python 3.7 or newer')
+
+
+def _run(code, *args):
+    return subprocess.run([sys.executable] + list(args) + ['-c', code], check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def _import_time(code):
+    # cumulative time of the top level imports of apypie modules, as reported by -X importtime
+    total = 0
+    for line in _run(code, '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith(' apypie'):
+            total += int(cumulative)
+    return total
+
+
+@requires_lazy_imports
+def test_import_is_lazy():
+    result = _run('import sys, apypie; print(" ".join(sorted(sys.modules)))')
+    modules = result.stdout.split()
+    assert 'apypie' in modules
+    for module in ('apypie.api', 'apypie.foreman', 'apypie.inflector', 'requests', 'requests_oauthlib', 'requests_gssapi', 'sqlite3'):
+        assert module not in modules
+
+
+@requires_lazy_imports
+def test_api_import_skips_optional_dependencies():
+    result = _run('import sys, apypie; apypie.Api; apypie.ForemanApi; print(" ".join(sorted(sys.modules)))')
+    modules = result.stdout.split()
+    assert 'apypie.api' in modules
+    for module in ('requests', 'requests_oauthlib', 'requests_gssapi', 'requests_kerberos', 'sqlite3'):
+        assert module not in modules
+
+
+def test_api_without_lzma(tmpdir):
+    code = ('import sys; sys.modules["lzma"] = None; import apypie; '
+            'api = apypie.Api(uri="https://api.example.com", apidoc_cache_dir=sys.argv[1], apidoc_cache_compression="gzip"); '
+            'print(api._read_apidoc_cache())')
+    result = subprocess.run([sys.executable, '-c', code, tmpdir.strpath], check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    assert result.stdout.strip() == 'None'
+
+
+@pytest.mark.parametrize('name', apypie.__all__)
+def test_lazy_attributes(name):
+    value = getattr(apypie, name)
+    assert value.__name__ == name
+    assert name in dir(apypie)
+
+
+def test_submodule_attribute():
+    result = _run('import apypie; print(apypie.registry.APIDOC_REGISTRY is not None)')
+    assert result.stdout.strip() == 'True'
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        apypie.DoesNotExist  # pylint: disable=pointless-statement
+
+
+@requires_lazy_imports
+def test_import_time():
+    assert _import_time('import apypie; apypie.Api; apypie.ForemanApi') < IMPORT_TIME_BUDGET
@@ -0,0 +1,53 @@
+import json
+
+import apypie
+from apypie.__main__ import main
+
+
+def test_cache_from_file(fixture_dir, tmpdir, capsys):
+    assert main(['cache', '--uri', 'https://api.example.com', '--apidoc-cache-dir', tmpdir.strpath,
+                 '--from-file', fixture_dir.join('dummy.json').strpath]) == 0
+    assert tmpdir.join('default.json').check(file=1)
+    assert tmpdir.join('default.json.idx').check(file=1)
+    out = capsys.readouterr().out
+    assert 'resources: 3\n' in out
+    assert 'actions: 17\n' in out
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath)
+    assert api.resources == ['comments', 'posts', 'users']
+
+
+def test_cache_from_server(fixture_dir, requests_mock, tmpdir, capsys):
+    with fixture_dir.join('dummy.json').open() as read_file:
+        data = json.load(read_file)
+    requests_mock.get('https://api.example.com/apidoc/v1.json', json=data, headers={'Apipie-Checksum': 'c0ffee'})
+    tmpdir.join('outdated.json').write('{}')
+    assert main(['cache', '--uri', 'https://api.example.com', '--apidoc-cache-dir', tmpdir.strpath, '--backend', 'sqlite']) == 0
+    assert tmpdir.join('outdated.json').check(exists=0)
+    assert tmpdir.join('c0ffee.json').check(file=1)
+    assert tmpdir.join('c0ffee.json.sqlite').check(file=1)
+    assert 'c0ffee.json.sqlite' in capsys.readouterr().out
+
+
+def test_cache_invalid_file(tmpdir, capsys):
+    tmpdir.join('invalid.json').write('[]')
+    assert main(['cache', '--uri', 'https://api.example.com', '--apidoc-cache-dir', tmpdir.join('cache').strpath,
+                 '--from-file', tmpdir.join('invalid.json').strpath]) == 1
+    assert 'is not an apidoc' in capsys.readouterr().err
+
+
+def test_cache_failure_keeps_cache(fixture_dir, requests_mock, tmpdir, capsys):
+    cache_dir = tmpdir.join('cache')
+    assert main(['cache', '--uri', 'https://api.example.com', '--apidoc-cache-dir', cache_dir.strpath,
+                 '--from-file', fixture_dir.join('dummy.json').strpath]) == 0
+    requests_mock.get('https://api.example.com/apidoc/v1.json', status_code=500)
+    assert main(['cache', '--uri', 'https://api.example.com', '--apidoc-cache-dir', cache_dir.strpath]) == 1
+    assert 'Could not prepare the apidoc cache' in capsys.readouterr().err
+    assert cache_dir.join('default.json').check(file=1)
+    assert cache_dir.join('default.json.idx').check(file=1)
+    assert tmpdir.listdir() == [cache_dir]
+
+    apypie.registry.APIDOC_REGISTRY.clear()
+    api = apypie.Api(uri='https://api.example.com', apidoc_cache_dir=cache_dir.strpath)
+    assert api.resources == ['comments', 'posts', 'users']
@@ -50,3 +50,22 @@ def test_param_required(param):
 
 def test_param_validator(param):
     assert "Must be a Hash" == param.validator
+
+
+def test_param_without_description():
+    param = apypie.Param(name='name', expected_type='string', required=True, validator='Must be a String')
+    assert '' == param.description
+
+
+def test_param_immutable(param):
+    with pytest.raises(AttributeError):
+        param.name = 'other'
+    with pytest.raises(AttributeError):
+        param.description = 'other'
+    assert not hasattr(param, '__dict__')
+
+
+def test_param_interned_strings(param):
+    other = apypie.Param(name=''.join(['archi', 'tecture']), expected_type=''.join(['ha', 'sh']))
+    assert other.name is param.name
+    assert other.expected_type is param.expected_type
@@ -0,0 +1,97 @@
+import pytest
+
+from apypie.param import Param
+from apypie.payload import compile_payload_plan, recursive_dict_keys
+
+
+def _prepare_params(params, input_dict):
+    # the recursive walk prepare_params used to do
+    result = {}
+    for param in params:
+        if param.expected_type == 'hash' and param.params:
+            nested_result = _prepare_params(param.params, input_dict.get(param.name, input_dict))
+            if nested_result:
+                result[param.name] = nested_result
+        elif param.name in input_dict:
+            result[param.name] = input_dict[param.name]
+    return result
+
+
+def _reference(action, input_dict):
+    params = _prepare_params(action.params, input_dict)
+    route = action.find_route(input_dict)
+    params.update({name: input_dict[name] for name in route.params_in_path if name in input_dict})
+    return params, set(input_dict.keys()) - recursive_dict_keys(params)
+
+
+def _all_names(params):
+    for param in params:
+        yield param.name
+        yield from _all_names(param.params)
+
+
+def _inputs(action):
+    names = sorted(set(_all_names(action.params)))
+    hashes = [param for param in action.params if param.expected_type == 'hash' and param.params]
+    yield {}
+    yield {name: num for num, name in enumerate(names)}
+    yield {name: {'nested': name} for name in names}
+    yield dict({name: num for num, name in enumerate(names)}, unsupported=True)
+    for param in hashes:
+        yield {param.name: {nested.name: 1 for nested in param.params}, 'id': 2, 'unsupported': 3}
+        yield {param.name: {}, 'id': 2}
+        yield {param.name: 'not a dict', 'id': 2}
+        yield dict({nested.name: 1 for nested in param.params}, **{param.name: None})
+
+
+def test_recursive_dict_keys():
+    assert recursive_dict_keys({'a': {'b': 1, 'c': {'d': 2}}, 'e': [1]}) == {'a', 'b', 'c', 'd', 'e'}
+    a_dict = {'level1': 'has value', 'level2': {'real_level2': 'more value', 'level3': {'real_level3': 'nope'}}}
+    assert recursive_dict_keys(a_dict) == {'level1', 'level2', 'level3', 'real_level2', 'real_level3'}
+
+
+@pytest.mark.parametrize('fixture', ['api', 'foreman_api', 'luna_api'])
+def test_prepare_payload_matches_walking_params(request, fixture):
+    api = request.getfixturevalue(fixture)
+    for resource in api.resources:
+        for action_name in api.resource(resource).actions:
+            action = api.resource(resource).action(action_name)
+            for input_dict in _inputs(action):
+                try:
+                    expected = _reference(action, input_dict)
+                except (AttributeError, TypeError) as exc:
+                    with pytest.raises(type(exc)):
+                        action.prepare_payload(input_dict)
+                    continue
+                assert action.prepare_payload(input_dict) == expected, (resource, action_name, input_dict)
+                assert action.prepare_params(input_dict) == expected[0]
+
+
+def test_prepare_payload_plan_is_reused(api):
+    action = api.resource('users').action('create')
+    assert action.prepare_payload({'name': 'John Doe', 'unknown': 1}) == ({'user': {'name': 'John Doe'}}, {'unknown'})
+    plan = action._payload_plan
+    assert plan is not None
+    action.prepare_params({'name': 'Jane Doe'})
+    assert action._payload_plan is plan
+
+
+def test_plan_nested_hash_given_explicitly():
+    plan = compile_payload_plan([Param(name='user', expected_type='hash', params=[
+        {'name': 'name', 'expected_type': 'string'},
+        {'name': 'address', 'expected_type': 'hash', 'params': [{'name': 'city', 'expected_type': 'string'}]},
+    ]), Param(name='name', expected_type='string')])
+    used_keys = set()
+    assert plan({'name': 'John', 'city': 'Ankh'}, used_keys) == {'name': 'John', 'user': {'name': 'John', 'address': {'city': 'Ankh'}}}
+    assert used_keys == {'name', 'user', 'address', 'city'}
+    used_keys = set()
+    assert plan({'name': 'John', 'address': {'city': 'Ankh'}, 'city': 'Lancre'}, used_keys) == {'name': 'John', 'user': {'name': 'John', 'address': {'city': 'Ankh'}}}
+    assert used_keys == {'name', 'user', 'address', 'city'}
+    assert plan({'user': {'address': {}}, 'name': 'John'}, set()) == {'name': 'John'}
+
+
+def test_plan_duplicate_names():
+    params = [Param(name='user', expected_type='string'),
+              Param(name='user', expected_type='hash', params=[{'name': 'name', 'expected_type': 'string'}])]
+    for input_dict in ({'user': 'John'}, {'user': {'name': 'John'}}, {'name': 'John'}):
+        assert compile_payload_plan(params)(input_dict, set()) == _prepare_params(params, input_dict)
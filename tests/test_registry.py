@@ -0,0 +1,39 @@
+from apypie.registry import ApidocRegistry
+
+
+def test_registry_get_missing():
+    assert ApidocRegistry().get('missing') == (None, None)
+
+
+def test_registry_share():
+    registry = ApidocRegistry()
+    apidoc = {'docs': {}}
+    assert registry.share('key', apidoc) == (apidoc, None)
+    assert registry.get('key') == (apidoc, None)
+
+
+def test_registry_share_keeps_existing():
+    registry = ApidocRegistry()
+    apidoc = {'docs': {}}
+    index = {}
+    registry.share('key', apidoc)
+    shared_apidoc, shared_index = registry.share('key', {'docs': {}}, index)
+    assert shared_apidoc is apidoc
+    assert shared_index is index
+
+
+def test_registry_invalidate():
+    registry = ApidocRegistry()
+    registry.share('key', {'docs': {}})
+    registry.invalidate('key')
+    registry.invalidate('missing')
+    assert registry.get('key') == (None, None)
+
+
+def test_registry_replace():
+    registry = ApidocRegistry()
+    old_apidoc, new_apidoc, newest_apidoc = {'old': True}, {'new': True}, {'newest': True}
+    registry.share('key', old_apidoc, {})
+    assert registry.replace('key', old_apidoc, new_apidoc, {}) == (new_apidoc, {})
+    assert registry.replace('key', old_apidoc, newest_apidoc, {}) == (new_apidoc, {})
+    assert registry.replace('other', None, newest_apidoc, {}) == (newest_apidoc, {})
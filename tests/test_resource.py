@@ -15,6 +15,13 @@ def test_resource_has_action_false(resource):
     assert not resource.has_action('missing')
 
 
+def test_resource_has_action_does_not_list(resource, mocker):
+    actions = mocker.patch('apypie.Resource.actions', new_callable=mocker.PropertyMock)
+    assert resource.has_action('index')
+    assert resource.action('index')
+    actions.assert_not_called()
+
+
 def test_resource_action_missing(resource):
     with pytest.raises(KeyError) as excinfo:
         resource.action('missing')
@@ -35,3 +35,19 @@ def test_route_path_with_params_fill_wrong(route):
 
 def test_route_path_with_params(route):
     assert '/api/architectures/:id' == route.path_with_params()
+
+
+def test_route_immutable(route):
+    with pytest.raises(AttributeError):
+        route.path = '/api/hosts'
+    assert not hasattr(route, '__dict__')
+
+
+def test_route_path_params(route):
+    assert frozenset(['id']) == route.path_params
+
+
+def test_route_path_with_overlapping_params():
+    route = apypie.Route("/api/hosts/:host_id/interfaces/:host", "GET")
+    assert ['host_id', 'host'] == route.params_in_path
+    assert '/api/hosts/1/interfaces/2' == route.path_with_params({'host_id': 1, 'host': 2})
@@ -0,0 +1,125 @@
+# pylint: disable=invalid-name,missing-docstring,protected-access
+import json
+
+import pytest
+import requests
+
+import apypie
+from apypie.transport import HandlerTransport, SessionTransport, Transport, build_response
+
+
+@pytest.fixture
+def handler(fixture_dir):
+    apidoc = fixture_dir.join('dummy.json').read_binary()
+    requests_seen = []
+
+    def handle(request):
+        requests_seen.append(request)
+        if request.path_url == '/apidoc/v1.json':
+            return 200, {'Apipie-Checksum': 'abcdef'}, apidoc
+        if request.method == 'GET' and request.path_url.startswith('/users/'):
+            return 200, {}, {'id': int(request.path_url.rsplit('/', 1)[1])}
+        if request.method == 'POST':
+            return 201, {}, request.body
+        if request.method == 'DELETE':
+            return 204, {}, None
+        return 404, {}, {'error': 'not found'}
+
+    handle.requests = requests_seen
+    return handle
+
+
+@pytest.fixture
+def handler_api(handler, tmpdir):
+    return apypie.Api(uri='https://api.example.com', apidoc_cache_dir=tmpdir.strpath, username='admin', password='changeme',
+                      transport=HandlerTransport(handler))
+
+
+def test_build_response():
+    response = build_response('https://api.example.com/', 201, 'Created', [('Set-Cookie', 'a=1'), ('set-cookie', 'b=2'),
+                                                                           ('Content-Type', 'application/json; charset=utf-8')], b'{"id": 1}')
+    assert response.status_code == 201
+    assert response.headers['set-cookie'] == 'a=1, b=2'
+    assert response.encoding == 'utf-8'
+    assert response.json() == {'id': 1}
+    assert list(response.iter_content(chunk_size=4)) == [b'{"id', b'": 1', b'}']
+
+
+def test_default_transport(api):
+    assert isinstance(api.transport, SessionTransport)
+    assert api.transport.session is api._session
+
+
+def test_transport_interface():
+    with pytest.raises(NotImplementedError):
+        Transport().send(requests.Request('GET', 'https://api.example.com/').prepare())
+
+
+def test_handler_transport_call(handler_api, handler):
+    assert handler_api.call('users', 'show', {'id': 1}) == {'id': 1}
+    request = handler.requests[-1]
+    assert request.url == 'https://api.example.com/users/1'
+    assert request.headers['Accept'] == 'application/json;version=1'
+    assert request.headers['Authorization'].startswith('Basic ')
+
+
+def test_handler_transport_loads_apidoc(handler_api, handler):
+    assert 'users' in handler_api.resources
+    assert handler.requests[0].path_url == '/apidoc/v1.json'
+    assert handler_api.apidoc_cache_name == 'abcdef'
+
+
+def test_handler_transport_post(handler_api):
+    params = {'user': {'name': 'John Doe'}}
+    assert handler_api.call('users', 'create', params) == params
+
+
+def test_handler_transport_no_content(handler_api):
+    assert handler_api.call('users', 'destroy', {'id': 1}) is None
+
+
+def test_handler_transport_http_error(handler_api):
+    with pytest.raises(requests.exceptions.HTTPError) as excinfo:
+        handler_api.http_call('get', '/unknown')
+    assert excinfo.value.response.status_code == 404
+    assert excinfo.value.response.reason == 'Not Found'
+    assert excinfo.value.response.json() == {'error': 'not found'}
+
+
+@pytest.mark.parametrize('body,headers,expected_content,expected_type', [
+    ({'id': 1}, {}, b'{"id": 1}', 'application/json'),
+    ({'id': 1}, {'content-type': 'application/vnd.api+json'}, b'{"id": 1}', 'application/vnd.api+json'),
+    ('{"id": 1}', {}, b'{"id": 1}', None),
+    (b'\x00', {}, b'\x00', None),
+    (None, {}, b'', None),
+])
+def test_handler_transport_body(body, headers, expected_content, expected_type):
+    transport = HandlerTransport(lambda request: (299, headers, body))
+    response = transport.send(requests.Request('GET', 'https://api.example.com/').prepare())
+    assert response.status_code == 299
+    assert response.reason == ''
+    assert response.content == expected_content
+    assert response.headers.get('Content-Type') == expected_type
+
+
+def test_session_transport(api, requests_mock):
+    requests_mock.get('https://api.example.com/users/1', json={'id': 1})
+    response = api.transport.send(api.prepare_request('get', '/users/1'), timeout=5)
+    assert response.json() == {'id': 1}
+    assert requests_mock.last_request.timeout == 5
+
+
+def test_custom_transport(api, mocker):
+    transport = mocker.Mock(spec=Transport)
+    transport.send.return_value = build_response('https://api.example.com/users/1', 200, 'OK', [], json.dumps({'id': 1}).encode('utf-8'))
+    api.transport = transport
+    assert api.call('users', 'show', {'id': 1}) == {'id': 1}
+    request = transport.send.call_args[0][0]
+    assert request.method == 'GET'
+    assert request.url == 'https://api.example.com/users/1'
+
+
+def test_session_transport_close(mocker):
+    session = mocker.Mock()
+    SessionTransport(session).close()
+    session.close.assert_called_once_with()
@@ -0,0 +1,54 @@
+import pytest
+
+import apypie
+from apypie.validator import compile_validator, format_path
+
+
+def _outcome(validate, *args, **kwargs):
+    try:
+        validate(*args, **kwargs)
+    except Exception as exc:  # pylint: disable=broad-except
+        return type(exc), str(exc)
+    return None
+
+
+@pytest.mark.parametrize('resource_name,action_name,values,kwargs', [
+    ('users', 'create', {'user': {'vip': True}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'address': {'street': 'K JZD'}}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'contacts': [{'kind': 'email'}]}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'contacts': [1, 2]}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'vip': 'maybe'}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'vip': 0}}, {}),
+    ('users', 'create', {'user': {'name': []}}, {}),
+    ('users', 'create', {'user': {'name': 1}}, {}),
+    ('users', 'create', {'user': {'name': None}}, {}),
+    ('users', 'create', {'user': {'name': 'John Doe', 'unknown': object()}}, {}),
+    ('users', 'create', [], {}),
+    ('users', 'create_unnested', {}, {'files': {'name': 'John Doe'}}),
+    ('users', 'create_unnested', {}, {'data': {'name': 'John Doe'}}),
+    ('users', 'create_unnested', {}, {}),
+    ('comments', 'archive', {'id': 'MYNUMBER'}, {}),
+    ('comments', 'archive', {'id': '1'}, {}),
+])
+def test_compiled_validator_matches_validate(api, resource_name, action_name, values, kwargs):
+    action = api.resource(resource_name).action(action_name)
+    expected = _outcome(action._validate, action.params, values, **kwargs)
+    assert _outcome(compile_validator(action.params), values, **kwargs) == expected
+
+
+def test_compiled_validator_used_by_action(api, mocker):
+    api.compile_validators = True
+    action = api.resource('users').action('create')
+    compile_spy = mocker.spy(apypie.action, 'compile_validator')
+    action.validate({'user': {'name': 'John Doe'}})
+    action.validate({'user': {'name': 'Jane Doe'}})
+    with pytest.raises(ValueError) as excinfo:
+        action.validate({'user': {'name': 'John Doe', 'vip': 'maybe'}})
+    assert "vip (maybe): Must be one of" in str(excinfo.value)
+    assert compile_spy.call_count == 1
+
+
+def test_format_path():
+    assert 'user' == format_path((), 'user')
+    assert 'user[contacts][0][kind]' == format_path(('user', 'contacts', '0'), 'kind')
+    assert 'user[contacts]' == format_path(('user', 'contacts'))